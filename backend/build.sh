@@ -68,6 +68,10 @@ except Exception as e:
 print('✅ Supabase database ready - skipping migrations')
 "
 
+# Paylaşılan cache tablosu (REDIS_URL yoksa kullanılır; tablo varsa dokunulmaz)
+echo "🗃️ Creating cache table..."
+python manage.py createcachetable
+
 # System check
 echo "🔍 Running Django system checks..."
 python manage.py check --verbosity=1
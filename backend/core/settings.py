@@ -168,6 +168,46 @@ DATABASES = {
     )
 }
 
+# ==============================================================================
+# CACHE CONFIGURATION
+# ==============================================================================
+
+# Tüm gunicorn worker'ları aynı cache'i görür. REDIS_URL verilirse Redis, yoksa
+# veritabanı cache'i kullanılır (tablo: `python manage.py createcachetable`).
+# Anahtarlar CACHE_KEY_PREFIX ile ayrılır; CACHE_VERSION artırılınca eski kayıtlar okunmaz.
+REDIS_URL = os.getenv('REDIS_URL', '')
+CACHE_KEY_PREFIX = os.getenv('CACHE_KEY_PREFIX', 'sidrexgpt')
+CACHE_VERSION = int(os.getenv('CACHE_VERSION', '1'))
+
+if REDIS_URL:
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.redis.RedisCache',
+            'LOCATION': REDIS_URL,
+            'KEY_PREFIX': CACHE_KEY_PREFIX,
+            'VERSION': CACHE_VERSION,
+            'TIMEOUT': 300,
+            'OPTIONS': {
+                'socket_connect_timeout': 2,
+                'socket_timeout': 2,
+            },
+        }
+    }
+else:
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.db.DatabaseCache',
+            'LOCATION': 'django_cache',
+            'KEY_PREFIX': CACHE_KEY_PREFIX,
+            'VERSION': CACHE_VERSION,
+            'TIMEOUT': 300,
+            'OPTIONS': {
+                'MAX_ENTRIES': int(os.getenv('CACHE_MAX_ENTRIES', '20000')),
+                'CULL_FREQUENCY': 4,
+            },
+        }
+    }
+
 # ==============================================================================
 # PASSWORD VALIDATION
 # ==============================================================================
@@ -554,6 +554,11 @@ class WidgetConfigView(View):
                 'width': '60px',
                 'height': '60px'
             },
+            'chat_endpoints': {
+                'chat': '/api/robots/{slug}/chat/',
+                # SSE: `data: {"delta": ...}` parçaları, ardından `event: done` / `event: error`
+                'chat_stream': '/api/robots/{slug}/chat/stream/'
+            },
             'version': '1.0.0'
         }
         
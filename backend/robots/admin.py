@@ -1,5 +1,5 @@
 from django.contrib import admin
-from .models import Robot, RobotPDF, Brand, RobotSystemPrompt, ChatSession, ChatMessage
+from .models import Robot, RobotPDF, Brand, RobotSystemPrompt, ChatSession, ChatMessage, PDFIngestionJob, EmbeddingMigration
 from django.utils.html import format_html
 
 # Register your models here.
@@ -19,9 +19,9 @@ class RobotSystemPromptInline(admin.TabularInline):
 
 @admin.register(Robot)
 class RobotAdmin(admin.ModelAdmin):
-    list_display = ['name', 'product_name', 'brand', 'get_pdf_count', 'get_active_pdf_count', 'yaratilma_zamani', 'guncellenme_zamani']
-    list_filter = ['brand', 'yaratilma_zamani']
-    search_fields = ['name', 'product_name', 'brand__name']
+    list_display = ['name', 'slug', 'product_name', 'brand', 'optimizasyon_modu', 'get_pdf_count', 'get_active_pdf_count', 'yaratilma_zamani', 'guncellenme_zamani']
+    list_filter = ['brand', 'optimizasyon_modu', 'yaratilma_zamani']
+    search_fields = ['name', 'slug', 'product_name', 'brand__name']
     readonly_fields = ['yaratilma_zamani', 'guncellenme_zamani']
     list_editable = ['brand']
     inlines = [RobotPDFInline, RobotSystemPromptInline]
@@ -58,7 +58,7 @@ class BrandAdmin(admin.ModelAdmin):
     list_display = ['name', 'paket_turu', 'total_api_requests', 'request_limit', 'user_count_display', 'user_limit_display', 'remaining_requests_display', 'remaining_days_display', 'package_status_display', 'created_at']
     list_filter = ['paket_turu', 'created_at', 'updated_at']
     search_fields = ['name']
-    readonly_fields = ['created_at', 'updated_at', 'remaining_requests_display', 'remaining_days_display', 'package_status_display', 'user_count_display', 'user_limit_display', 'user_status_display', 'active_users_list', 'paket_bitis_tarihi', 'request_limit']
+    readonly_fields = ['created_at', 'updated_at', 'remaining_requests_display', 'remaining_days_display', 'package_status_display', 'user_count_display', 'user_limit_display', 'user_status_display', 'active_users_list', 'paket_bitis_tarihi', 'request_limit', 'total_api_requests']
     ordering = ['-total_api_requests', 'name']
     list_editable = ['paket_turu']
     
@@ -277,7 +277,7 @@ class ChatSessionAdmin(admin.ModelAdmin):
 @admin.register(ChatMessage)
 class ChatMessageAdmin(admin.ModelAdmin):
     list_display = ['get_user_display', 'get_robot_display', 'get_message_preview', 'status', 'response_time', 'citations_count', 'context_used', 'created_at']
-    list_filter = ['status', 'context_used', 'optimization_enabled', 'robot', 'created_at']
+    list_filter = ['status', 'context_used', 'optimization_enabled', 'answer_cache_status', 'robot', 'created_at']
     search_fields = ['user__username', 'robot__name', 'user_message', 'ai_response']
     readonly_fields = ['created_at', 'processing_started_at', 'processing_ended_at', 'response_time', 'session', 'user', 'robot']
     ordering = ['-created_at']
@@ -295,7 +295,7 @@ class ChatMessageAdmin(admin.ModelAdmin):
             'fields': ('processing_started_at', 'processing_ended_at', 'response_time', 'ai_model_used', 'tokens_used')
         }),
         ('Context ve Optimizasyon', {
-            'fields': ('optimization_enabled', 'context_used', 'context_size', 'citations_count')
+            'fields': ('optimization_enabled', 'context_used', 'context_size', 'citations_count', 'answer_cache_status', 'answer_cache_similarity')
         }),
         ('Hata Bilgileri', {
             'fields': ('error_message', 'error_type'),
@@ -356,3 +356,43 @@ class ChatMessageAdmin(admin.ModelAdmin):
         count = queryset.filter(status='processing').update(status='failed')
         self.message_user(request, f'{count} mesaj başarısız olarak işaretlendi.')
     mark_as_failed.short_description = 'Seçili mesajları başarısız olarak işaretle'
+
+
+@admin.register(PDFIngestionJob)
+class PDFIngestionJobAdmin(admin.ModelAdmin):
+    list_display = ['file_name', 'robot', 'status', 'stage', 'attempts', 'created_at', 'completed_at']
+    list_filter = ['status', 'stage', 'robot', 'created_at']
+    search_fields = ['file_name', 'robot__name', 'last_error']
+    readonly_fields = [
+        'robot', 'robot_pdf', 'created_by', 'file_name', 'content_type', 'stage_progress',
+        'attempts', 'last_error', 'locked_by', 'locked_at', 'created_at', 'updated_at', 'completed_at'
+    ]
+    exclude = ['file_data']
+    ordering = ['-created_at']
+    
+    def get_queryset(self, request):
+        return super().get_queryset(request).select_related('robot', 'robot_pdf').defer('file_data')
+    
+    actions = ['retry_selected_jobs']
+    
+    def retry_selected_jobs(self, request, queryset):
+        """Başarısız işleri kaldıkları aşamadan yeniden kuyruğa al"""
+        from django.utils import timezone
+        
+        count = queryset.filter(status='failed').update(
+            status='queued', attempts=0, next_attempt_at=timezone.now()
+        )
+        self.message_user(request, f'{count} iş yeniden kuyruğa alındı.')
+    retry_selected_jobs.short_description = 'Seçili başarısız işleri yeniden dene'
+
+
+@admin.register(EmbeddingMigration)
+class EmbeddingMigrationAdmin(admin.ModelAdmin):
+    """Geçişler migrate_embedding_model komutuyla yönetilir; admin yalnızca izler"""
+    list_display = ['source_model', 'target_model', 'dimensions', 'status', 'rows_done', 'created_at', 'completed_at']
+    list_filter = ['status']
+    readonly_fields = ['source_model', 'target_model', 'dimensions', 'status', 'rows_done', 'created_at', 'completed_at']
+    ordering = ['-created_at']
+    
+    def has_add_permission(self, request):
+        return False
@@ -0,0 +1,401 @@
+"""
+OpenRouter AI istemcisi - SidrexGPT Robots App
+
+Her chat isteğinde yeni bir Python yorumlayıcısı açan `ai-request.py` subprocess
+çağrısının yerine geçer. İstemci process başına bir kez oluşturulur ve
+OpenRouter'a açılan keep-alive bağlantılarını (sync: requests, async: httpx)
+istekler arasında yeniden kullanır. httpx.AsyncClient oluşturulduğu event loop'a
+bağlı olduğundan async havuz her event loop için ayrı tutulur.
+"""
+
+import asyncio
+import json
+import logging
+import threading
+import weakref
+from typing import Any, Dict, Iterator, Optional
+
+import httpx
+import requests
+from requests.adapters import HTTPAdapter
+
+logger = logging.getLogger(__name__)
+
+# Available models with fallback
+MODELS = [
+    "deepseek/deepseek-r1-distill-llama-70b:free"  # Sadece bu modeli kullan
+]
+
+DEFAULT_BASE_URL = "https://openrouter.ai/api/v1"
+
+# Bağlantı havuzu ayarları (process başına)
+POOL_CONNECTIONS = 4
+POOL_MAXSIZE = 16
+CONNECT_TIMEOUT = 10.0
+READ_TIMEOUT = 180.0
+
+
+def _http_error_message(status_code: int) -> str:
+    """HTTP durum koduna göre kullanıcıya gösterilecek hata mesajı"""
+    if status_code == 429:
+        return "AI hizmeti şu anda yoğun. Lütfen daha sonra tekrar deneyin."
+    return f"AI hizmetinden bir hata oluştu: {status_code}"
+
+
+def _extract_content(response: Dict[str, Any]) -> str:
+    """Chat completion yanıtından içeriği al, hatalı yanıtlarda ValueError fırlat"""
+    if "error" in response:
+        raise ValueError(response["error"])
+
+    if "choices" not in response or not response.get("choices"):
+        raise ValueError(f"AI response is malformed or empty. Response: {response}")
+
+    return response["choices"][0]["message"]["content"]
+
+
+def _parse_stream_line(line: str) -> Optional[str]:
+    """
+    OpenRouter SSE satırından içerik parçasını (delta) al.
+    Yorum/keep-alive satırları ve boş delta'lar için None döner.
+    """
+    if not line or not line.startswith("data:"):
+        return None
+
+    payload = line[len("data:"):].strip()
+    if not payload or payload == "[DONE]":
+        return None
+
+    chunk = json.loads(payload)
+    if "error" in chunk:
+        error = chunk["error"]
+        raise ValueError(error.get("message", str(error)) if isinstance(error, dict) else error)
+
+    choices = chunk.get("choices") or []
+    if not choices:
+        return None
+    return (choices[0].get("delta") or {}).get("content") or None
+
+
+class OpenRouterAIHandler:
+    """
+    Handler class for OpenRouter AI API requests
+
+    Uzun ömürlü, thread-safe bir istemcidir; `get_ai_handler()` ile process
+    başına tek bir örnek paylaşılır.
+    """
+
+    def __init__(
+        self,
+        api_key: Optional[str] = None,
+        app_name: str = "SidrexGPT",
+        base_url: str = DEFAULT_BASE_URL,
+        timeout: float = READ_TIMEOUT,
+    ):
+        """
+        Initialize the OpenRouter AI Handler
+
+        Args:
+            api_key: OpenRouter API key (REQUIRED)
+            app_name: Application name for the requests
+            base_url: OpenRouter API base URL
+            timeout: Read timeout in seconds for completion requests
+        """
+        if not api_key:
+            raise ValueError("❌ OpenRouter API key is required! Please provide a valid API key.")
+
+        self.api_key = api_key
+        self.base_url = base_url.rstrip('/')
+        self.app_name = app_name
+        self.timeout = timeout
+        self.headers = {
+            "Authorization": f"Bearer {self.api_key}",
+            "Content-Type": "application/json",
+            "HTTP-Referer": "http://localhost:8000",  # SidrexGPT local development
+            "X-Title": self.app_name
+        }
+
+        # Sync yol: keep-alive bağlantı havuzlu requests.Session
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=POOL_CONNECTIONS, pool_maxsize=POOL_MAXSIZE)
+        self.session.mount("https://", adapter)
+        self.session.mount("http://", adapter)
+        self.session.headers.update(self.headers)
+
+        # Async yol: event loop başına bir httpx.AsyncClient (loop kapanınca kayıt düşer)
+        self._async_clients = weakref.WeakKeyDictionary()
+        self._async_lock = threading.Lock()
+
+    # ------------------------------------------------------------------
+    # Yardımcılar
+    # ------------------------------------------------------------------
+
+    def _build_payload(self, messages: list, model: Optional[str], max_tokens: int, stream: bool = False) -> Dict[str, Any]:
+        """Chat completion istek gövdesini hazırla"""
+        data = {
+            "model": model or MODELS[0],
+            "messages": messages,
+            "max_tokens": max_tokens,
+            "temperature": 0.7,
+            "top_p": 1,
+            "frequency_penalty": 0,
+            "presence_penalty": 0
+        }
+        if stream:
+            data["stream"] = True
+
+        total_content_length = sum(len(msg.get('content', '')) for msg in messages)
+        logger.debug(
+            f"OpenRouter isteği - Model: {data['model']} | Max Tokens: {max_tokens} | "
+            f"İçerik: {total_content_length} karakter | Mesaj Sayısı: {len(messages)}"
+        )
+        return data
+
+    def _log_response(self, model: str, response_data: Dict[str, Any]):
+        """Başarılı yanıt bilgilerini logla"""
+        logger.info(f"Successful chat request with model: {model}")
+        if response_data.get('choices'):
+            content = response_data['choices'][0]['message']['content'] or ''
+            logger.debug(f"OpenRouter yanıtı - İçerik Uzunluğu: {len(content)} karakter")
+        if 'usage' in response_data:
+            logger.debug(f"OpenRouter yanıtı - Token Kullanımı: {response_data['usage']}")
+
+    def _get_async_client(self) -> httpx.AsyncClient:
+        """Çalışan event loop'a ait httpx.AsyncClient'ı döndür (yoksa kilit altında oluştur)"""
+        loop = asyncio.get_running_loop()
+        client = self._async_clients.get(loop)
+        if client is not None and not client.is_closed:
+            return client
+
+        with self._async_lock:
+            client = self._async_clients.get(loop)
+            if client is None or client.is_closed:
+                client = httpx.AsyncClient(
+                    base_url=self.base_url,
+                    headers=self.headers,
+                    timeout=httpx.Timeout(self.timeout, connect=CONNECT_TIMEOUT),
+                    limits=httpx.Limits(
+                        max_connections=POOL_MAXSIZE,
+                        max_keepalive_connections=POOL_MAXSIZE,
+                    ),
+                )
+                self._async_clients[loop] = client
+            return client
+
+    # ------------------------------------------------------------------
+    # Sync API
+    # ------------------------------------------------------------------
+
+    def make_chat_request(self, messages: list, model: str = None, max_tokens: int = 10000) -> Dict[str, Any]:
+        """
+        Make a chat completion request to OpenRouter without model rotation.
+
+        Args:
+            messages: List of chat messages
+            model: Model to use (if None, will use the first model in MODELS)
+            max_tokens: Maximum tokens for response (default 10000)
+
+        Returns:
+            Response data as dictionary (hata durumunda {'error': ...})
+        """
+        data = self._build_payload(messages, model, max_tokens)
+        model = data["model"]
+
+        try:
+            response = self.session.post(
+                f"{self.base_url}/chat/completions",
+                json=data,
+                timeout=(CONNECT_TIMEOUT, self.timeout)
+            )
+            response.raise_for_status()
+
+            response_data = response.json()
+            self._log_response(model, response_data)
+            return response_data
+
+        except requests.exceptions.HTTPError as e:
+            logger.error(f"Chat request failed with {model} (HTTP Error): {e.response.status_code} - {e.response.text}")
+            return {"error": _http_error_message(e.response.status_code)}
+        except requests.exceptions.RequestException as e:
+            logger.error(f"Chat request failed with {model} (Request Error): {e}")
+            return {"error": f"AI hizmetine bağlanırken hata: {e}"}
+        except Exception as e:
+            logger.error(f"Chat request failed with {model} (General Error): {e}")
+            return {"error": f"AI yanıtı alınırken genel bir hata oluştu: {e}"}
+
+    def get_available_models(self) -> Dict[str, Any]:
+        """
+        Get list of available models from OpenRouter
+
+        Returns:
+            Dictionary containing available models
+        """
+        try:
+            response = self.session.get(f"{self.base_url}/models", timeout=(CONNECT_TIMEOUT, self.timeout))
+            response.raise_for_status()
+
+            logger.info("Successfully retrieved available models")
+            return response.json()
+
+        except requests.exceptions.RequestException as e:
+            logger.error(f"Failed to get models: {e}")
+            raise
+
+    def ask_question(self, question: str, model: str = None, system_prompt: Optional[str] = None, max_tokens: int = 10000) -> str:
+        """
+        Ask a simple question to the AI
+
+        Args:
+            question: The question to ask
+            model: Model to use
+            system_prompt: Optional system prompt to set AI behavior
+            max_tokens: Maximum tokens for response (default 10000)
+
+        Returns:
+            AI response as string
+        """
+        messages = []
+        if system_prompt:
+            messages.append({"role": "system", "content": system_prompt})
+        messages.append({"role": "user", "content": question})
+
+        try:
+            response = self.make_chat_request(messages, model, max_tokens=max_tokens)
+            if "error" in response:
+                return response["error"]
+
+            ai_response = response["choices"][0]["message"]["content"]
+            logger.info(f"Question: {question[:50]}...")
+            logger.info(f"Response: {ai_response[:100]}...")
+            return ai_response
+
+        except Exception as e:
+            logger.error(f"Error asking question: {e}")
+            return "Üzgünüm, şu anda teknik bir sorun yaşıyorum. Lütfen daha sonra tekrar deneyin."
+
+    def chat_with_history(self, messages: list, model: str = None, max_tokens: int = 4000) -> str:
+        """
+        Chat with conversation history.
+        RAISES:
+            ValueError: If the AI response contains an error or fails.
+        """
+        try:
+            response = self.make_chat_request(messages, model, max_tokens=max_tokens)
+            return _extract_content(response)
+        except Exception as e:
+            logger.error(f"Error in chat_with_history: {e}")
+            raise
+
+    def stream_chat(self, messages: list, model: str = None, max_tokens: int = 6000) -> Iterator[str]:
+        """
+        Chat completion'ı `stream: true` ile iste ve içerik parçalarını geldikçe yield et.
+        RAISES:
+            ValueError: HTTP/bağlantı hatalarında veya akış içinde hata gelirse
+                (mesajlar make_chat_request ile aynıdır).
+        """
+        data = self._build_payload(messages, model, max_tokens, stream=True)
+        model = data["model"]
+
+        try:
+            with self.session.post(
+                f"{self.base_url}/chat/completions",
+                json=data,
+                stream=True,
+                timeout=(CONNECT_TIMEOUT, self.timeout)
+            ) as response:
+                response.raise_for_status()
+
+                total_length = 0
+                for line in response.iter_lines(decode_unicode=True):
+                    delta = _parse_stream_line(line)
+                    if delta:
+                        total_length += len(delta)
+                        yield delta
+
+                logger.info(f"Successful streaming chat request with model: {model}")
+                logger.debug(f"OpenRouter akışı - İçerik Uzunluğu: {total_length} karakter")
+
+        except requests.exceptions.HTTPError as e:
+            logger.error(f"Streaming request failed with {model} (HTTP Error): {e.response.status_code}")
+            raise ValueError(_http_error_message(e.response.status_code))
+        except requests.exceptions.RequestException as e:
+            logger.error(f"Streaming request failed with {model} (Request Error): {e}")
+            raise ValueError(f"AI hizmetine bağlanırken hata: {e}")
+        except json.JSONDecodeError as e:
+            logger.error(f"Streaming request failed with {model} (Invalid chunk): {e}")
+            raise ValueError(f"AI yanıtı alınırken genel bir hata oluştu: {e}")
+
+    # ------------------------------------------------------------------
+    # Async API (httpx)
+    # ------------------------------------------------------------------
+
+    async def amake_chat_request(self, messages: list, model: str = None, max_tokens: int = 10000) -> Dict[str, Any]:
+        """`make_chat_request` ile aynı sözleşmeye sahip asyncio versiyonu"""
+        data = self._build_payload(messages, model, max_tokens)
+        model = data["model"]
+
+        try:
+            response = await self._get_async_client().post("/chat/completions", json=data)
+            response.raise_for_status()
+
+            response_data = response.json()
+            self._log_response(model, response_data)
+            return response_data
+
+        except httpx.HTTPStatusError as e:
+            logger.error(f"Chat request failed with {model} (HTTP Error): {e.response.status_code} - {e.response.text}")
+            return {"error": _http_error_message(e.response.status_code)}
+        except httpx.RequestError as e:
+            logger.error(f"Chat request failed with {model} (Request Error): {e}")
+            return {"error": f"AI hizmetine bağlanırken hata: {e}"}
+        except Exception as e:
+            logger.error(f"Chat request failed with {model} (General Error): {e}")
+            return {"error": f"AI yanıtı alınırken genel bir hata oluştu: {e}"}
+
+    async def achat_with_history(self, messages: list, model: str = None, max_tokens: int = 4000) -> str:
+        """`chat_with_history` ile aynı sözleşmeye sahip asyncio versiyonu"""
+        try:
+            response = await self.amake_chat_request(messages, model, max_tokens=max_tokens)
+            return _extract_content(response)
+        except Exception as e:
+            logger.error(f"Error in achat_with_history: {e}")
+            raise
+
+    async def aclose(self):
+        """Çalışan event loop'un async bağlantı havuzunu kapat (diğer loop'ların havuzlarına dokunulmaz)"""
+        with self._async_lock:
+            client = self._async_clients.pop(asyncio.get_running_loop(), None)
+        if client is not None and not client.is_closed:
+            await client.aclose()
+
+    def close(self):
+        """Sync bağlantı havuzunu kapat"""
+        self.session.close()
+
+
+_handler_lock = threading.Lock()
+_handlers: Dict[str, OpenRouterAIHandler] = {}
+
+
+def get_ai_handler(api_key: Optional[str] = None) -> OpenRouterAIHandler:
+    """
+    Process başına paylaşılan OpenRouterAIHandler örneğini döndür.
+    API key verilmezse Django settings'ten alınır.
+    """
+    if api_key is None:
+        from django.conf import settings
+        api_key = settings.OPENROUTER_API_KEY
+
+    handler = _handlers.get(api_key)
+    if handler is not None:
+        return handler
+
+    with _handler_lock:
+        handler = _handlers.get(api_key)
+        if handler is None:
+            from django.conf import settings
+            handler = OpenRouterAIHandler(
+                api_key=api_key,
+                base_url=getattr(settings, 'OPENROUTER_BASE_URL', DEFAULT_BASE_URL),
+            )
+            _handlers[api_key] = handler
+        return handler
@@ -0,0 +1,237 @@
+"""
+Semantik Yanıt Cache'i - SidrexGPT Robots App
+
+Aynı ürün robotuna tekrar tekrar sorulan sorular için üretilmiş yanıt ve
+citation'lar saklanır. Yeni sorunun embedding'i cache'teki bir soruya
+ANSWER_CACHE_THRESHOLD kosinüs benzerliğinden yakınsa RAG ve LLM çağrısı
+yapılmadan saklanan yanıt döner.
+
+Anahtar: robot + Robot.context_version + mod (standart/optimize, yanıtı farklı
+prompt'la üreten endpoint'ler için ek varyant) + embedding modeli. PDF ya da RobotSystemPrompt değişince sinyaller context_version'ı
+artırır; eski girişler artık okunmaz ve TTL ile düşer.
+
+Her anahtar için paylaşılan cache'te bir indeks (normalize float32 matris +
+son kullanım zamanları) ve giriş başına ayrı yanıt kaydı tutulur. İndeks
+ANSWER_CACHE_MAX_ENTRIES'i aşınca en uzun süredir kullanılmayan giriş atılır
+(LRU). İndeks process içinde ANSWER_CACHE_LOCAL_TTL saniye tutulur; eşzamanlı
+yazmalarda en kötü ihtimalle bir giriş kaybolur, yanıtın doğruluğu etkilenmez.
+"""
+
+import os
+import time
+import uuid
+import hashlib
+import logging
+import threading
+from collections import OrderedDict
+from typing import Any, Dict, List, Optional, Tuple
+
+import numpy as np
+from django.core.cache import cache
+
+logger = logging.getLogger(__name__)
+
+ANSWER_CACHE_ENABLED = os.getenv('ANSWER_CACHE_ENABLED', 'True').lower() == 'true'
+# Bu benzerliğin altındaki sorular ıska sayılır (aynı sorunun farklı yazımları ~0.95+)
+ANSWER_CACHE_THRESHOLD = float(os.getenv('ANSWER_CACHE_THRESHOLD', '0.95'))
+ANSWER_CACHE_TTL = int(os.getenv('ANSWER_CACHE_TTL', '86400'))
+# Robot + bağlam versiyonu başına tutulan en fazla soru
+ANSWER_CACHE_MAX_ENTRIES = int(os.getenv('ANSWER_CACHE_MAX_ENTRIES', '200'))
+ANSWER_CACHE_LOCAL_TTL = float(os.getenv('ANSWER_CACHE_LOCAL_TTL', '30'))
+# İsabette LRU zamanı en fazla bu sıklıkla paylaşılan indekse yazılır
+ANSWER_CACHE_TOUCH_INTERVAL = 60
+
+
+class SemanticAnswerCache:
+    """Robot bazlı semantik yanıt cache'i (paylaşılan indeks + process içi kopya)"""
+
+    KEY_PREFIX = 'robot_answers'
+    LOCAL_MAX_INDEXES = 256
+
+    def __init__(self, threshold: float = None, ttl: int = None, max_entries: int = None,
+                 enabled: bool = None):
+        self.threshold = ANSWER_CACHE_THRESHOLD if threshold is None else threshold
+        self.ttl = ttl or ANSWER_CACHE_TTL
+        self.max_entries = max_entries or ANSWER_CACHE_MAX_ENTRIES
+        self.enabled = ANSWER_CACHE_ENABLED if enabled is None else enabled
+        self._local: "OrderedDict[str, Tuple[float, Optional[Dict[str, Any]]]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    # ------------------------------------------------------------------
+    # Anahtarlar ve indeks
+    # ------------------------------------------------------------------
+
+    def make_key(self, robot, optimization_enabled: bool, model_name: str, variant: str = '') -> str:
+        mode = 'optimized' if optimization_enabled else 'standard'
+        if variant:
+            mode = f"{mode}-{variant}"
+        model = hashlib.sha1(model_name.encode('utf-8')).hexdigest()[:12]
+        return f"{self.KEY_PREFIX}_{robot.id}_v{robot.context_version}_{mode}_{model}"
+
+    def _load_index(self, key: str, fresh: bool = False) -> Optional[Dict[str, Any]]:
+        now = time.monotonic()
+        if not fresh:
+            with self._lock:
+                entry = self._local.get(key)
+                if entry is not None and entry[0] > now:
+                    self._local.move_to_end(key)
+                    return entry[1]
+
+        try:
+            index = cache.get(key)
+        except Exception as e:
+            logger.warning(f"⚠️ Yanıt cache indeksi okunamadı: {e}")
+            index = None
+        self._remember(key, index)
+        return index
+
+    def _save_index(self, key: str, index: Dict[str, Any]):
+        cache.set(key, index, self.ttl)
+        self._remember(key, index)
+
+    def _remember(self, key: str, index: Optional[Dict[str, Any]]):
+        with self._lock:
+            self._local[key] = (time.monotonic() + ANSWER_CACHE_LOCAL_TTL, index)
+            self._local.move_to_end(key)
+            while len(self._local) > self.LOCAL_MAX_INDEXES:
+                self._local.popitem(last=False)
+
+    @staticmethod
+    def _normalize(embedding: List[float]) -> np.ndarray:
+        vector = np.asarray(embedding, dtype=np.float32)
+        norm = np.linalg.norm(vector)
+        return vector / norm if norm > 0 else vector
+
+    # ------------------------------------------------------------------
+    # Okuma / yazma
+    # ------------------------------------------------------------------
+
+    def probe(self, robot, query: str, vector_service, optimization_enabled: bool, variant: str = '') -> Dict[str, Any]:
+        """
+        Sorunun embedding'ini (aramada da kullanılan, cache'li) çıkarıp cache'e bak.
+        Dönen sözlük: key, embedding, entry (isabette yanıt), similarity.
+        """
+        embedding_service, _ = vector_service.resolve_read_embedding(robot.id, robot)
+        embedding = vector_service.get_query_embedding(query, embedding_service)
+        key = self.make_key(robot, optimization_enabled, embedding_service.model_name, variant)
+        entry, similarity = self.lookup(key, embedding)
+        return {'key': key, 'embedding': embedding, 'entry': entry, 'similarity': similarity}
+
+    def lookup(self, key: str, embedding: List[float]) -> Tuple[Optional[Dict[str, Any]], Optional[float]]:
+        """(saklanan yanıt ya da None, en yakın sorunun benzerliği)"""
+        index = self._load_index(key)
+        if not index or not index['ids']:
+            self.misses += 1
+            return None, None
+
+        vector = self._normalize(embedding)
+        if vector.shape[0] != index['dims']:
+            self.misses += 1
+            return None, None
+
+        matrix = np.frombuffer(index['vectors'], dtype=np.float32).reshape(-1, index['dims'])
+        similarities = matrix @ vector
+        best = int(np.argmax(similarities))
+        similarity = float(similarities[best])
+        if similarity < self.threshold:
+            self.misses += 1
+            return None, similarity
+
+        entry_id = index['ids'][best]
+        try:
+            entry = cache.get(f"{key}_{entry_id}")
+        except Exception as e:
+            logger.warning(f"⚠️ Yanıt cache kaydı okunamadı: {e}")
+            entry = None
+        if entry is None:
+            # Kayıt TTL ile düştü: indeksten çıkar, yerine yeni yanıt yazılabilsin
+            self.misses += 1
+            self._drop(key, entry_id)
+            return None, similarity
+
+        self.hits += 1
+        if time.time() - index['used'][best] > ANSWER_CACHE_TOUCH_INTERVAL:
+            self._touch(key, entry_id)
+        return entry, similarity
+
+    def _touch(self, key: str, entry_id: str):
+        """İsabet alan girişin LRU zamanını ve TTL'ini yenile"""
+        try:
+            index = self._load_index(key, fresh=True)
+            if not index or entry_id not in index['ids']:
+                return
+            index['used'][index['ids'].index(entry_id)] = time.time()
+            self._save_index(key, index)
+            cache.touch(f"{key}_{entry_id}", self.ttl)
+        except Exception as e:
+            logger.warning(f"⚠️ Yanıt cache LRU güncellenemedi: {e}")
+
+    def _drop(self, key: str, entry_id: str):
+        try:
+            index = self._load_index(key, fresh=True)
+            if not index or entry_id not in index['ids']:
+                return
+            position = index['ids'].index(entry_id)
+            matrix = np.frombuffer(index['vectors'], dtype=np.float32).reshape(-1, index['dims'])
+            self._save_index(key, {
+                'dims': index['dims'],
+                'ids': index['ids'][:position] + index['ids'][position + 1:],
+                'used': index['used'][:position] + index['used'][position + 1:],
+                'vectors': np.delete(matrix, position, axis=0).tobytes(),
+            })
+        except Exception as e:
+            logger.warning(f"⚠️ Yanıt cache girişi silinemedi: {e}")
+
+    def store(self, key: str, embedding: List[float], question: str, answer: str,
+              citations: List[Dict[str, Any]], context_used: bool):
+        """Yeni soru-yanıt çiftini ekle; sınır aşılırsa en eski kullanılanı at"""
+        vector = self._normalize(embedding)
+        entry_id = uuid.uuid4().hex[:16]
+        try:
+            cache.set(f"{key}_{entry_id}", {
+                'question': question,
+                'answer': answer,
+                'citations': citations,
+                'context_used': context_used,
+            }, self.ttl)
+
+            index = self._load_index(key, fresh=True)
+            if not index or index['dims'] != vector.shape[0]:
+                index = {'dims': int(vector.shape[0]), 'ids': [], 'used': [], 'vectors': b''}
+
+            ids = index['ids'] + [entry_id]
+            used = index['used'] + [time.time()]
+            matrix = np.frombuffer(index['vectors'], dtype=np.float32).reshape(-1, index['dims'])
+            matrix = np.vstack([matrix, vector[np.newaxis, :]])
+
+            if len(ids) > self.max_entries:
+                keep = np.sort(np.argsort(used)[-self.max_entries:])
+                kept = set(keep.tolist())
+                evicted = [entry for i, entry in enumerate(ids) if i not in kept]
+                cache.delete_many([f"{key}_{evicted_id}" for evicted_id in evicted])
+                ids = [ids[i] for i in keep]
+                used = [used[i] for i in keep]
+                matrix = matrix[keep]
+
+            self._save_index(key, {
+                'dims': index['dims'],
+                'ids': ids,
+                'used': used,
+                'vectors': np.ascontiguousarray(matrix, dtype=np.float32).tobytes(),
+            })
+        except Exception as e:
+            logger.warning(f"⚠️ Yanıt cache'e yazılamadı: {e}")
+
+    def get_stats(self) -> Dict[str, Any]:
+        total = self.hits + self.misses
+        return {
+            'hits': self.hits,
+            'misses': self.misses,
+            'hit_rate': round(self.hits / total, 3) if total else 0.0,
+            'local_indexes': len(self._local),
+        }
+
+
+answer_cache = SemanticAnswerCache()
@@ -0,0 +1,416 @@
+"""
+Herkese Açık Chat Turu - SidrexGPT Robots API
+
+/api/robots/<slug>/chat/ (JSON) ve /chat/stream/ (SSE) endpoint'lerinin ortak
+tur hazırlığı: anonim erişim, eski alias slug'ları, Sidrex markası kotası,
+semantik yanıt cache'i ('pdf' varyantı) ve PDF tabanlı sistem prompt'u.
+İki endpoint aynı yanıtı üretir ve kotayı aynı şekilde harcar.
+"""
+
+import time
+import random
+import logging
+
+from django.utils import timezone
+from rest_framework.response import Response
+
+from robots.models import Brand, ChatMessage
+from robots.services import resolve_robot_by_slug, find_robot_by_legacy_slug
+from robots.quota import reserve_brand_request, release_brand_request
+from robots.answer_cache import answer_cache
+from robots.rag_services import RAGService
+
+logger = logging.getLogger(__name__)
+
+# Bu uzunluğu aşan yanıtlar kısaltılır (widget balonu)
+MAX_RESPONSE_LENGTH = 2000
+TRUNCATED_RESPONSE_LENGTH = 1800
+FALLBACK_AI_MODEL = 'deepseek/deepseek-r1-distill-llama-70b:free'
+
+
+class PublicChatTurnMixin:
+    """Herkese açık chat endpoint'lerinin ortak tur hazırlığı (GenericAPIView ile kullanılır)"""
+
+    permission_classes = []  # Herkese açık - login olmadan erişilebilir
+
+    def get_session_key(self, user, robot, session_id=None):
+        """Oturum anahtarı; ChatSession get_or_create telemetri flush'ına ertelenir (anonim: user_id None)"""
+        if not session_id:
+            session_id = f"robot_{robot.id}_user_{user.id if user.is_authenticated else 'anonymous'}_{timezone.now().strftime('%Y%m%d_%H%M%S')}"
+        return {
+            'session_id': session_id,
+            'user_id': user.id if user.is_authenticated else None,
+            'robot_id': robot.id,
+            'user_ip': self.get_client_ip(),
+            'user_agent': self.get_user_agent(),
+        }
+
+    def get_client_ip(self):
+        """Kullanıcının IP adresini al"""
+        x_forwarded_for = self.request.META.get('HTTP_X_FORWARDED_FOR')
+        if x_forwarded_for:
+            ip = x_forwarded_for.split(',')[0]
+        else:
+            ip = self.request.META.get('REMOTE_ADDR')
+        return ip
+
+    def get_user_agent(self):
+        """Kullanıcının user agent bilgisini al"""
+        return self.request.META.get('HTTP_USER_AGENT', '')
+
+    def create_chat_message(self, session_key, user, robot, message):
+        """
+        Chat mesajını bellekte oluştur. Kaydedilmez: mark_completed / mark_failed
+        mesajı telemetri tamponuna bırakır, yanıt veritabanı yazmasını beklemez.
+        """
+        chat_message = ChatMessage(
+            user=user if user.is_authenticated else None,
+            robot=robot,
+            message_type='user',
+            user_message=message,
+            status='processing',
+            processing_started_at=timezone.now(),
+            ip_address=self.get_client_ip()
+        )
+        chat_message.telemetry_session = session_key
+        return chat_message
+
+    def get_robot_by_slug(self, slug):
+        """Slug'a göre robot bul (kalıcı slug, yoksa eski alias'lar)"""
+        return resolve_robot_by_slug(slug, fallback=find_robot_by_legacy_slug)
+
+    def record_validation_error(self, request, robot, serializer):
+        """Geçersiz isteğin mesajını validation hatasıyla kapat (telemetri tamponu üzerinden)"""
+        try:
+            chat_message = self.create_chat_message(
+                self.get_session_key(request.user, robot, request.data.get('session_id')),
+                request.user, robot, request.data.get('message', '')
+            )
+            chat_message.mark_failed(str(serializer.errors), 'validation_error')
+        except Exception as e:
+            logger.warning(f"⚠️ Validation hatası kaydedilemedi: {e}")
+
+    # ------------------------------------------------------------------
+    # Tur hazırlığı
+    # ------------------------------------------------------------------
+
+    def build_system_prompt(self, robot, message):
+        """PDF içerikleriyle sistem prompt'u (Beyan > Rol > Kurallar > Bilgi): (prompt, pdf_contents, pdf_names)"""
+        from robots.services import get_robot_pdf_contents_for_ai, get_robot_context_bundle
+        pdf_contents = get_robot_pdf_contents_for_ai(robot)
+
+        # PDF türlerini kontrol et (Beyan > Rol > Kurallar > Bilgi öncelik sırası)
+        pdf_names = get_robot_context_bundle(robot, 'pdf_names')
+        role_pdf = pdf_names.get('rol')
+        rules_pdf = pdf_names.get('kural')
+
+        # RAG sistemi için system prompt oluştur (Beyan PDF'i en öncelikli - yasal compliance)
+        if rules_pdf:
+            system_prompt = f"""🛑 MUTLAK KURAL UYGULAMASI - İHLAL EDİLEMEZ 🛑
+
+⚠️ DİKKAT: Bu prompt ile kuralları ihlal eden HERHANGI bir cevap veremezsiniz!
+
+📋 ZORUNLU KONTROL SÜRECİ:
+1. ÖNCE kuralları oku
+2. Kullanıcı sorusu kuralları ihlal ediyor mu kontrol et
+3. EĞER İHLAL EDİYORSA: "Bu konu hakkında bilgi veremem" de ve DUR
+4. EĞER İHLAL ETMİYORSA: Sadece o zaman cevap ver
+
+🚨 KURAL PDF İÇERİĞİ:
+{pdf_contents}
+
+⛔ YASAK ÖRNEK SORULAR (ASLA CEVAPLAMA):
+- "Zzen hakkında bilgi ver" → REDDET
+- "Başka ürünleriniz var mı?" → REDDET  
+- "Diğer ilaçlar hakkında..." → REDDET
+- Kural PDF'inde yasaklanan herhangi bir konu → REDDET
+
+✅ İZİN VERİLEN ÖRNEK SORULAR:
+- Sadece kural PDF'inde açıkça izin verilen konular
+
+Kullanıcı sorusu: "{message}"
+
+🔍 ŞİMDİ KONTROL ET:
+1. Bu soru kural PDF'inde yasaklanmış mı? 
+2. EVET ise → "Bu konu hakkında bilgi veremem" de
+3. HAYIR ise → Kurallara uygun şekilde cevap ver
+
+KARAR VE YANIT:
+"""
+        elif role_pdf:
+            system_prompt = f"""🛑 MUTLAK TALİMAT SİSTEMİ - KESSİNLİKLE UYULMASI ZORUNLU 🛑
+
+📋 İŞLEMLENDİRME SIRASI:
+1️⃣ ROL PDF'İNİ OKU → Hangi karakter olduğunu ve nasıl konuşacağını belirle  
+2️⃣ BİLGİ PDF'İNİ OKU → Cevabının içeriğini buradan çıkart
+3️⃣ BEYAN PDF'İNİ KONTROL ET → Bu kapsamın dışına asla çıkma
+
+🚨 ZORUNLU SÜREÇ:
+Sana gelen soruya ROL PDF'inin metnindeki bilgiler ile karakterin nasıl biri olduğunu ve senin nasıl bir karakter ağzından cevap vereceğini belirlemelisin. BİLGİ PDF'inin içindeki bilgilerden cevabını çıkartıp BEYAN PDF içinde yazan bilgiler kapsamı dışına çıkmadan, beyan PDF dışında olmayan bir bilgi vermeden cevap vermelisin.
+
+⚠️ MUTLAK KURAL: 
+- BEYAN PDF'i dışındaki hiçbir bilgiyi verme
+- ROL PDF'i hangi karaktersen o karakter ol
+- BİLGİ PDF'i sadece bilgi kaynağın
+
+PDF İÇERİKLERİ:
+{pdf_contents}
+
+Kullanıcı sorusu: {message}
+
+ADIM ADIM SÜREÇ:
+1. Rol PDF'ini oku → Ben kimim? Nasıl konuşmalıyım?
+2. Bilgi PDF'ini oku → Bu soruya hangi bilgilerle cevap verebilirim?
+3. Beyan PDF'ini kontrol et → Bu bilgiler beyan kapsamında mı?
+4. Eğer her şey uygunsa rol karakteri olarak cevap ver, değilse reddet
+
+YANIT:
+"""
+        else:
+            system_prompt = f"""🛑 MUTLAK TALİMAT SİSTEMİ - KESSİNLİKLE UYULMASI ZORUNLU 🛑
+
+📋 İŞLEMLENDİRME SIRASI:
+1️⃣ PDF İÇERİKLERİNİ OKU → Hangi bilgiler mevcut?
+2️⃣ KAPSAM BELİRLE → Sadece PDF'lerdeki bilgiler
+3️⃣ CEVAP VER → PDF sınırları içinde kal
+
+🚨 ZORUNLU SÜREÇ:
+Sen {robot.name} robotusun. Sadece aşağıda verilen PDF dokümanlarının içeriğine dayanarak sorulara cevap verebilirsin. Sana gelen soruya PDF'lerin içindeki bilgilerden cevabını çıkartıp, PDF kapsamı dışına çıkmadan, PDF dışında olmayan bir bilgi vermeden cevap vermelisin.
+
+⚠️ MUTLAK KURAL: 
+- PDF'ler dışındaki hiçbir bilgiyi verme
+- PDF'lerde olmayan konularda konuşma
+- Sadece PDF içeriğine dayalı cevap ver
+
+PDF İÇERİKLERİ:
+{pdf_contents}
+
+Kullanıcı sorusu: {message}
+
+ADIM ADIM SÜREÇ:
+1. PDF içeriklerini oku → Bu soruya hangi bilgilerle cevap verebilirim?
+2. PDF kapsamını kontrol et → Bu bilgiler PDF'lerde var mı?
+3. Eğer PDF'lerde varsa cevap ver, yoksa "Bu bilgi PDF'lerimde bulunmuyor" de
+
+YANIT:
+"""
+        return system_prompt, pdf_contents, pdf_names
+
+    def prepare_chat_turn(self, request, robot, serializer, request_start_time):
+        """
+        Chat turunu AI çağrısına kadar hazırla (mesaj kaydı, yanıt cache'i, paket/limit, prompt, kota).
+        Erken yanıt gerekiyorsa (Response, None), aksi halde (None, turn) döner.
+        Kota, prompt kurulduktan sonra rezerve edilir; turu tamamlamayan her yol rezervasyonu geri vermelidir.
+        """
+        slug = self.kwargs.get('slug')
+        message = serializer.validated_data['message']
+        conversation_id = serializer.validated_data.get('conversation_id', None)
+        # Eğer conversation_id boş ise robot ID'si ile doldur
+        if not conversation_id or conversation_id.strip() == '':
+            conversation_id = f'robot_{robot.id}'
+
+        # 📝 Chat oturum anahtarı ve mesaj (kayıtlar telemetri flush'ında yazılır)
+        session_key = self.get_session_key(request.user, robot, request.data.get('session_id'))
+        logger.info(f"📝 Chat oturumu - Session ID: {session_key['session_id']}")
+        chat_message = self.create_chat_message(session_key, request.user, robot, message)
+        logger.info(f"📝 Chat mesajı oluşturuldu (tamponlu)")
+
+        # 🧠 Semantik yanıt cache'i: benzer soru daha önce yanıtlandıysa LLM ve kota harcanmaz
+        answer_probe = None
+        if answer_cache.enabled:
+            try:
+                answer_probe = answer_cache.probe(
+                    robot, message, RAGService().vector_service,
+                    optimization_enabled=False, variant='pdf'
+                )
+                chat_message.answer_cache_similarity = answer_probe['similarity']
+                chat_message.answer_cache_status = 'miss'
+            except Exception as e:
+                logger.warning(f"⚠️ Yanıt cache'ine bakılamadı: {e}")
+
+        # Sidrex markası: paket süresi ve isabet kontrolü
+        sidrex_brand = None
+        cached_answer = None
+        try:
+            sidrex_brand = Brand.get_or_create_sidrex()
+
+            # Paket süresi kontrolü - süre dolmuşsa özel mesaj döndür
+            if sidrex_brand.is_package_expired():
+                # ⏱️ ZAMAN SAYACI BİTİŞ - Paket süresi doldu
+                elapsed_time = time.time() - request_start_time
+                logger.warning(f"📦❌ PAKET SÜRESİ DOLDU - Robot: {slug} | Süre: {elapsed_time:.2f}s | Paket: {sidrex_brand.paket_turu}")
+
+                # Komik teknik sorun mesajları
+                funny_tech_messages = [
+                    "Anakartıma su kaçtı galiba… Şu an işlemcim 'mola' modunda. 😅 Birazdan toparlanıp yine seninle olacağım.",
+                    "RAM'im tatildeymiş, haberim yokmuş. Sorunu çözüp geri getirmeye çalışıyorum. 🏖️🖥️",
+                    "Klavye bana trip attı, çalışmayı reddediyor. Birazdan barıştırıp geri döneceğim. 🎹🤖"
+                ]
+                error_message = random.choice(funny_tech_messages)
+                # 📝 Chat message'ı başarısız olarak işaretle
+                chat_message.mark_failed(error_message, 'package_expired')
+
+                return Response({
+                    'robot_name': 'SidrexGPT',
+                    'robot_id': 1,
+                    'user_message': request.data.get('message', ''),
+                    'robot_response': error_message,
+                    'conversation_id': f'package_expired_{int(time.time())}',
+                    'package_expired': True,
+                    'remaining_days': sidrex_brand.remaining_days(),
+                    'paket_turu': sidrex_brand.paket_turu,
+                    'package_status': sidrex_brand.package_status(),
+                    'timestamp': '2025-01-11T12:00:00Z'
+                }), None
+
+            if answer_probe is not None and answer_probe['entry'] is not None and not sidrex_brand.is_limit_exceeded():
+                cached_answer = answer_probe['entry']
+        except Exception as e:
+            logger.warning(f"Sidrex marka kontrolü başarısız: {str(e)}")
+
+        try:
+            system_prompt, pdf_contents, pdf_names = self.build_system_prompt(robot, message)
+        except Exception as e:
+            # Kota henüz rezerve edilmedi; genel hata yanıtı döner
+            logger.error(f"❌ Sistem prompt'u kurulamadı - Robot: {slug} | Hata: {type(e).__name__}: {str(e)}")
+            chat_message.mark_failed(f"{type(e).__name__}: {str(e)}", 'ai_processing_error')
+            return Response(self.build_chat_payload(
+                robot, message, conversation_id, {},
+                "Üzgünüm, şu anda teknik bir sorun yaşıyorum. Lütfen daha sonra tekrar deneyin."
+            )), None
+
+        # İstek sınırı kontrolü + sayaç artışı tek atomik rezervasyonda (cache isabeti kota harcamaz)
+        quota_reservation = None
+        if sidrex_brand is not None and cached_answer is None:
+            try:
+                quota_reservation = reserve_brand_request(sidrex_brand)
+            except Exception as e:
+                logger.warning(f"Sidrex API isteği rezerve edilemedi: {str(e)}")
+            else:
+                if quota_reservation is None:
+                    # ⏱️ ZAMAN SAYACI BİTİŞ - İstek sınırı aşıldı
+                    elapsed_time = time.time() - request_start_time
+                    logger.warning(f"🚫 İSTEK SINIRI AŞILDI - Robot: {slug} | Süre: {elapsed_time:.2f}s | İstek: {sidrex_brand.get_used_api_requests()}/{sidrex_brand.request_limit}")
+
+                    # 📝 Chat message'ı başarısız olarak işaretle
+                    error_message = "Ben çok yoruldum maalesef sana cevap veremeyeceğim... 😴 Lütfen daha sonra tekrar deneyin."
+                    chat_message.mark_failed(error_message, 'limit_exceeded')
+
+                    return Response({
+                        'robot_name': 'SidrexGPT',
+                        'robot_id': 1,
+                        'user_message': request.data.get('message', ''),
+                        'robot_response': error_message,
+                        'conversation_id': f'limit_exceeded_{int(time.time())}',
+                        'limit_exceeded': True,
+                        'remaining_requests': sidrex_brand.remaining_requests(),
+                        'total_requests': sidrex_brand.get_used_api_requests(),
+                        'request_limit': sidrex_brand.request_limit,
+                        'remaining_days': sidrex_brand.remaining_days(),
+                        'paket_turu': sidrex_brand.paket_turu,
+                        'package_status': sidrex_brand.package_status(),
+                        'timestamp': '2025-01-11T12:00:00Z'
+                    }), None
+
+                logger.info(f"Sidrex API isteği rezerve edildi - Limit: {sidrex_brand.request_limit}")
+
+        # AI'ye gönderilecek mesajlar (geçmiş bu endpoint'te kullanılmaz)
+        messages = []
+        if system_prompt:
+            messages.append({"role": "system", "content": system_prompt})
+        messages.append({"role": "user", "content": message})
+        chat_message.context_size = len(system_prompt) if system_prompt else 0
+
+        return None, {
+            'message': message,
+            'conversation_id': conversation_id,
+            'chat_message': chat_message,
+            'messages': messages,
+            'pdf_contents': pdf_contents,
+            'pdf_names': pdf_names,
+            'answer_probe': answer_probe,
+            'cached_answer': cached_answer,
+            'quota_reservation': quota_reservation,
+        }
+
+    # ------------------------------------------------------------------
+    # Tur sonu
+    # ------------------------------------------------------------------
+
+    @staticmethod
+    def truncate_response(response_message):
+        """Response size kontrolü - çok uzun cevapları kısalt"""
+        if len(response_message) > MAX_RESPONSE_LENGTH:
+            logger.warning(f"AI response too long ({len(response_message)} chars), truncating...")
+            response_message = response_message[:TRUNCATED_RESPONSE_LENGTH] + "\n\n... (Cevap çok uzun olduğu için kısaltıldı. Daha spesifik sorular sorabilirsiniz.)"
+        return response_message
+
+    def remember_answer(self, turn, response_message):
+        """Iskalanan sorunun başarılı yanıtını semantik cache'e ekle"""
+        answer_probe = turn['answer_probe']
+        if answer_probe is None or turn['cached_answer'] is not None or not response_message:
+            return
+        answer_cache.store(
+            answer_probe['key'], answer_probe['embedding'],
+            turn['message'], response_message, [], bool(turn['pdf_contents'])
+        )
+
+    def complete_turn(self, turn, response_message):
+        """Mesajı tamamla (AI hatasında failed kaydı korunur)"""
+        chat_message = turn['chat_message']
+        if chat_message.status == 'processing':
+            chat_message.mark_completed(
+                ai_response=response_message,
+                citations_count=0,  # Bu sistemde citation yok
+                context_used=bool(turn['pdf_contents'])
+            )
+
+    def release_turn(self, turn):
+        """Yanıt üretilemedi: rezervasyon kotaya geri verilir"""
+        release_brand_request(turn['quota_reservation'])
+        turn['quota_reservation'] = None
+
+    def build_chat_payload(self, robot, message, conversation_id, pdf_names, response_message):
+        """Chat yanıt gövdesi (frontend `robot_response` sözleşmesi) + paket ve istek bilgileri"""
+        try:
+            sidrex_brand = Brand.get_or_create_sidrex()
+            remaining_requests = sidrex_brand.remaining_requests()
+            total_requests = sidrex_brand.get_used_api_requests()
+            request_limit = sidrex_brand.request_limit
+            remaining_days = sidrex_brand.remaining_days()
+            paket_turu = sidrex_brand.paket_turu
+            package_status = sidrex_brand.package_status()
+        except Exception:
+            remaining_requests = 0
+            total_requests = 0
+            request_limit = 500
+            remaining_days = 0
+            paket_turu = 'normal'
+            package_status = '✅ Aktif'
+
+        return {
+            'robot_name': robot.name,
+            'robot_id': robot.id,
+            'user_message': message,
+            'robot_response': response_message,
+            'conversation_id': conversation_id,
+            'has_declaration_pdf': bool(pdf_names.get('beyan')),
+            'has_role_pdf': bool(pdf_names.get('rol')),
+            'has_rules_pdf': bool(pdf_names.get('kural')),
+            'has_info_pdf': bool(pdf_names.get('bilgi')),
+            'remaining_requests': remaining_requests,
+            'total_requests': total_requests,
+            'request_limit': request_limit,
+            'remaining_days': remaining_days,
+            'paket_turu': paket_turu,
+            'package_status': package_status,
+            'limit_exceeded': False,
+            'package_expired': False,
+            'timestamp': '2025-01-11T12:00:00Z'
+        }
+
+    def build_turn_payload(self, robot, turn, response_message):
+        """Hazırlanan turun yanıt gövdesi"""
+        return self.build_chat_payload(
+            robot, turn['message'], turn['conversation_id'], turn['pdf_names'], response_message
+        )
@@ -1,5 +1,5 @@
 from rest_framework import serializers
-from robots.models import Robot, RobotPDF, Brand, ChatSession, ChatMessage
+from robots.models import Robot, RobotPDF, Brand, ChatSession, ChatMessage, PDFIngestionJob
 from robots.utils import upload_pdf_to_drive
 
 
@@ -140,9 +140,25 @@ class ChatMessageDetailSerializer(serializers.ModelSerializer):
             'id', 'session', 'session_id', 'user', 'user_username', 'robot', 'robot_name',
             'message_type', 'user_message', 'ai_response', 'status', 'status_display',
             'response_time', 'citations_count', 'context_used', 'optimization_enabled',
-            'error_message', 'error_type', 'created_at', 'user_feedback'
+            'answer_cache_status', 'error_message', 'error_type', 'created_at', 'user_feedback'
         ]
         read_only_fields = [
             'session', 'user', 'robot', 'response_time', 'citations_count', 
-            'context_used', 'optimization_enabled', 'error_message', 'error_type', 'created_at'
-        ] 
\ No newline at end of file
+            'context_used', 'optimization_enabled', 'answer_cache_status', 'error_message', 'error_type', 'created_at'
+        ] 
+
+
+class PDFIngestionJobSerializer(serializers.ModelSerializer):
+    """PDF ingestion işi ilerleme bilgisi için serializer"""
+    status_display = serializers.CharField(source='get_status_display', read_only=True)
+    stage_display = serializers.CharField(source='get_stage_display', read_only=True)
+    progress_percentage = serializers.ReadOnlyField()
+    
+    class Meta:
+        model = PDFIngestionJob
+        fields = [
+            'id', 'robot', 'robot_pdf', 'file_name', 'pdf_type', 'status', 'status_display',
+            'stage', 'stage_display', 'stage_progress', 'progress_percentage', 'attempts',
+            'max_attempts', 'last_error', 'next_attempt_at', 'created_at', 'updated_at', 'completed_at'
+        ]
+        read_only_fields = fields
@@ -2,7 +2,7 @@ from rest_framework import viewsets, permissions, status, serializers
 from rest_framework.decorators import action, api_view, renderer_classes, permission_classes
 from rest_framework.response import Response
 from rest_framework.permissions import IsAuthenticated, IsAdminUser, AllowAny
-from rest_framework.renderers import JSONRenderer, BrowsableAPIRenderer
+from rest_framework.renderers import JSONRenderer, BrowsableAPIRenderer, BaseRenderer
 from rest_framework.views import APIView
 from rest_framework.parsers import MultiPartParser, FormParser
 from rest_framework.reverse import reverse
@@ -10,16 +10,22 @@ from robots.models import Robot, RobotPDF, Brand, ChatSession, ChatMessage
 from .permissions import CanAccessRobotData, CanAccessBrandData
 from .serializers import (
     RobotSerializer, RobotPDFSerializer, RobotPDFCreateSerializer,
-    ChatMessageSerializer
+    ChatMessageSerializer, PDFIngestionJobSerializer
 )
-from robots.services import upload_pdf_to_services, get_robot_pdf_contents_for_ai
+from robots.services import upload_pdf_to_services, get_robot_pdf_contents_for_ai, resolve_robot_by_slug
 from robots.rag_services import RAGService
+from robots.ingestion_services import enqueue_pdf_ingestion
+from robots.ai_client import get_ai_handler
+from robots.quota import reserve_brand_request, release_brand_request
+from robots.answer_cache import answer_cache
+from robots.api.chat_turn import PublicChatTurnMixin
 from rest_framework.throttling import UserRateThrottle
 from concurrent.futures import ThreadPoolExecutor
 import asyncio
-import subprocess
 import json
+import time
 from django.conf import settings
+from django.http import StreamingHttpResponse
 from django.utils import timezone
 import logging
 
@@ -41,7 +47,8 @@ class RobotViewSet(viewsets.ModelViewSet):
         if self.action in ['create', 'update', 'partial_update', 'destroy']:
             permission_classes = [IsAdminUser]
         elif self.action in ['pdf_dosyalari', 'aktif_pdf_dosyalari', 'kural_pdfleri', 
-                           'rol_pdfleri', 'bilgi_pdfleri', 'beyan_pdfleri', 'upload_pdf']:
+                           'rol_pdfleri', 'bilgi_pdfleri', 'beyan_pdfleri', 'upload_pdf',
+                           'ingestion_jobs', 'ingestion_job']:
             permission_classes = [IsAuthenticated, CanAccessRobotData]
         else:
             permission_classes = [IsAuthenticated]
@@ -126,7 +133,9 @@ class RobotViewSet(viewsets.ModelViewSet):
     def upload_pdf(self, request, pk=None):
         """
         Bir robota yeni bir PDF dosyası yükler.
-        Dosya hem Google Drive'a hem de Supabase'e yüklenir.
+        Dosya kuyruğa alınır; Drive/Supabase yüklemesi, metin çıkarma ve RAG
+        chunklama `run_ingestion_worker` tarafından arka planda yapılır.
+        İlerleme `ingestion_jobs/<job_id>/` endpoint'inden takip edilir.
         """
         robot = self.get_object()
         file_obj = request.FILES.get('file')
@@ -137,42 +146,40 @@ class RobotViewSet(viewsets.ModelViewSet):
                 status=status.HTTP_400_BAD_REQUEST
             )
 
-        # Servis fonksiyonunu çağırarak dosyayı yükle
-        upload_result = upload_pdf_to_services(file_obj, robot)
-
-        if upload_result.get('error'):
-            return Response(
-                {"error": f"Dosya yüklenirken bir hata oluştu: {upload_result['error']}"},
-                status=status.HTTP_500_INTERNAL_SERVER_ERROR
-            )
-
-        # Veritabanına kaydet
-        # Aynı isimde dosya varsa üzerine yaz, yoksa yeni oluştur.
-        pdf_instance, created = RobotPDF.objects.update_or_create(
-            robot=robot,
-            dosya_adi=file_obj.name,
-            defaults={
-                'pdf_dosyasi': upload_result['gdrive_link'],
-                'gdrive_file_id': upload_result['gdrive_file_id'],
-                'supabase_path': upload_result['supabase_path'],
-                'aciklama': request.data.get('aciklama', ''),
-                'is_active': True,
-                # PDF türünü isteğe bağlı olarak alabiliriz, şimdilik 'bilgi' diyelim
-                'pdf_type': request.data.get('pdf_type', 'bilgi') 
-            }
+        job = enqueue_pdf_ingestion(
+            robot,
+            file_obj,
+            user=request.user,
+            # PDF türünü isteğe bağlı olarak alabiliriz, şimdilik 'bilgi' diyelim
+            pdf_type=request.data.get('pdf_type', 'bilgi'),
+            aciklama=request.data.get('aciklama', '')
         )
         
-        # RAG sistemi için PDF'i chunk'la
+        data = PDFIngestionJobSerializer(job).data
+        data['status_url'] = reverse(
+            'robot-ingestion-job',
+            kwargs={'pk': robot.pk, 'job_id': job.id},
+            request=request
+        )
+        return Response(data, status=status.HTTP_202_ACCEPTED)
+
+    @action(detail=True, methods=['get'])
+    def ingestion_jobs(self, request, pk=None):
+        """Robot'un son PDF ingestion işlerini getir"""
+        robot = self.get_object()
+        jobs = robot.ingestion_jobs.defer('file_data')[:20]
+        serializer = PDFIngestionJobSerializer(jobs, many=True)
+        return Response(serializer.data)
+
+    @action(detail=True, methods=['get'], url_path=r'ingestion_jobs/(?P<job_id>\d+)', url_name='ingestion-job')
+    def ingestion_job(self, request, pk=None, job_id=None):
+        """Tek bir PDF ingestion işinin aşama bazlı ilerlemesini getir (polling)"""
+        robot = self.get_object()
         try:
-            rag_service = RAGService()
-            chunks_processed = rag_service.process_single_pdf(pdf_instance)
-            logger.info(f"PDF upload başarılı: {chunks_processed} chunk oluşturuldu")
-        except Exception as e:
-            logger.error(f"RAG chunking hatası: {e}")
-            # RAG hatası upload'ı engellemez, sadece log'larız
-        
-        serializer = RobotPDFSerializer(pdf_instance, context={'request': request})
-        return Response(serializer.data, status=status.HTTP_201_CREATED if created else status.HTTP_200_OK)
+            job = robot.ingestion_jobs.defer('file_data').get(id=job_id)
+        except robot.ingestion_jobs.model.DoesNotExist:
+            return Response({'detail': 'İş bulunamadı.'}, status=status.HTTP_404_NOT_FOUND)
+        return Response(PDFIngestionJobSerializer(job).data)
 
     # ==================== YENİ OPTİMİZASYON YÖNETİMİ ====================
     
@@ -193,10 +200,10 @@ class RobotViewSet(viewsets.ModelViewSet):
                 }, status=status.HTTP_403_FORBIDDEN)
         
         # Optimizasyon durumunu toggle et
-        from robots.services import toggle_optimization_mode, is_optimization_enabled
+        from robots.services import toggle_optimization_mode
         
-        current_status = is_optimization_enabled(robot.id)
-        new_status = not current_status
+        # get_object() robotu az önce veritabanından okudu: cache'e değil kaynağa göre çevir
+        new_status = not robot.optimizasyon_modu
         
         success = toggle_optimization_mode(robot.id, new_status)
         
@@ -743,12 +750,8 @@ def robot_detail_by_slug(request, slug, format=None):
     Slug ile robot detayını getir - Public bilgiler ve yetki kontrolü
     """
     try:
-        # get_slug() metodunu kullanarak robotu bul
-        robot = None
-        for r in Robot.objects.all():
-            if r.get_slug() == slug:
-                robot = r
-                break
+        # Kalıcı slug kolonu üzerinden (cache'li) robotu bul
+        robot = resolve_robot_by_slug(slug)
         
         if not robot:
             raise Robot.DoesNotExist
@@ -813,23 +816,6 @@ class RobotChatView(APIView):
     throttle_classes = [ChatThrottle]
     serializer_class = ChatMessageSerializer
     
-    def get_or_create_session(self, user, robot, session_id=None):
-        """Chat oturumunu al veya oluştur"""
-        if not session_id:
-            session_id = f"robot_{robot.id}_user_{user.id}_{timezone.now().strftime('%Y%m%d_%H%M%S')}"
-        
-        session, created = ChatSession.objects.get_or_create(
-            session_id=session_id,
-            user=user,
-            robot=robot,
-            defaults={
-                'is_active': True,
-                'user_ip': self.get_client_ip(),
-                'user_agent': self.get_user_agent()
-            }
-        )
-        return session
-    
     def get_client_ip(self):
         """Kullanıcının IP adresini al"""
         x_forwarded_for = self.request.META.get('HTTP_X_FORWARDED_FOR')
@@ -843,12 +829,24 @@ class RobotChatView(APIView):
         """Kullanıcının user agent bilgisini al"""
         return self.request.META.get('HTTP_USER_AGENT', '')
     
-    def create_chat_message(self, session, user, robot, message, optimization_enabled=False):
-        """Chat mesajını oluştur ve kaydet"""
-        from django.utils import timezone
-        
-        chat_message = ChatMessage.objects.create(
-            session=session,
+    def get_session_key(self, user, robot, session_id=None):
+        """Oturum anahtarı; ChatSession get_or_create telemetri flush'ına ertelenir"""
+        if not session_id:
+            session_id = f"robot_{robot.id}_user_{user.id}_{timezone.now().strftime('%Y%m%d_%H%M%S')}"
+        return {
+            'session_id': session_id,
+            'user_id': user.id,
+            'robot_id': robot.id,
+            'user_ip': self.get_client_ip(),
+            'user_agent': self.get_user_agent(),
+        }
+    
+    def create_chat_message(self, session_key, user, robot, message, optimization_enabled=False):
+        """
+        Chat mesajını bellekte oluştur. Kaydedilmez: mark_completed / mark_failed
+        mesajı telemetri tamponuna bırakır, yanıt veritabanı yazmasını beklemez.
+        """
+        chat_message = ChatMessage(
             user=user,
             robot=robot,
             message_type='user',
@@ -858,191 +856,252 @@ class RobotChatView(APIView):
             optimization_enabled=optimization_enabled,
             ip_address=self.get_client_ip()
         )
+        chat_message.telemetry_session = session_key
         return chat_message
 
     def get_robot_by_slug(self, slug):
-        try:
-            # get_slug() metodunu kullanarak robotu bul
-            for robot in Robot.objects.all():
-                if robot.get_slug() == slug:
-                    return robot
-            raise Robot.DoesNotExist
-        except Robot.DoesNotExist:
+        # Kalıcı slug kolonu üzerinden (cache'li) robotu bul
+        robot = resolve_robot_by_slug(slug)
+        if robot is None:
             from django.http import Http404
             raise Http404
+        return robot
 
-    def post(self, request, slug, format=None):
-        import subprocess
-        import json
-        from django.conf import settings
-        import logging
-        logger = logging.getLogger(__name__)
+    def prepare_chat_turn(self, request, robot, serializer):
+        """
+        Chat turunu AI çağrısına kadar hazırla (session, mesaj kaydı, yanıt cache'i, limit, RAG, prompt).
+        Erken yanıt gerekiyorsa (Response, None), aksi halde (None, turn) döner.
+        """
+        message = serializer.validated_data['message']
+        history = serializer.validated_data.get('history', [])
+        
+        # 📝 Chat oturum anahtarı (oturum kaydı telemetri flush'ında oluşturulur)
+        session_id = request.data.get('session_id')  # Frontend'den gelebilir
+        session_key = self.get_session_key(request.user, robot, session_id)
+        logger.info(f"📝 Chat oturumu - User: {request.user.username}, Robot: {robot.name}, Session ID: {session_key['session_id']}")
+        
+        # 🔧 Optimizasyon modu kontrolü
+        from robots.services import is_optimization_enabled
+        optimization_enabled = is_optimization_enabled(robot.id)
+        
+        # 📝 Chat mesajını oluştur ve kaydet
+        logger.info(f"📝 Chat mesajını oluşturuluyor - Message: {message[:50]}...")
+        chat_message = self.create_chat_message(
+            session_key=session_key,
+            user=request.user,
+            robot=robot,
+            message=message,
+            optimization_enabled=optimization_enabled
+        )
+        logger.info(f"📝 Chat mesajı oluşturuldu (tamponlu) - Status: {chat_message.status}")
 
-        robot = self.get_robot_by_slug(slug)
-        serializer = self.serializer_class(data=request.data)
+        # 🚀 HIZLI YOL OPTİMİZASYONU: Basit sorguları anında yanıtla
+        # Kullanıcının mesajını küçük harfe çevir ve boşlukları temizle
+        normalized_message = message.strip().lower()
         
-        if serializer.is_valid():
-            message = serializer.validated_data['message']
-            history = serializer.validated_data.get('history', [])
-            
-            # 📝 Chat oturumunu al veya oluştur
-            session_id = request.data.get('session_id')  # Frontend'den gelebilir
-            logger.info(f"📝 Chat oturumunu al veya oluştur - User: {request.user.username}, Robot: {robot.name}")
-            session = self.get_or_create_session(request.user, robot, session_id)
-            logger.info(f"📝 Session oluşturuldu/alındı - ID: {session.id}, Session ID: {session.session_id}")
+        # Çok kısa veya genel selamlama mesajları için RAG ve AI'ı atla
+        if len(normalized_message) < 4 or normalized_message in ['merhaba', 'selam', 'naber', 'hey', 'hi', 'hello']:
+            logger.info(f"Hızlı yol tetiklendi: '{message}'. Anında yanıt veriliyor.")
             
-            # 🔧 Optimizasyon modu kontrolü
-            from robots.services import is_optimization_enabled
-            optimization_enabled = is_optimization_enabled(robot.id)
-            
-            # 📝 Chat mesajını oluştur ve kaydet
-            logger.info(f"📝 Chat mesajını oluşturuluyor - Message: {message[:50]}...")
-            chat_message = self.create_chat_message(
-                session=session,
-                user=request.user,
-                robot=robot,
-                message=message,
-                optimization_enabled=optimization_enabled
+            # 📝 Hızlı yanıt için chat mesajını tamamla
+            quick_response = f"Merhaba! Size {robot.name} asistanı olarak nasıl yardımcı olabilirim?"
+            chat_message.mark_completed(
+                ai_response=quick_response,
+                citations_count=0,
+                context_used=False
             )
-            logger.info(f"📝 Chat mesajı oluşturuldu - ID: {chat_message.id}, Status: {chat_message.status}")
-
-            # 🚀 HIZLI YOL OPTİMİZASYONU: Basit sorguları anında yanıtla
-            # Kullanıcının mesajını küçük harfe çevir ve boşlukları temizle
-            normalized_message = message.strip().lower()
             
-            # Çok kısa veya genel selamlama mesajları için RAG ve AI'ı atla
-            if len(normalized_message) < 4 or normalized_message in ['merhaba', 'selam', 'naber', 'hey', 'hi', 'hello']:
-                logger.info(f"Hızlı yol tetiklendi: '{message}'. Anında yanıt veriliyor.")
-                
-                # 📝 Hızlı yanıt için chat mesajını tamamla
-                quick_response = f"Merhaba! Size {robot.name} asistanı olarak nasıl yardımcı olabilirim?"
+            # Markanın API sayacını artırmadan hızlı yanıt ver
+            return Response({
+                "answer": quick_response,
+                "citations": [],
+                "context_used": False
+            }), None
+
+        rag_service = RAGService()
+        brand = robot.brand
+
+        # 🧠 Semantik yanıt cache'i: geçmişsiz sorularda benzer soru daha önce yanıtlandıysa
+        # RAG, LLM ve kota harcamadan saklanan yanıtı döndür
+        answer_probe = None
+        if answer_cache.enabled and not history and not brand.is_package_expired():
+            try:
+                answer_probe = answer_cache.probe(robot, message, rag_service.vector_service, optimization_enabled)
+            except Exception as e:
+                logger.warning(f"⚠️ Yanıt cache'ine bakılamadı: {e}")
+
+        if answer_probe is not None:
+            chat_message.answer_cache_similarity = answer_probe['similarity']
+            cached = answer_probe['entry']
+            if cached is not None and not brand.is_limit_exceeded():
+                logger.info(f"🧠 Yanıt cache isabeti - Robot: {robot.id}, Benzerlik: {answer_probe['similarity']:.3f}")
+                chat_message.answer_cache_status = 'hit'
                 chat_message.mark_completed(
-                    ai_response=quick_response,
-                    citations_count=0,
-                    context_used=False
+                    ai_response=cached['answer'],
+                    citations_count=len(cached['citations']),
+                    context_used=cached['context_used']
                 )
-                
-                # Markanın API sayacını artırmadan hızlı yanıt ver
                 return Response({
-                    "answer": quick_response,
-                    "citations": [],
-                    "context_used": False
-                })
+                    "answer": cached['answer'],
+                    "citations": cached['citations'],
+                    "context_used": cached['context_used']
+                }), None
+            chat_message.answer_cache_status = 'miss'
 
-            # Markanın API limitini kontrol et
-            brand = robot.brand
-            if brand.is_limit_exceeded() or brand.is_package_expired():
-                # 📝 Limit aşıldığı için mesajı başarısız olarak işaretle
-                error_message = "API kullanım limitiniz doldu veya paket süreniz sona erdi. Lütfen yöneticinizle iletişime geçin."
-                chat_message.mark_failed(error_message, 'limit_exceeded')
-                
-                return Response(
-                    {"answer": error_message},
-                    status=status.HTTP_429_TOO_MANY_REQUESTS
-                )
+        api_key = settings.OPENROUTER_API_KEY
+        if not api_key:
+            logger.error("OPENROUTER_API_KEY ayarlanmamış!")
+            chat_message.mark_failed("API anahtarı yapılandırılmamış.", 'config_error')
+            return Response(
+                {"answer": "Sistem hatası: API anahtarı yapılandırılmamış."},
+                status=status.HTTP_500_INTERNAL_SERVER_ERROR
+            ), None
 
-            # RAG sistemi ile alakalı context'i al
-            rag_service = RAGService()
+        # Markanın kotasından bu istek için atomik rezervasyon yap
+        quota_reservation = None if brand.is_package_expired() else reserve_brand_request(brand)
+        if quota_reservation is None:
+            # 📝 Limit aşıldığı için mesajı başarısız olarak işaretle
+            error_message = "API kullanım limitiniz doldu veya paket süreniz sona erdi. Lütfen yöneticinizle iletişime geçin."
+            chat_message.mark_failed(error_message, 'limit_exceeded')
             
-            pdf_context, citations = rag_service.get_relevant_context(
-                query=message,
-                robot_id=robot.id
-            )
-            
-            # AI'ye gönderilecek 'messages' listesini oluştur
-            messages = []
-            
-            # 🚀 OPTİMİZASYON: Optimizasyon modu kontrol et
-            from robots.services import (
-                get_robot_system_prompt, 
-                get_optimized_robot_pdf_contents_for_ai,
-                get_optimized_system_prompt,
-                get_robot_pdf_contents_for_ai
+            return Response(
+                {"answer": error_message},
+                status=status.HTTP_429_TOO_MANY_REQUESTS
+            ), None
+
+        try:
+            messages, pdf_context, citations = self.build_turn_messages(
+                robot, message, history, optimization_enabled, rag_service, chat_message
             )
+        except Exception as e:
+            # Bağlam/prompt kurulamadı: rezervasyon kotaya geri verilir
+            logger.error(f"❌ Chat turu hazırlanamadı - Robot: {robot.id}, Hata: {type(e).__name__}: {e}")
+            release_brand_request(quota_reservation)
+            error_message = "Yapay zeka yanıtı alınırken genel bir hata oluştu."
+            chat_message.mark_failed(error_message, 'preparation_error')
+            return Response(
+                {"answer": error_message},
+                status=status.HTTP_500_INTERNAL_SERVER_ERROR
+            ), None
+
+        return None, {
+            'message': message,
+            'chat_message': chat_message,
+            'messages': messages,
+            'citations': citations,
+            'pdf_context': pdf_context,
+            'rag_service': rag_service,
+            'brand': brand,
+            'quota_reservation': quota_reservation,
+            'answer_probe': answer_probe,
+            'api_key': api_key,
+        }
+
+    def build_turn_messages(self, robot, message, history, optimization_enabled, rag_service, chat_message):
+        """RAG bağlamı ve sistem prompt'u ile AI'ye gidecek mesajları kur: (messages, pdf_context, citations)"""
+        # RAG sistemi ile alakalı context'i al
+        pdf_context, citations = rag_service.get_relevant_context(
+            query=message,
+            robot_id=robot.id,
+            robot=robot
+        )
+        
+        # AI'ye gönderilecek 'messages' listesini oluştur
+        messages = []
+        
+        # 🚀 OPTİMİZASYON: Optimizasyon modu kontrol et
+        from robots.services import (
+            get_robot_system_prompt, 
+            get_optimized_robot_pdf_contents_for_ai,
+            get_optimized_system_prompt,
+            get_robot_pdf_contents_for_ai
+        )
+        
+        logger.info(f"🔧 Robot {robot.name} optimizasyon modu: {'AÇIK' if optimization_enabled else 'KAPALI'}")
+        
+        # 📝 Context ve citation bilgilerini mesaja ekle
+        context_size = 0
+        
+        if optimization_enabled:
+            # ⚡ OPTİMİZE MOD: Kısa sistem prompt'u + optimize PDF içeriği
+            system_prompt_base = get_optimized_system_prompt(robot, message)
             
-            logger.info(f"🔧 Robot {robot.name} optimizasyon modu: {'AÇIK' if optimization_enabled else 'KAPALI'}")
-            
-            # 📝 Context ve citation bilgilerini mesaja ekle
-            context_size = 0
-            
-            if optimization_enabled:
-                # ⚡ OPTİMİZE MOD: Kısa sistem prompt'u + optimize PDF içeriği
-                system_prompt_base = get_optimized_system_prompt(robot, message)
-                
-                # RAG yerine optimize PDF içeriği kullan
-                pdf_context = get_optimized_robot_pdf_contents_for_ai(robot)
-                context_size = len(pdf_context)
-                logger.info(f"⚡ Optimize PDF içerik kullanıldı: {context_size} karakter")
-            else:
-                # 🔄 STANDART MOD: Normal sistem prompt'u + RAG
-                system_prompt_base = get_robot_system_prompt(robot, message)
-                context_size = len(pdf_context)
-                logger.info(f"🔄 Standart mod: RAG kullanıldı")
-            
-            # PDF context'i sistem prompt'una ekle
-            system_prompt = f"""{system_prompt_base}
+            # RAG yerine optimize PDF içeriği kullan
+            pdf_context = get_optimized_robot_pdf_contents_for_ai(robot)
+            context_size = len(pdf_context)
+            logger.info(f"⚡ Optimize PDF içerik kullanıldı: {context_size} karakter")
+        else:
+            # 🔄 STANDART MOD: Normal sistem prompt'u + RAG
+            system_prompt_base = get_robot_system_prompt(robot, message)
+            context_size = len(pdf_context)
+            logger.info(f"🔄 Standart mod: RAG kullanıldı")
+        
+        # PDF context'i sistem prompt'una ekle
+        system_prompt = f"""{system_prompt_base}
 
 BAĞLAM:
 {pdf_context}
 """
-            messages.append({"role": "system", "content": system_prompt})
+        messages.append({"role": "system", "content": system_prompt})
 
-            # 2. Konuşma Geçmişi
-            if isinstance(history, list):
-                messages.extend(history)
+        # 2. Konuşma Geçmişi
+        if isinstance(history, list):
+            messages.extend(history)
 
-            # 3. Son Kullanıcı Mesajı
-            messages.append({"role": "user", "content": message})
-            
-            # 📝 Chat mesajına context bilgilerini ekle
-            chat_message.context_size = context_size
-            chat_message.context_used = len(citations) > 0
-            chat_message.save(update_fields=['context_size', 'context_used'])
-            
-            try:
-                # ai-request.py script'ini çağır
-                script_path = settings.BASE_DIR / 'robots' / 'scripts' / 'ai-request.py'
-                api_key = settings.OPENROUTER_API_KEY
+        # 3. Son Kullanıcı Mesajı
+        messages.append({"role": "user", "content": message})
+        
+        # 📝 Chat mesajına context bilgilerini ekle (tamamlanınca tek seferde yazılır)
+        chat_message.context_size = context_size
+        chat_message.context_used = len(citations) > 0
 
-                if not api_key:
-                    logger.error("OPENROUTER_API_KEY ayarlanmamış!")
-                    return Response(
-                        {"answer": "Sistem hatası: API anahtarı yapılandırılmamış."},
-                        status=status.HTTP_500_INTERNAL_SERVER_ERROR
-                    )
+        return messages, pdf_context, citations
 
-                process = subprocess.run(
-                    [
-                        'python', 
-                        str(script_path),
-                        '--api-key', api_key,
-                        '--prompt', json.dumps(messages)
-                    ],
-                    capture_output=True,
-                    text=True,
-                    check=True,
-                    encoding='utf-8'
-                )
-                
-                logger.debug(f"AI script stdout: {process.stdout.strip()}")
-                logger.debug(f"AI script stderr: {process.stderr.strip()}")
+    def remember_answer(self, turn, answer, context_used):
+        """Iskalanan sorunun yanıtını semantik cache'e ekle"""
+        answer_probe = turn['answer_probe']
+        if answer_probe is None or not answer:
+            return
+        answer_cache.store(
+            answer_probe['key'], answer_probe['embedding'],
+            turn['message'], answer, turn['citations'], context_used
+        )
 
-                answer = process.stdout.strip()
+    def post(self, request, slug, format=None):
+        robot = self.get_robot_by_slug(slug)
+        serializer = self.serializer_class(data=request.data)
+        
+        if serializer.is_valid():
+            early_response, turn = self.prepare_chat_turn(request, robot, serializer)
+            if early_response is not None:
+                return early_response
+
+            message = turn['message']
+            chat_message = turn['chat_message']
+            messages = turn['messages']
+            citations = turn['citations']
+            pdf_context = turn['pdf_context']
+            rag_service = turn['rag_service']
+            brand = turn['brand']
+            api_key = turn['api_key']
 
-                # DEBUG: Frontend'e gönderilmeden önce 'answer' değişkenini logla
-                logger.info(f"DEBUG: Answer from AI script (type: {type(answer)}, len: {len(answer)}): {answer[:200]}...")
+            try:
+                # Process başına paylaşılan, keep-alive bağlantılı AI istemcisi
+                ai_handler = get_ai_handler(api_key)
+                answer = ai_handler.chat_with_history(messages, max_tokens=10000).strip()
+
+                logger.debug(f"AI yanıtı (len: {len(answer)}): {answer[:200]}...")
 
                 # RAG bilgilerini logla
                 rag_service.log_query(message, robot.id, pdf_context, citations, answer)
 
-                brand.increment_api_count()
-
                 # 📝 Chat mesajını tamamlandı olarak işaretle
                 chat_message.mark_completed(
                     ai_response=answer,
                     citations_count=len(citations),
                     context_used=len(citations) > 0
                 )
+                self.remember_answer(turn, answer, len(citations) > 0)
 
                 # Citations ile birlikte yanıt döndür
                 return Response({
@@ -1051,24 +1110,15 @@ BAĞLAM:
                     "context_used": len(citations) > 0
                 })
 
-            except FileNotFoundError:
-                error_message = "Yapay zeka betiği bulunamadı. Lütfen sistem yöneticisiyle iletişime geçin."
-                logger.error(f"AI script dosyası bulunamadı: {script_path}")
-                
-                # 📝 Chat mesajını başarısız olarak işaretle
-                chat_message.mark_failed(error_message, 'script_not_found')
-                
-                return Response(
-                    {"answer": error_message},
-                    status=status.HTTP_500_INTERNAL_SERVER_ERROR
-                )
-            except subprocess.CalledProcessError as e:
-                error_message = f"Yapay zeka yanıtı alınırken bir komut hatası oluştu: {e.stderr}"
-                logger.error(f"AI script hatası: {e.stderr}")
-                
+            except ValueError as e:
+                # make_chat_request'in eşlediği hata mesajları (429, HTTP, bağlantı)
+                error_message = str(e)
+                logger.error(f"AI istemci hatası: {error_message}")
+                release_brand_request(turn['quota_reservation'])
+
                 # 📝 Chat mesajını başarısız olarak işaretle
-                chat_message.mark_failed(error_message, 'subprocess_error')
-                
+                chat_message.mark_failed(error_message, 'ai_request_error')
+
                 return Response(
                     {"answer": error_message},
                     status=status.HTTP_500_INTERNAL_SERVER_ERROR
@@ -1076,6 +1126,7 @@ BAĞLAM:
             except Exception as e:
                 error_message = "Yapay zeka yanıtı alınırken genel bir hata oluştu."
                 logger.error(f"AI handler'da genel hata: {e}")
+                release_brand_request(turn['quota_reservation'])
                 
                 # 📝 Chat mesajını başarısız olarak işaretle
                 chat_message.mark_failed(error_message, 'general_error')
@@ -1085,30 +1136,125 @@ BAĞLAM:
                     status=status.HTTP_500_INTERNAL_SERVER_ERROR
                 )
         
-        # 📝 Validation hatası durumunda da mesaj oluştur (eğer robot bulunabiliyorsa)
+        # 📝 Validation hatası durumunda da mesaj kaydı (telemetri tamponu üzerinden)
         try:
-            # Sadece validation hatası var, robot bulunabiliyorsa session ve message oluştur
-            session = self.get_or_create_session(request.user, robot)
-            chat_message = ChatMessage.objects.create(
-                session=session,
+            chat_message = self.create_chat_message(
+                session_key=self.get_session_key(request.user, robot),
                 user=request.user,
                 robot=robot,
-                message_type='user',
-                user_message=request.data.get('message', ''),
-                status='failed',
-                processing_started_at=timezone.now(),
-                processing_ended_at=timezone.now(),
-                error_message=str(serializer.errors),
-                error_type='validation_error',
-                ip_address=self.get_client_ip()
+                message=request.data.get('message', '')
             )
-        except:
-            # Eğer robot bulunamazsa veya başka bir hata varsa sadece geç
-            pass
+            chat_message.mark_failed(str(serializer.errors), 'validation_error')
+        except Exception as e:
+            logger.warning(f"⚠️ Validation hatası kaydedilemedi: {e}")
         
         return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
 
 
+class EventStreamRenderer(BaseRenderer):
+    """
+    `Accept: text/event-stream` isteklerinin content negotiation'dan (406) geçmesi için.
+    Asıl gövde StreamingHttpResponse tarafından yazılır.
+    """
+    media_type = 'text/event-stream'
+    format = 'sse'
+    charset = 'utf-8'
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        return json.dumps(data, ensure_ascii=False).encode(self.charset)
+
+
+def sse_event(data, event=None):
+    """Tek bir Server-Sent Event çerçevesi oluştur"""
+    frame = f"event: {event}\n" if event else ""
+    return f"{frame}data: {json.dumps(data, ensure_ascii=False)}\n\n"
+
+
+class RobotChatStreamView(PublicChatTurnMixin, APIView):
+    """
+    Herkese açık chat endpoint'inin (/api/robots/<slug>/chat/) SSE (text/event-stream) versiyonu.
+    Tur hazırlığı JSON endpoint'i ile ortaktır (anonim erişim, alias slug'lar, Sidrex kotası, 'pdf' yanıt cache'i);
+    OpenRouter `stream: true` parçalarını geldikçe `data: {"delta": ...}` olarak iletir,
+    akış bitince `event: done` ile JSON endpoint'inin yanıt gövdesini gönderir.
+    """
+    renderer_classes = [JSONRenderer, EventStreamRenderer]
+    serializer_class = ChatMessageSerializer
+    stream_max_tokens = 6000
+
+    def post(self, request, slug, format=None):
+        request_start_time = time.time()
+        robot = self.get_robot_by_slug(slug)
+        if not robot:
+            return Response({'error': 'Robot bulunamadı'}, status=status.HTTP_404_NOT_FOUND)
+
+        serializer = self.serializer_class(data=request.data)
+        if not serializer.is_valid():
+            self.record_validation_error(request, robot, serializer)
+            return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
+
+        # Paket süresi, limit ve prompt hataları normal JSON yanıt olarak döner
+        early_response, turn = self.prepare_chat_turn(request, robot, serializer, request_start_time)
+        if early_response is not None:
+            return early_response
+
+        response = StreamingHttpResponse(
+            self.stream_turn(robot, turn),
+            content_type='text/event-stream; charset=utf-8'
+        )
+        response['Cache-Control'] = 'no-cache'
+        response['X-Accel-Buffering'] = 'no'  # nginx proxy buffering'i kapat
+        return response
+
+    def stream_turn(self, robot, turn):
+        """AI parçalarını SSE olarak yield et, akış kapanınca ChatMessage'ı tamamla"""
+        chat_message = turn['chat_message']
+        cached_answer = turn['cached_answer']
+        parts = []
+        finished = False
+
+        try:
+            if cached_answer is not None:
+                # Yanıt cache isabeti: LLM çağrılmaz, yanıt tek parça gönderilir
+                logger.info(f"🧠 Yanıt cache isabeti (stream) - Robot: {robot.id}, Benzerlik: {turn['answer_probe']['similarity']:.3f}")
+                chat_message.answer_cache_status = 'hit'
+                chat_message.tokens_used = 0
+                answer = cached_answer['answer']
+            else:
+                for delta in get_ai_handler().stream_chat(turn['messages'], max_tokens=self.stream_max_tokens):
+                    parts.append(delta)
+                    yield sse_event({"delta": delta})
+                answer = self.truncate_response(''.join(parts).strip())
+                logger.debug(f"AI stream yanıtı (len: {len(answer)}): {answer[:200]}...")
+
+            # 📝 Chat mesajını tamamlandı olarak işaretle
+            self.complete_turn(turn, answer)
+            finished = True
+
+            yield sse_event(self.build_turn_payload(robot, turn, answer), event='done')
+            self.remember_answer(turn, answer)
+
+        except ValueError as e:
+            error_message = str(e)
+            logger.error(f"AI stream hatası: {error_message}")
+            chat_message.mark_failed(error_message, 'ai_request_error')
+            self.release_turn(turn)
+            finished = True
+            yield sse_event(self.build_turn_payload(robot, turn, error_message), event='error')
+        except Exception as e:
+            error_message = "Üzgünüm, şu anda teknik bir sorun yaşıyorum. Lütfen daha sonra tekrar deneyin."
+            logger.error(f"AI stream'de genel hata: {type(e).__name__}: {e}")
+            chat_message.mark_failed(f"{type(e).__name__}: {str(e)}", 'ai_processing_error')
+            self.release_turn(turn)
+            finished = True
+            yield sse_event(self.build_turn_payload(robot, turn, error_message), event='error')
+        finally:
+            if not finished:
+                # İstemci bağlantıyı akış bitmeden kapattı
+                logger.info(f"📝 Stream istemci tarafından kesildi - Session ID: {chat_message.telemetry_session['session_id']}")
+                chat_message.mark_failed("İstemci akışı tamamlanmadan bağlantıyı kapattı.", 'client_disconnected')
+                self.release_turn(turn)
+
+
 class RobotMessagesView(APIView):
     """
     Robot Custom Messages API - ZZEN robot için özel mesaj yönetimi
@@ -1,5 +1,11 @@
+import logging
+import os
+import sys
+
 from django.apps import AppConfig
 
+logger = logging.getLogger(__name__)
+
 
 class RobotsConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
@@ -8,3 +14,22 @@ class RobotsConfig(AppConfig):
     def ready(self):
         # Sinyallerin import edilmesi
         import robots.signals
+
+        self.warm_up_embeddings()
+
+    def warm_up_embeddings(self):
+        """
+        RAG_WARMUP_EMBEDDINGS açıksa embedding modelini worker başlarken yükle,
+        böylece ilk chat isteği model yükleme süresini beklemez.
+        """
+        from robots.rag_config import RAGConfig
+
+        if not RAGConfig.WARMUP_EMBEDDINGS:
+            return
+
+        # migrate/collectstatic gibi yönetim komutlarında model yükleme
+        if 'manage.py' in os.path.basename(sys.argv[0]) and 'runserver' not in sys.argv:
+            return
+
+        from robots.rag_services import warm_up_embedding_models
+        warm_up_embedding_models()
@@ -0,0 +1,229 @@
+"""
+PDF Ingestion Servisleri - SidrexGPT Robots App
+
+PDF yükleme isteği artık Drive/Supabase yüklemesi, metin çıkarma ve RAG
+chunklama işlerini HTTP isteği içinde yapmaz. İstek dosyayı bir
+`PDFIngestionJob` olarak kuyruğa bırakır; `run_ingestion_worker` komutu
+işleri veritabanı üzerinden (SELECT ... FOR UPDATE SKIP LOCKED) alır ve
+aşamaları sırayla çalıştırır:
+
+    store -> extract -> chunk -> embed -> index
+
+Her aşama tamamlandığında iş bir sonraki aşamaya geçer; hata durumunda
+iş kaldığı aşamadan, artan bekleme süresiyle yeniden denenir.
+"""
+
+import io
+import logging
+import os
+import socket
+from datetime import timedelta
+
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.db import transaction
+from django.db.models import Q
+from django.utils import timezone
+
+from .models import PDFIngestionJob, RobotPDF
+from .rag_config import RAGConfig
+from .rag_services import RAGService
+from .services import upload_pdf_to_services
+from .pdf_text import extract_text_from_pdf_stream, PDF_EXTRACT_WORKERS
+
+logger = logging.getLogger(__name__)
+
+# Bu süreden uzun "running" kalan işlerin worker'ı öldü kabul edilir
+LOCK_TIMEOUT = timedelta(minutes=30)
+# Yeniden deneme gecikmesi: RETRY_BASE_DELAY * 2^(deneme-1) saniye
+RETRY_BASE_DELAY = 30
+
+
+def get_worker_id():
+    """Kilit sahibini tanımlamak için host + pid"""
+    return f"{socket.gethostname()}:{os.getpid()}"
+
+
+def enqueue_pdf_ingestion(robot, file_obj, user=None, pdf_type='bilgi', aciklama=''):
+    """Yüklenen dosyayı kuyruğa bırak, işi hemen döndür"""
+    file_obj.seek(0)
+    job = PDFIngestionJob.objects.create(
+        robot=robot,
+        created_by=user if user is not None and user.is_authenticated else None,
+        file_name=file_obj.name,
+        content_type=getattr(file_obj, 'content_type', None) or 'application/pdf',
+        file_data=file_obj.read(),
+        pdf_type=pdf_type or 'bilgi',
+        aciklama=aciklama or '',
+    )
+    logger.info(f"📥 PDF ingestion işi kuyruğa alındı - Job: {job.id}, Dosya: {job.file_name}, Robot: {robot.name}")
+    return job
+
+
+def claim_next_job(worker_id=None):
+    """
+    Çalıştırılmaya hazır bir işi kilitleyerek al.
+    Kilidi zaman aşımına uğramış (worker'ı ölmüş) işler de yeniden alınır.
+    """
+    worker_id = worker_id or get_worker_id()
+    now = timezone.now()
+
+    with transaction.atomic():
+        job = (
+            PDFIngestionJob.objects
+            .select_for_update(skip_locked=True)
+            .filter(
+                Q(status='queued', next_attempt_at__lte=now) |
+                Q(status='running', locked_at__lt=now - LOCK_TIMEOUT)
+            )
+            .order_by('next_attempt_at', 'id')
+            .first()
+        )
+        if job is None:
+            return None
+
+        job.status = 'running'
+        job.locked_by = worker_id
+        job.locked_at = now
+        job.save(update_fields=['status', 'locked_by', 'locked_at', 'updated_at'])
+
+    return job
+
+
+def run_job(job, rag_service=None):
+    """İşin kalan aşamalarını sırayla çalıştır"""
+    rag_service = rag_service or RAGService()
+
+    while job.stage != 'done':
+        stage = job.stage
+        handler = STAGE_HANDLERS[stage]
+        job.set_stage_progress(stage, status='running', started_at=timezone.now().isoformat())
+
+        try:
+            details = handler(job, rag_service) or {}
+        except Exception as e:
+            logger.error(f"❌ Ingestion aşaması başarısız - Job: {job.id}, Aşama: {stage}, Hata: {e}")
+            _handle_failure(job, stage, e)
+            return job
+
+        job.set_stage_progress(stage, status='completed', ended_at=timezone.now().isoformat(), **details)
+        job.stage = _next_stage(stage)
+        job.save(update_fields=['stage', 'updated_at'])
+
+    job.status = 'completed'
+    job.completed_at = timezone.now()
+    job.file_data = None  # Dosya artık Drive/Supabase'de, kuyruk kopyasına gerek yok
+    job.locked_by = None
+    job.locked_at = None
+    job.last_error = None
+    job.save(update_fields=['status', 'completed_at', 'file_data', 'locked_by', 'locked_at', 'last_error', 'updated_at'])
+    logger.info(f"✅ PDF ingestion tamamlandı - Job: {job.id}, PDF: {job.robot_pdf_id}")
+    return job
+
+
+def _next_stage(stage):
+    stages = PDFIngestionJob.STAGES
+    index = stages.index(stage)
+    return stages[index + 1] if index + 1 < len(stages) else 'done'
+
+
+def _handle_failure(job, stage, error):
+    """Denemeyi say; hakkı varsa geri çekilerek kuyruğa al, yoksa başarısız yap"""
+    job.attempts += 1
+    job.last_error = f"{stage}: {error}"
+    job.locked_by = None
+    job.locked_at = None
+    job.stage_progress.setdefault(stage, {}).update(status='failed', error=str(error))
+
+    if job.attempts < job.max_attempts:
+        delay = RETRY_BASE_DELAY * (2 ** (job.attempts - 1))
+        job.status = 'queued'
+        job.next_attempt_at = timezone.now() + timedelta(seconds=delay)
+        logger.info(f"🔁 Job {job.id} {delay} sn sonra yeniden denenecek ({job.attempts}/{job.max_attempts})")
+    else:
+        job.status = 'failed'
+
+    job.save(update_fields=[
+        'attempts', 'last_error', 'locked_by', 'locked_at', 'stage_progress',
+        'status', 'next_attempt_at', 'updated_at'
+    ])
+
+
+# ------------------------------------------------------------------
+# Aşamalar
+# ------------------------------------------------------------------
+
+def _stage_store(job, rag_service):
+    """Dosyayı Drive + Supabase'e yükle ve RobotPDF kaydını oluştur"""
+    file_obj = SimpleUploadedFile(job.file_name, bytes(job.file_data), content_type=job.content_type)
+    upload_result = upload_pdf_to_services(file_obj, job.robot)
+    if upload_result.get('error'):
+        raise RuntimeError(upload_result['error'])
+
+    # Aynı isimde dosya varsa üzerine yaz, yoksa yeni oluştur.
+    robot_pdf = RobotPDF.objects.filter(robot=job.robot, dosya_adi=job.file_name).first()
+    if robot_pdf is None:
+        robot_pdf = RobotPDF(robot=job.robot, dosya_adi=job.file_name)
+
+    robot_pdf.pdf_dosyasi = upload_result['gdrive_link']
+    robot_pdf.gdrive_file_id = upload_result['gdrive_file_id']
+    robot_pdf.supabase_path = upload_result['supabase_path']
+    robot_pdf.aciklama = job.aciklama
+    robot_pdf.is_active = True
+    robot_pdf.pdf_type = job.pdf_type
+    # İçerik Drive'dan tekrar indirilmez, "extract" aşaması kuyruktaki kopyadan okur
+    robot_pdf._skip_content_extraction = True
+    robot_pdf.save()
+
+    job.robot_pdf = robot_pdf
+    job.save(update_fields=['robot_pdf', 'updated_at'])
+    return {'robot_pdf_id': robot_pdf.id}
+
+
+def _stage_extract(job, rag_service):
+    """Kuyruktaki dosyadan metni çıkar ve RobotPDF.pdf_icerigi'ne yaz"""
+    # Ayrı worker process'inde çalışır: sayfa paralel çıkarma burada güvenli
+    content = extract_text_from_pdf_stream(io.BytesIO(bytes(job.file_data)), max_workers=PDF_EXTRACT_WORKERS)
+    if not content:
+        raise RuntimeError("PDF'ten metin çıkarılamadı")
+
+    robot_pdf = job.robot_pdf
+    robot_pdf.pdf_icerigi = content
+    robot_pdf.save(update_fields=['pdf_icerigi'])
+    return {'characters': len(content)}
+
+
+def _stage_chunk(job, rag_service):
+    """Chunk sayısını hesapla (chunklama deterministik, sonraki aşamalar yeniden üretir)"""
+    chunks, _ = rag_service.build_chunks(job.robot_pdf)
+    if not chunks:
+        raise RuntimeError("PDF chunk'lanamadı")
+    return {'chunks': len(chunks)}
+
+
+def _stage_embed(job, rag_service):
+    """Chunk embedding'lerini parça parça hesapla; sonuçlar embedding_store'a yazılır"""
+    chunks, _ = rag_service.build_chunks(job.robot_pdf)
+    texts = [chunk['text'] for chunk in chunks]
+    step = RAGConfig.EMBEDDING_BATCH_SIZE
+
+    for start in range(0, len(texts), step):
+        rag_service.vector_service.embed_chunk_texts(texts[start:start + step])
+        job.set_stage_progress('embed', done=min(start + step, len(texts)), total=len(texts))
+
+    return {'embedded': len(texts)}
+
+
+def _stage_index(job, rag_service):
+    """pdf_chunks'ı senkronize et (embedding'ler embedding_store'dan gelir)"""
+    chunks, _ = rag_service.build_chunks(job.robot_pdf)
+    sync_stats = rag_service.vector_service.store_chunks(job.robot_pdf_id, chunks)
+    return sync_stats
+
+
+STAGE_HANDLERS = {
+    'store': _stage_store,
+    'extract': _stage_extract,
+    'chunk': _stage_chunk,
+    'embed': _stage_embed,
+    'index': _stage_index,
+}
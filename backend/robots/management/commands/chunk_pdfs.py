@@ -95,17 +95,11 @@ class Command(BaseCommand):
             try:
                 # Chunk kontrolü (force yoksa atla)
                 if not force:
-                    from django.db import connection
-                    with connection.cursor() as cursor:
-                        cursor.execute(
-                            "SELECT COUNT(*) FROM pdf_chunks WHERE robot_pdf_id = %s",
-                            [pdf.id]
-                        )
-                        existing_chunks = cursor.fetchone()[0]
-                        
-                        if existing_chunks > 0:
-                            self.stdout.write(f"    ⏭️ Atlandı: {existing_chunks} chunk zaten var (--force ile zorla)")
-                            continue
+                    existing_chunks = rag_service.vector_service.store.stats(robot_pdf_id=pdf.id)['chunks']
+                    
+                    if existing_chunks > 0:
+                        self.stdout.write(f"    ⏭️ Atlandı: {existing_chunks} chunk zaten var (--force ile zorla)")
+                        continue
                 
                 result = rag_service.process_pdf(pdf, scenario)
                 
@@ -116,6 +110,12 @@ class Command(BaseCommand):
                     self.stdout.write(
                         self.style.SUCCESS(f"    ✅ Başarılı: {chunks_count} chunk oluşturuldu")
                     )
+                    sync_stats = result.get('sync_stats')
+                    if sync_stats:
+                        self.stdout.write(
+                            f"    🔁 Yeni: {sync_stats['inserted']} | Güncellenen: {sync_stats['updated']} | "
+                            f"Silinen: {sync_stats['deleted']} | Değişmeyen: {sync_stats['unchanged']}"
+                        )
                 else:
                     failed_count += 1
                     self.stdout.write(
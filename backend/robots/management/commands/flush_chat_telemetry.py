@@ -0,0 +1,40 @@
+from django.core.management.base import BaseCommand
+from robots.telemetry import chat_telemetry
+import logging
+
+logger = logging.getLogger(__name__)
+
+
+class Command(BaseCommand):
+    help = (
+        'Sonlanmış worker\'lardan kalan chat telemetri spill dosyalarını veritabanına yazar. '
+        'Çalışan worker\'lar bunu başlangıçta kendileri de yapar; deploy sonrası elle çalıştırılabilir.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--status', action='store_true', help='Yalnızca bekleyen spill dosyalarını listele')
+        parser.add_argument(
+            '--dead-letter',
+            action='store_true',
+            help='Yazılamayıp dead-letter dosyasına taşınan olayları tekrar yazmayı dene'
+        )
+
+    def handle(self, *args, **options):
+        files = chat_telemetry.spill_files()
+        self.stdout.write(self.style.NOTICE(f'📂 Spill dizini: {chat_telemetry.spill_dir} ({len(files)} dosya)'))
+        for name in files:
+            self.stdout.write(f'  📄 {name}')
+
+        if options['status']:
+            return
+
+        if options['dead_letter']:
+            written, total = chat_telemetry.replay_dead_letters()
+            self.stdout.write(self.style.SUCCESS(f'☠️ Dead-letter: {written}/{total} olay yazıldı'))
+
+        recovered = chat_telemetry.recover_orphans()
+        pending = chat_telemetry.retry_count
+        if pending:
+            self.stdout.write(self.style.WARNING(f'⚠️ {pending} olay yazılamadı, dosyalar korunuyor'))
+        self.stdout.write(self.style.SUCCESS(f'✅ {recovered} olay kurtarıldı'))
+        logger.info(f"Telemetri spill kurtarma: {recovered} olay")
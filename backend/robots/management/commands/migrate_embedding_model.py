@@ -0,0 +1,283 @@
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, transaction
+from django.db.models import F
+from django.utils import timezone
+from robots.models import Robot, EmbeddingMigration
+from robots.rag_config import RAGConfig
+from robots.rag_services import EmbeddingService, VectorSearchService
+from robots.vector_stores import (
+    PgVectorStore, SHADOW_EMBEDDING_COLUMN, SHADOW_INDEX_NAME, HNSW_MAX_DIMENSIONS,
+    VECTOR_ENCODING_INDEXES, shadow_index_ddl, vector_index_ddl, to_vector_literal,
+)
+import logging
+import time
+
+logger = logging.getLogger(__name__)
+
+
+class Command(BaseCommand):
+    help = (
+        'Embedding modelini kesintisiz değiştirir. Sıra: --start --model X, --backfill, '
+        '--flip --all-ready, RAG_EMBEDDING_MODEL / RAG_EMBEDDING_DIM ile yeniden deploy, --finalize. '
+        'Geçiş boyunca dolumu bitmeyen robotlar eski modelle aramaya devam eder.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--start', action='store_true', help='Gölge kolonu ve indeksini oluşturup geçişi başlat')
+        parser.add_argument('--model', help='Hedef embedding modeli (--start ile)')
+        parser.add_argument('--dimensions', type=int, help='Hedef boyut (verilmezse model ile ölçülür)')
+        parser.add_argument('--backfill', action='store_true', help='Gölge kolonu boş satırları doldur')
+        parser.add_argument('--batch-size', type=int, default=RAGConfig.EMBEDDING_BATCH_SIZE, help='Batch başına satır')
+        parser.add_argument('--sleep', type=float, default=0.5, help='Batch arası bekleme (saniye)')
+        parser.add_argument('--max-batches', type=int, help='Bu çalıştırmada en fazla işlenecek batch')
+        parser.add_argument('--flip', action='store_true', help='Robotların okumalarını yeni modele çevir')
+        parser.add_argument('--unflip', action='store_true', help='Robotların okumalarını eski modele geri al')
+        parser.add_argument(
+            '--robot-id',
+            type=int,
+            action='append',
+            dest='robot_ids',
+            help='İşlenecek robot ID (birden çok verilebilir)'
+        )
+        parser.add_argument('--all-ready', action='store_true', help='Dolumu biten tüm robotları çevir (--flip ile)')
+        parser.add_argument('--finalize', action='store_true', help='Kolonları yer değiştir ve geçişi bitir')
+        parser.add_argument('--abort', action='store_true', help='Geçişi iptal et ve gölge kolonu kaldır')
+        parser.add_argument('--status', action='store_true', help='Geçiş durumunu göster')
+
+    def handle(self, *args, **options):
+        if 'pdf_chunks' not in connection.introspection.table_names():
+            raise CommandError('pdf_chunks tablosu yok; model geçişi yalnızca pgvector deposunda yapılır')
+
+        if options['start']:
+            self.start(options['model'], options.get('dimensions'))
+        elif options['backfill']:
+            self.backfill(options['robot_ids'], options['batch_size'], options['sleep'], options.get('max_batches'))
+        elif options['flip']:
+            self.flip(options['robot_ids'], options['all_ready'])
+        elif options['unflip']:
+            self.unflip(options['robot_ids'])
+        elif options['finalize']:
+            self.finalize()
+        elif options['abort']:
+            self.abort()
+
+        if options['status'] or not any(
+            options[name] for name in ('start', 'backfill', 'flip', 'unflip', 'finalize', 'abort')
+        ):
+            self.show_status()
+
+    def get_migration(self):
+        migration = EmbeddingMigration.get_active()
+        if migration is None:
+            raise CommandError('Devam eden embedding geçişi yok (önce --start)')
+        return migration
+
+    def start(self, target_model, dimensions):
+        if not target_model:
+            raise CommandError('--model verilmeli')
+        if EmbeddingMigration.get_active():
+            raise CommandError('Zaten devam eden bir geçiş var (--status / --abort)')
+
+        source_model = RAGConfig.EMBEDDING_MODEL
+        if target_model == source_model:
+            raise CommandError(f'Hedef model mevcut modelle aynı: {source_model}')
+
+        if not dimensions:
+            # Modeli bir kez çalıştırıp gerçek boyutu ölç (config listesinde olmayan modeller için)
+            dimensions = len(EmbeddingService(target_model).create_embedding('boyut testi'))
+
+        self.stdout.write(self.style.NOTICE(f'🔧 {source_model} -> {target_model} ({dimensions} boyut) geçişi hazırlanıyor...'))
+
+        with connection.cursor() as cursor:
+            # Default'suz nullable kolon: tablo yeniden yazılmaz, kilit anlık
+            cursor.execute(f"ALTER TABLE pdf_chunks ADD COLUMN IF NOT EXISTS {SHADOW_EMBEDDING_COLUMN} vector({dimensions})")
+            # Boş kolona indeks anında kurulur; backfill satırları artımlı indekslenir
+            cursor.execute(shadow_index_ddl(dimensions, concurrently=True))
+
+        # Kayıt kolondan sonra açılır: çift yazma yalnızca kolon varken başlar
+        migration = EmbeddingMigration.objects.create(
+            source_model=source_model,
+            target_model=target_model,
+            dimensions=dimensions,
+        )
+        # Süreçlerde context_version ile cache'lenen geçiş durumu yenilensin
+        Robot.objects.update(context_version=F('context_version') + 1)
+        self.stdout.write(self.style.SUCCESS(f'✅ Geçiş başladı (ID: {migration.id}); şimdi --backfill çalıştırın'))
+        logger.info(f"Embedding geçişi başladı: {source_model} -> {target_model}, boyut: {dimensions}")
+
+    def backfill(self, robot_ids, batch_size, sleep, max_batches):
+        migration = self.get_migration()
+        service = VectorSearchService(EmbeddingService(migration.target_model), store=PgVectorStore())
+
+        filled = 0
+        batches = 0
+        last_id = 0
+        started = time.time()
+
+        while max_batches is None or batches < max_batches:
+            with connection.cursor() as cursor:
+                cursor.execute(f"""
+                    SELECT id, chunk_text
+                    FROM pdf_chunks
+                    WHERE {SHADOW_EMBEDDING_COLUMN} IS NULL
+                      AND id > %s
+                      AND (%s::integer[] IS NULL OR robot_id = ANY(%s))
+                    ORDER BY id
+                    LIMIT %s
+                """, [last_id, robot_ids or None, robot_ids or None, batch_size])
+                batch = cursor.fetchall()
+
+            if not batch:
+                break
+
+            # id imleci: embed edilemeyen satırda döngüye girilmez
+            last_id = batch[-1][0]
+            embeddings = service.embed_chunk_texts([chunk_text for _, chunk_text in batch])
+
+            with connection.cursor() as cursor:
+                # Çift yazma ile dolmuş satırların üzerine yazılmaz
+                cursor.executemany(f"""
+                    UPDATE pdf_chunks SET {SHADOW_EMBEDDING_COLUMN} = %s::vector
+                    WHERE id = %s AND {SHADOW_EMBEDDING_COLUMN} IS NULL
+                """, [(to_vector_literal(embedding), row_id) for (row_id, _), embedding in zip(batch, embeddings)])
+
+            EmbeddingMigration.objects.filter(pk=migration.pk).update(rows_done=F('rows_done') + len(batch))
+            filled += len(batch)
+            batches += 1
+            self.stdout.write(f'  📦 {filled} satır dolduruldu ({filled / max(time.time() - started, 1e-6):.1f} satır/sn)')
+
+            # Embedding modeli ve veritabanı canlı trafiğe nefes alsın
+            if sleep:
+                time.sleep(sleep)
+
+        self.stdout.write(self.style.SUCCESS(f'✅ Backfill: {filled} satır, {batches} batch'))
+        logger.info(f"Embedding backfill: {filled} satır, hedef: {migration.target_model}")
+
+    def pending_counts(self):
+        """Robot ID -> gölge kolonu henüz boş satır sayısı"""
+        with connection.cursor() as cursor:
+            cursor.execute(f"""
+                SELECT robot_id, COUNT(*)
+                FROM pdf_chunks
+                WHERE {SHADOW_EMBEDDING_COLUMN} IS NULL
+                GROUP BY robot_id
+            """)
+            return dict(cursor.fetchall())
+
+    def flip(self, robot_ids, all_ready):
+        migration = self.get_migration()
+        if not robot_ids and not all_ready:
+            raise CommandError('--robot-id veya --all-ready verilmeli')
+
+        pending = self.pending_counts()
+        robots = Robot.objects.exclude(embedding_model=migration.target_model)
+        if robot_ids:
+            robots = robots.filter(id__in=robot_ids)
+
+        ready_ids = []
+        for robot_id in robots.values_list('id', flat=True):
+            if pending.get(robot_id):
+                self.stdout.write(self.style.WARNING(f'  ⏳ Robot {robot_id}: {pending[robot_id]} satır bekliyor, çevrilmedi'))
+            else:
+                ready_ids.append(robot_id)
+
+        # Versiyon artışı: bu robotun cache'lenmiş bağlam/cevapları eski modele dayanıyor
+        updated = Robot.objects.filter(id__in=ready_ids).update(
+            embedding_model=migration.target_model,
+            context_version=F('context_version') + 1
+        )
+        self.stdout.write(self.style.SUCCESS(f'✅ {updated} robot {migration.target_model} modeline çevrildi'))
+        logger.info(f"Embedding okumaları çevrildi: {ready_ids} -> {migration.target_model}")
+
+    def unflip(self, robot_ids):
+        migration = self.get_migration()
+        robots = Robot.objects.filter(embedding_model=migration.target_model)
+        if robot_ids:
+            robots = robots.filter(id__in=robot_ids)
+
+        updated = robots.update(embedding_model='', context_version=F('context_version') + 1)
+        self.stdout.write(self.style.SUCCESS(f'↩️ {updated} robot {migration.source_model} modeline geri alındı'))
+
+    def finalize(self):
+        migration = self.get_migration()
+
+        if RAGConfig.EMBEDDING_MODEL != migration.target_model or RAGConfig.EMBEDDING_DIMENSIONS != migration.dimensions:
+            raise CommandError(
+                f'RAG_EMBEDDING_MODEL={migration.target_model} ve RAG_EMBEDDING_DIM={migration.dimensions} '
+                f'ile deploy edildikten sonra çalıştırın'
+            )
+        unflipped = Robot.objects.exclude(embedding_model=migration.target_model).count()
+        if unflipped:
+            raise CommandError(f'{unflipped} robot henüz çevrilmedi (--flip --all-ready)')
+        pending = sum(self.pending_counts().values())
+        if pending:
+            raise CommandError(f'{pending} satırın gölge kolonu boş (önce --backfill)')
+
+        dims = migration.dimensions
+        # > 2000 boyutta vector HNSW kurulamaz; gölge indeksi halfvec ifadesidir
+        renamed_encoding = 'halfvec' if dims > HNSW_MAX_DIMENSIONS else 'full'
+
+        with transaction.atomic():
+            with connection.cursor() as cursor:
+                # Eski kolonun indeksleri kolonla birlikte düşer; yeniden adlandırma anlık
+                cursor.execute("ALTER TABLE pdf_chunks DROP COLUMN embedding")
+                cursor.execute(f"ALTER TABLE pdf_chunks RENAME COLUMN {SHADOW_EMBEDDING_COLUMN} TO embedding")
+                cursor.execute(f"ALTER INDEX {SHADOW_INDEX_NAME} RENAME TO {VECTOR_ENCODING_INDEXES[renamed_encoding][0]}")
+
+            if renamed_encoding == 'halfvec':
+                Robot.objects.filter(vector_encoding='full').update(vector_encoding='halfvec')
+            Robot.objects.update(embedding_model='', context_version=F('context_version') + 1)
+
+            migration.status = 'completed'
+            migration.completed_at = timezone.now()
+            migration.save(update_fields=['status', 'completed_at'])
+
+        # Kullanımdaki diğer kodlamaların indeksleri yeni kolon üzerinde yeniden kurulur
+        in_use = set(Robot.objects.values_list('vector_encoding', flat=True).distinct()) - {renamed_encoding}
+        with connection.cursor() as cursor:
+            for encoding in sorted(in_use):
+                self.stdout.write(f'  ⚡ {VECTOR_ENCODING_INDEXES[encoding][0]} yeniden kuruluyor...')
+                cursor.execute(vector_index_ddl(encoding, dims=dims, concurrently=True))
+
+        self.stdout.write(self.style.SUCCESS(f'✅ Geçiş tamamlandı: {migration.target_model} ({dims} boyut)'))
+        logger.info(f"Embedding geçişi tamamlandı: {migration.source_model} -> {migration.target_model}")
+
+    def abort(self):
+        migration = self.get_migration()
+
+        with transaction.atomic():
+            # Tüm robotlar: cache'lenmiş geçiş durumu da düşsün
+            Robot.objects.update(embedding_model='', context_version=F('context_version') + 1)
+            migration.status = 'aborted'
+            migration.completed_at = timezone.now()
+            migration.save(update_fields=['status', 'completed_at'])
+            with connection.cursor() as cursor:
+                cursor.execute(f"ALTER TABLE pdf_chunks DROP COLUMN IF EXISTS {SHADOW_EMBEDDING_COLUMN}")
+
+        self.stdout.write(self.style.SUCCESS(f'🗑️ Geçiş iptal edildi, okumalar {migration.source_model} modelinde'))
+
+    def show_status(self):
+        self.stdout.write(self.style.NOTICE('\n📊 Embedding model durumu'))
+        self.stdout.write(f'  🧠 Aktif model: {RAGConfig.EMBEDDING_MODEL} ({RAGConfig.EMBEDDING_DIMENSIONS} boyut)')
+
+        migration = EmbeddingMigration.get_active()
+        if migration is None:
+            self.stdout.write('  ✅ Devam eden geçiş yok')
+            return
+
+        pending = self.pending_counts()
+        with connection.cursor() as cursor:
+            cursor.execute("SELECT robot_id, COUNT(*) FROM pdf_chunks GROUP BY robot_id")
+            totals = dict(cursor.fetchall())
+
+        self.stdout.write(
+            f'  🔄 {migration.source_model} -> {migration.target_model} ({migration.dimensions} boyut), '
+            f'doldurulan: {migration.rows_done}, bekleyen: {sum(pending.values())}'
+        )
+        for robot in Robot.objects.order_by('id').only('id', 'name', 'embedding_model'):
+            total = totals.get(robot.id, 0)
+            done = total - pending.get(robot.id, 0)
+            state = 'çevrildi' if robot.embedding_model == migration.target_model else (
+                'hazır' if done == total else 'dolduruluyor'
+            )
+            self.stdout.write(f'  🤖 {robot.id:>4} {robot.name:<30} {done}/{total} {state}')
@@ -1,6 +1,7 @@
 from django.core.management.base import BaseCommand
 from robots.models import RobotPDF
-from robots.services import download_pdf_content_from_drive, extract_text_from_pdf_stream
+from robots.services import download_pdf_content_from_drive
+from robots.pdf_text import extract_text_from_pdf_stream, PDF_EXTRACT_WORKERS
 import logging
 
 logger = logging.getLogger(__name__)
@@ -8,7 +9,16 @@ logger = logging.getLogger(__name__)
 class Command(BaseCommand):
     help = 'Mevcut RobotPDF nesnelerinin boş olan pdf_icerigi alanlarını Google Drive dan okuyarak doldurur.'
 
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--workers',
+            type=int,
+            default=None,
+            help='Sayfa paralel metin çıkarma için process sayısı (varsayılan: CPU sayısı)'
+        )
+
     def handle(self, *args, **options):
+        workers = options.get('workers') or PDF_EXTRACT_WORKERS
         self.stdout.write(self.style.NOTICE('🤖 PDF içerik doldurma işlemi başlıyor...'))
 
         # Sadece pdf_icerigi boş olan ve gdrive_file_id'si olan PDF'leri al
@@ -28,7 +38,7 @@ class Command(BaseCommand):
             try:
                 pdf_stream = download_pdf_content_from_drive(pdf.gdrive_file_id)
                 if pdf_stream:
-                    content = extract_text_from_pdf_stream(pdf_stream)
+                    content = extract_text_from_pdf_stream(pdf_stream, max_workers=workers)
                     if content:
                         pdf.pdf_icerigi = content
                         pdf.save(update_fields=['pdf_icerigi'])
@@ -0,0 +1,161 @@
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from robots.models import Robot, default_vector_encoding
+from robots.rag_config import RAGConfig
+from robots.vector_stores import VECTOR_ENCODING_INDEXES, vector_index_ddl
+import logging
+
+logger = logging.getLogger(__name__)
+
+
+class Command(BaseCommand):
+    help = (
+        'Robotların kNN aramasını halfvec / binary quantize HNSW indeksine geçirir '
+        '(tam hassasiyetli yeniden sıralama ile). Mevcut satırlar indeks kurulurken dönüştürülür. '
+        'İndeksler tablo geneli ifade indeksleridir: bellek kazancı ancak tüm robotlar (--all) '
+        've yeni robotlar (RAG_VECTOR_ENCODING) aynı kodlamaya geçip eski indeks --drop-unused '
+        'ile kaldırıldığında oluşur. --robot-id ile kısmi geçiş yalnızca --staged ile yapılır.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--encoding',
+            choices=list(VECTOR_ENCODING_INDEXES),
+            help='Hedef kodlama (full / halfvec / binary)'
+        )
+        parser.add_argument(
+            '--robot-id',
+            type=int,
+            action='append',
+            dest='robot_ids',
+            help='Geçirilecek robot ID (birden çok verilebilir, --staged gerektirir)'
+        )
+        parser.add_argument(
+            '--all',
+            action='store_true',
+            help='Tüm robotları geçir'
+        )
+        parser.add_argument(
+            '--staged',
+            action='store_true',
+            help='Kısmi geçişe izin ver (geçiş süresince iki indeks birlikte tutulur, bellek artar)'
+        )
+        parser.add_argument(
+            '--drop-unused',
+            action='store_true',
+            help='Hiçbir robotun ve yeni robot varsayılanının kullanmadığı kodlamaların HNSW indekslerini kaldır'
+        )
+        parser.add_argument(
+            '--status',
+            action='store_true',
+            help='Robot kodlamalarını, gereken indeksleri ve indeks boyutlarını göster'
+        )
+
+    def handle(self, *args, **options):
+        encoding = options.get('encoding')
+        robot_ids = options.get('robot_ids')
+
+        if encoding:
+            if not robot_ids and not options['all']:
+                raise CommandError('--robot-id veya --all verilmeli')
+            if robot_ids and not options['all'] and not options['staged']:
+                raise CommandError(
+                    'İndeksler tablo geneli olduğundan kısmi geçiş bellek kazandırmaz; '
+                    'tüm robotlar için --all kullanın ya da kademeli geçiş için --staged ekleyin'
+                )
+            self.convert(encoding, None if options['all'] else robot_ids)
+
+        if options['drop_unused']:
+            self.drop_unused_indexes()
+
+        if options['status'] or not (encoding or options['drop_unused']):
+            self.show_status()
+
+    def needed_encodings(self):
+        """Kodlama -> onu kullanan robot ID'leri; yeni robotların varsayılan kodlaması da gerekli sayılır"""
+        needed = {default_vector_encoding(): []}
+        for robot_id, encoding in Robot.objects.order_by('id').values_list('id', 'vector_encoding'):
+            needed.setdefault(encoding, []).append(robot_id)
+        return needed
+
+    def convert(self, encoding, robot_ids):
+        index_name = VECTOR_ENCODING_INDEXES[encoding][0]
+        self.stdout.write(self.style.NOTICE(f'⚡ {index_name} hazırlanıyor ({encoding}, {RAGConfig.EMBEDDING_DIMENSIONS} boyut)...'))
+
+        # CONCURRENTLY: tablo yazmaya açık kalır; kurulum sırasında tüm satırlar quantize edilir
+        with connection.cursor() as cursor:
+            cursor.execute(vector_index_ddl(encoding, concurrently=True))
+
+        robots = Robot.objects.all()
+        if robot_ids:
+            robots = robots.filter(id__in=robot_ids)
+
+        # İndeks hazır olduktan sonra okumalar robot bazında yeni kodlamaya geçer
+        updated = robots.exclude(vector_encoding=encoding).update(vector_encoding=encoding)
+        self.stdout.write(self.style.SUCCESS(f'✅ {updated} robot {encoding} kodlamasına geçirildi'))
+        logger.info(f"Vektör kodlaması güncellendi: {encoding}, robot sayısı: {updated}")
+
+        # Bellek kazancı yalnızca eski indekse ihtiyaç kalmadığında vardır
+        remaining = {
+            other: ids for other, ids in self.needed_encodings().items()
+            if other != encoding and ids
+        }
+        if remaining:
+            summary = ', '.join(f'{other}: {len(ids)} robot' for other, ids in remaining.items())
+            self.stdout.write(self.style.WARNING(
+                f'⚠️ Kademeli geçiş: {summary} hâlâ eski indeksleri kullanıyor; '
+                f'{index_name} bunlara ek olarak tutulur (bellek kazancı yok)'
+            ))
+        elif default_vector_encoding() != encoding:
+            self.stdout.write(self.style.WARNING(
+                f'⚠️ Yeni robotlar {default_vector_encoding()} ile oluşturulur; eski indeks kaldırılmadan önce '
+                f'RAG_VECTOR_ENCODING={encoding} ayarlanmalı'
+            ))
+        else:
+            self.stdout.write(self.style.SUCCESS(
+                '💾 Tüm robotlar geçirildi; kullanılmayan indeksler --drop-unused ile kaldırılabilir'
+            ))
+
+    def drop_unused_indexes(self):
+        needed = self.needed_encodings()
+
+        with connection.cursor() as cursor:
+            for encoding, (index_name, _, _) in VECTOR_ENCODING_INDEXES.items():
+                if encoding in needed:
+                    continue
+                cursor.execute(f"DROP INDEX CONCURRENTLY IF EXISTS {index_name}")
+                self.stdout.write(f'  🗑️ Kullanılmayan indeks kaldırıldı: {index_name} ({encoding})')
+
+    def show_status(self):
+        self.stdout.write(self.style.NOTICE('\n📊 Vektör kodlama durumu'))
+
+        for robot in Robot.objects.order_by('id').only('id', 'name', 'vector_encoding'):
+            self.stdout.write(f'  🤖 {robot.id:>4} {robot.name:<30} {robot.vector_encoding}')
+
+        index_names = [index_name for index_name, _, _ in VECTOR_ENCODING_INDEXES.values()]
+        with connection.cursor() as cursor:
+            cursor.execute("""
+                SELECT c.relname, pg_relation_size(c.oid)
+                FROM pg_class c
+                WHERE c.relkind = 'i' AND c.relname = ANY(%s)
+            """, [index_names])
+            sizes = dict(cursor.fetchall())
+
+        needed = self.needed_encodings()
+        default_encoding = default_vector_encoding()
+        for encoding, (index_name, _, _) in VECTOR_ENCODING_INDEXES.items():
+            size = sizes.get(index_name)
+            label = f'{size / (1024 * 1024):.1f} MB' if size is not None else 'yok'
+            self.stdout.write(f'  🗂️ {encoding:<8} {index_name:<36} {label}')
+
+            # Her indeks tablo genelidir; tek bir robot bile kullanıyorsa tamamı gerekir
+            users = []
+            if needed.get(encoding):
+                users.append('robot ' + ', '.join(str(robot_id) for robot_id in needed[encoding]))
+            if encoding == default_encoding:
+                users.append('yeni robotlar (varsayılan kodlama)')
+            if users:
+                missing = ' ⚠️ indeks eksik, aramalar sıralı taramaya düşer' if size is None else ''
+                self.stdout.write(f'       gerekli: {"; ".join(users)}{missing}')
+            elif size is not None:
+                self.stdout.write('       gereksiz: --drop-unused ile kaldırılabilir')
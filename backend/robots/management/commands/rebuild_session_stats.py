@@ -0,0 +1,59 @@
+from django.core.management.base import BaseCommand
+from django.db import connection
+from django.db.models import Max
+from robots.models import ChatSession, ChatMessage
+import logging
+
+logger = logging.getLogger(__name__)
+
+
+class Command(BaseCommand):
+    help = (
+        'ChatSession istatistiklerini (toplam mesaj, toplam/ortalama yanıt süresi) mesajlardan '
+        'toplu olarak yeniden hesaplar. Yalnızca değeri farklı olan oturumlar güncellenir.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--robot-id', type=int, help='Yalnızca bu robotun oturumları')
+        parser.add_argument('--batch-size', type=int, default=5000, help='Tek UPDATE ile işlenecek oturum ID aralığı')
+
+    def handle(self, *args, **options):
+        robot_id = options.get('robot_id')
+        batch_size = options['batch_size']
+        max_id = ChatSession.objects.aggregate(max_id=Max('id'))['max_id'] or 0
+
+        session_table = ChatSession._meta.db_table
+        message_table = ChatMessage._meta.db_table
+        repaired = 0
+
+        # ID aralıklarıyla ilerle: her UPDATE kısa sürer, canlı yazmaları uzun kilitlemez
+        for start in range(0, max_id + 1, batch_size):
+            with connection.cursor() as cursor:
+                cursor.execute(f"""
+                    WITH stats AS (
+                        SELECT s.id,
+                               COUNT(m.id) AS total_messages,
+                               COALESCE(SUM(m.response_time), 0) AS total_response_time
+                        FROM {session_table} s
+                        LEFT JOIN {message_table} m
+                               ON m.session_id = s.id AND m.status <> 'processing'
+                        WHERE s.id >= %(start)s AND s.id < %(end)s
+                          AND (%(robot_id)s::integer IS NULL OR s.robot_id = %(robot_id)s)
+                        GROUP BY s.id
+                    )
+                    UPDATE {session_table} s
+                    SET total_messages = stats.total_messages,
+                        total_response_time = stats.total_response_time,
+                        average_response_time = CASE
+                            WHEN stats.total_messages > 0 THEN stats.total_response_time / stats.total_messages
+                            ELSE 0
+                        END
+                    FROM stats
+                    WHERE s.id = stats.id
+                      AND (s.total_messages, s.total_response_time)
+                          IS DISTINCT FROM (stats.total_messages, stats.total_response_time)
+                """, {'start': start, 'end': start + batch_size, 'robot_id': robot_id})
+                repaired += cursor.rowcount
+
+        self.stdout.write(self.style.SUCCESS(f'✅ {repaired} oturumun istatistikleri düzeltildi'))
+        logger.info(f"Oturum istatistikleri yeniden hesaplandı: {repaired} oturum")
@@ -0,0 +1,41 @@
+from datetime import timedelta
+from django.core.management.base import BaseCommand
+from django.db.models import Sum
+from django.utils import timezone
+from robots.models import Brand, BrandUsageBucket
+from robots.quota import reconcile_brand_usage, get_brand_usage
+import logging
+
+logger = logging.getLogger(__name__)
+
+
+class Command(BaseCommand):
+    help = (
+        'Marka kullanım defterindeki uzlaştırılmamış istekleri Brand.total_api_requests alanına taşır. '
+        'Periyodik (ör. dakikada bir cron) çalıştırılması önerilir.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--brand-id', type=int, help='Yalnızca bu markayı uzlaştır')
+        parser.add_argument('--status', action='store_true', help='Markaların kesin kullanımını ve son 24 saati göster')
+
+    def handle(self, *args, **options):
+        moved = reconcile_brand_usage(options.get('brand_id'))
+        total = sum(moved.values())
+        self.stdout.write(self.style.SUCCESS(f'🧾 {total} istek {len(moved)} markada uzlaştırıldı'))
+
+        if options['status']:
+            self.show_status()
+
+    def show_status(self):
+        self.stdout.write(self.style.NOTICE('\n📊 Marka kullanımı'))
+        since = timezone.now() - timedelta(hours=24)
+        last_day = dict(
+            BrandUsageBucket.objects.filter(bucket__gte=since)
+            .values_list('brand_id')
+            .annotate(total=Sum('count'))
+        )
+
+        for brand in Brand.objects.order_by('name').only('id', 'name'):
+            used, limit = get_brand_usage(brand.id)
+            self.stdout.write(f'  🏷️ {brand.name:<25} {used}/{limit}  son 24 saat: {last_day.get(brand.id, 0)}')
@@ -0,0 +1,83 @@
+from django.core.management.base import BaseCommand
+from django.db import close_old_connections
+from robots.ingestion_services import claim_next_job, run_job, get_worker_id
+from robots.rag_services import RAGService
+from robots.quota import reconcile_brand_usage
+import logging
+import os
+import time
+
+logger = logging.getLogger(__name__)
+
+
+class Command(BaseCommand):
+    help = 'PDF ingestion kuyruğunu işleyen arka plan worker\'ı (store -> extract -> chunk -> embed -> index)'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--once',
+            action='store_true',
+            help='Kuyrukta bekleyen işleri bitir ve çık'
+        )
+        parser.add_argument(
+            '--sleep',
+            type=float,
+            default=5.0,
+            help='Kuyruk boşken bekleme süresi (saniye)'
+        )
+        parser.add_argument(
+            '--reconcile-interval',
+            type=float,
+            default=float(os.getenv('BRAND_USAGE_RECONCILE_INTERVAL', '60')),
+            help='Marka kullanım defterini uzlaştırma aralığı (saniye, 0 = kapalı)'
+        )
+
+    def handle(self, *args, **options):
+        once = options.get('once', False)
+        sleep_seconds = options['sleep']
+        reconcile_interval = options['reconcile_interval']
+        next_reconcile = 0.0
+        worker_id = get_worker_id()
+
+        self.stdout.write(self.style.NOTICE(f'🛠️ PDF ingestion worker başladı ({worker_id})'))
+
+        # Embedding modeli worker ömrü boyunca bir kez yüklenir
+        rag_service = RAGService()
+        processed = 0
+
+        while True:
+            close_old_connections()
+
+            # Kota defteri total_api_requests'e worker üzerinden periyodik taşınır
+            if reconcile_interval and time.monotonic() >= next_reconcile:
+                next_reconcile = time.monotonic() + reconcile_interval
+                try:
+                    reconcile_brand_usage()
+                except Exception as e:
+                    logger.error(f"Marka kullanımı uzlaştırılamadı: {e}")
+
+            job = claim_next_job(worker_id)
+
+            if job is None:
+                if once:
+                    break
+                time.sleep(sleep_seconds)
+                continue
+
+            self.stdout.write(f"  📄 İşleniyor: Job {job.id} - '{job.file_name}' (Aşama: {job.stage})")
+            try:
+                job = run_job(job, rag_service)
+            except Exception as e:
+                # run_job aşama hatalarını kendisi ele alır; buraya gelen beklenmedik hatadır
+                logger.error(f"Ingestion worker hatası (Job {job.id}): {e}")
+                continue
+
+            processed += 1
+            if job.status == 'completed':
+                self.stdout.write(self.style.SUCCESS(f"    ✅ Tamamlandı: PDF ID {job.robot_pdf_id}"))
+            elif job.status == 'queued':
+                self.stdout.write(self.style.WARNING(f"    🔁 Yeniden denenecek: {job.last_error}"))
+            else:
+                self.stdout.write(self.style.ERROR(f"    ❌ Başarısız: {job.last_error}"))
+
+        self.stdout.write(self.style.SUCCESS(f'🎉 Worker durdu. İşlenen iş: {processed}'))
@@ -1,5 +1,7 @@
 from django.core.management.base import BaseCommand
 from django.db import connection
+from robots.rag_config import RAGConfig
+from robots.vector_stores import HNSW_MAX_DIMENSIONS, HALFVEC_HNSW_MAX_DIMENSIONS, vector_index_ddl
 import logging
 
 logger = logging.getLogger(__name__)
@@ -14,6 +16,33 @@ class Command(BaseCommand):
             help='Mevcut tablolar varsa zorla yeniden oluştur'
         )
 
+    def _create_cosine_index(self, cursor):
+        """
+        Cosine HNSW indeksi. `vector` HNSW en fazla 2000 boyut indeksler; üstünde
+        halfvec ifade indeksi kurulur (robotlar vector_encoding='halfvec' ile arar),
+        4000 boyutun üstünde indeks atlanır. Hata kurulumun geri kalanını durdurmaz.
+        """
+        dims = RAGConfig.EMBEDDING_DIMENSIONS
+        if dims <= HNSW_MAX_DIMENSIONS:
+            encoding = 'full'
+        elif dims <= HALFVEC_HNSW_MAX_DIMENSIONS:
+            encoding = 'halfvec'
+            self.stdout.write(self.style.WARNING(
+                f'⚠️ {dims} boyut vector HNSW sınırının ({HNSW_MAX_DIMENSIONS}) üstünde; '
+                f"halfvec indeksi kuruluyor, robotlar vector_encoding='halfvec' kullanmalı"
+            ))
+        else:
+            self.stdout.write(self.style.WARNING(
+                f'⚠️ {dims} boyut HNSW ile indekslenemiyor; cosine indeksi atlandı (sıralı tarama)'
+            ))
+            return
+
+        try:
+            cursor.execute(vector_index_ddl(encoding, dims, concurrently=False))
+        except Exception as e:
+            self.stdout.write(self.style.WARNING(f'⚠️ Cosine HNSW indeksi oluşturulamadı: {e}'))
+            logger.warning(f"pgvector cosine indeks hatası: {e}")
+
     def handle(self, *args, **options):
         force = options.get('force', False)
         
@@ -31,33 +60,63 @@ class Command(BaseCommand):
                 if force:
                     cursor.execute("DROP TABLE IF EXISTS pdf_chunks CASCADE;")
                 
-                cursor.execute("""
+                # Boyut modele bağlı (RAG_EMBEDDING_DIM); model değişimi için migrate_embedding_model
+                cursor.execute(f"""
                     CREATE TABLE IF NOT EXISTS pdf_chunks (
                         id SERIAL PRIMARY KEY,
                         robot_pdf_id INTEGER NOT NULL,
                         chunk_text TEXT NOT NULL,
                         chunk_index INTEGER NOT NULL,
-                        embedding vector(384),
-                        metadata JSONB DEFAULT '{}',
+                        embedding vector({RAGConfig.EMBEDDING_DIMENSIONS}),
+                        metadata JSONB DEFAULT '{{}}',
                         created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
                         updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
                         FOREIGN KEY (robot_pdf_id) REFERENCES robots_robotpdf(id) ON DELETE CASCADE
                     );
                 """)
                 
+                # Artımlı yeniden chunklama için içerik hash'i
+                cursor.execute("""
+                    ALTER TABLE pdf_chunks ADD COLUMN IF NOT EXISTS content_hash VARCHAR(64);
+                """)
+                
+                # Robot filtreli kNN için denormalize robot_id (robot_pdf üzerinden doldurulur)
+                cursor.execute("""
+                    ALTER TABLE pdf_chunks ADD COLUMN IF NOT EXISTS robot_id INTEGER;
+                """)
+                cursor.execute("""
+                    UPDATE pdf_chunks pc
+                    SET robot_id = rp.robot_id
+                    FROM robots_robotpdf rp
+                    WHERE pc.robot_pdf_id = rp.id
+                      AND pc.robot_id IS DISTINCT FROM rp.robot_id;
+                """)
+                
+                # İçerik adresli embedding deposu (metin hash'i + model -> vektör)
+                # Aynı metin (senaryolar, robotlar arası tekrar eden beyanlar) bir kez encode edilir
+                cursor.execute("""
+                    CREATE TABLE IF NOT EXISTS embedding_store (
+                        text_hash CHAR(64) NOT NULL,
+                        model_name VARCHAR(255) NOT NULL,
+                        embedding vector NOT NULL,
+                        created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+                        PRIMARY KEY (text_hash, model_name)
+                    );
+                """)
+                
                 # Performans için indeksler oluştur
                 self.stdout.write('⚡ Vektör indeksleri oluşturuluyor...')
                 
                 # HNSW indeksi (cosine distance için)
-                cursor.execute("""
-                    CREATE INDEX IF NOT EXISTS pdf_chunks_embedding_cosine_idx 
-                    ON pdf_chunks USING hnsw (embedding vector_cosine_ops);
-                """)
+                self._create_cosine_index(cursor)
+                
+                # L2 HNSW indeksi hiçbir sorguda kullanılmıyordu (tüm aramalar cosine)
+                cursor.execute("DROP INDEX IF EXISTS pdf_chunks_embedding_l2_idx;")
                 
-                # HNSW indeksi (L2 distance için)
+                # Robot filtresi için indeks
                 cursor.execute("""
-                    CREATE INDEX IF NOT EXISTS pdf_chunks_embedding_l2_idx 
-                    ON pdf_chunks USING hnsw (embedding vector_l2_ops);
+                    CREATE INDEX IF NOT EXISTS pdf_chunks_robot_id_idx 
+                    ON pdf_chunks (robot_id);
                 """)
                 
                 # Robot PDF ID için indeks
@@ -66,6 +125,12 @@ class Command(BaseCommand):
                     ON pdf_chunks (robot_pdf_id);
                 """)
                 
+                # PDF + içerik hash'i için indeks (chunk diff sorgusu)
+                cursor.execute("""
+                    CREATE INDEX IF NOT EXISTS pdf_chunks_pdf_hash_idx 
+                    ON pdf_chunks (robot_pdf_id, content_hash);
+                """)
+                
                 # Metadata için GIN indeks
                 cursor.execute("""
                     CREATE INDEX IF NOT EXISTS pdf_chunks_metadata_idx 
@@ -107,13 +172,47 @@ class Command(BaseCommand):
                         EXECUTE FUNCTION update_pdf_chunks_updated_at();
                 """)
                 
-                # Hibrit similarity search fonksiyonu oluştur (vector + text)
+                # Eski imzalı arama fonksiyonlarını kaldır (robot filtresi eklenince overload belirsizliği olmasın)
+                cursor.execute("""
+                    DROP FUNCTION IF EXISTS search_similar_chunks(vector, integer[], integer, float);
+                    DROP FUNCTION IF EXISTS search_fuzzy_chunks(text, integer[], integer, float);
+                    DROP FUNCTION IF EXISTS search_hybrid_chunks(
+                        vector, text, integer[], integer, float, float, integer, float, float, integer
+                    );
+                """)
+                
+                # HNSW tarama ayarları (transaction'a yerel). iterative_scan pgvector >= 0.8 ister;
+                # eski sürümlerde sessizce atlanır ve yalnızca ef_search uygulanır.
+                cursor.execute("""
+                    CREATE OR REPLACE FUNCTION configure_hnsw_scan(
+                        ef_search integer,
+                        iterative_scan text DEFAULT 'relaxed_order'
+                    )
+                    RETURNS void AS $$
+                    BEGIN
+                        PERFORM set_config('hnsw.ef_search', ef_search::text, true);
+                        IF iterative_scan IS NOT NULL AND iterative_scan <> 'off' THEN
+                            BEGIN
+                                PERFORM set_config('hnsw.iterative_scan', iterative_scan, true);
+                            EXCEPTION WHEN others THEN
+                                NULL;
+                            END;
+                        END IF;
+                    END;
+                    $$ LANGUAGE plpgsql;
+                """)
+                
+                # Robot filtreli vektör araması: robot_id indeks taramasında filtrelenir,
+                # iterative scan filtre yüzünden eksik kalan sonuçları taramaya devam ederek tamamlar
                 cursor.execute("""
                     CREATE OR REPLACE FUNCTION search_similar_chunks(
-                        query_embedding vector(384),
+                        query_embedding vector,
+                        filter_robot_id integer DEFAULT NULL,
                         robot_pdf_ids integer[] DEFAULT NULL,
                         limit_count integer DEFAULT 5,
-                        similarity_threshold float DEFAULT 0.7
+                        similarity_threshold float DEFAULT 0.7,
+                        ef_search integer DEFAULT 100,
+                        iterative_scan text DEFAULT 'relaxed_order'
                     )
                     RETURNS TABLE(
                         id integer,
@@ -124,21 +223,30 @@ class Command(BaseCommand):
                         metadata jsonb
                     ) AS $$
                     BEGIN
+                        PERFORM configure_hnsw_scan(ef_search, iterative_scan);
+                        
                         RETURN QUERY
+                        WITH candidates AS MATERIALIZED (
+                            SELECT pc.id AS chunk_id, (pc.embedding <=> query_embedding) AS distance
+                            FROM pdf_chunks pc
+                            WHERE 
+                                (filter_robot_id IS NULL OR pc.robot_id = filter_robot_id)
+                                AND (robot_pdf_ids IS NULL OR pc.robot_pdf_id = ANY(robot_pdf_ids))
+                            ORDER BY pc.embedding <=> query_embedding
+                            LIMIT limit_count
+                        )
                         SELECT 
                             pc.id,
                             pc.robot_pdf_id,
                             pc.chunk_text,
                             pc.chunk_index,
-                            (1 - (pc.embedding <=> query_embedding))::float as similarity,
+                            (1 - c.distance)::float as similarity,
                             pc.metadata
-                        FROM pdf_chunks pc
-                        WHERE 
-                            (robot_pdf_ids IS NULL OR pc.robot_pdf_id = ANY(robot_pdf_ids))
-                            AND (1 - (pc.embedding <=> query_embedding)) >= similarity_threshold
-                        ORDER BY 
-                            (1 - (pc.embedding <=> query_embedding)) DESC
-                        LIMIT limit_count;
+                        FROM candidates c
+                        JOIN pdf_chunks pc ON pc.id = c.chunk_id
+                        WHERE (1 - c.distance) >= similarity_threshold
+                        -- relaxed_order sonuçları tam sıralı olmayabilir; burada yeniden sıralanır
+                        ORDER BY c.distance;
                     END;
                     $$ LANGUAGE plpgsql;
                 """)
@@ -147,6 +255,7 @@ class Command(BaseCommand):
                 cursor.execute("""
                     CREATE OR REPLACE FUNCTION search_fuzzy_chunks(
                         search_term text,
+                        filter_robot_id integer DEFAULT NULL,
                         robot_pdf_ids integer[] DEFAULT NULL,
                         limit_count integer DEFAULT 10,
                         similarity_threshold float DEFAULT 0.3
@@ -170,7 +279,8 @@ class Command(BaseCommand):
                             pc.metadata
                         FROM pdf_chunks pc
                         WHERE 
-                            (robot_pdf_ids IS NULL OR pc.robot_pdf_id = ANY(robot_pdf_ids))
+                            (filter_robot_id IS NULL OR pc.robot_id = filter_robot_id)
+                            AND (robot_pdf_ids IS NULL OR pc.robot_pdf_id = ANY(robot_pdf_ids))
                             AND similarity(lower(pc.chunk_text), lower(search_term)) >= similarity_threshold
                         ORDER BY 
                             similarity(lower(pc.chunk_text), lower(search_term)) DESC
@@ -178,6 +288,99 @@ class Command(BaseCommand):
                     END;
                     $$ LANGUAGE plpgsql;
                 """)
+                
+                # Hibrit arama: vektör kNN + trigram tek sorguda, reciprocal-rank fusion ile birleşir
+                cursor.execute("""
+                    CREATE OR REPLACE FUNCTION search_hybrid_chunks(
+                        query_embedding vector,
+                        search_term text,
+                        filter_robot_id integer DEFAULT NULL,
+                        robot_pdf_ids integer[] DEFAULT NULL,
+                        limit_count integer DEFAULT 5,
+                        similarity_threshold float DEFAULT 0.2,
+                        text_threshold float DEFAULT 0.2,
+                        candidate_count integer DEFAULT 20,
+                        vector_weight float DEFAULT 1.0,
+                        text_weight float DEFAULT 1.0,
+                        rrf_k integer DEFAULT 60,
+                        ef_search integer DEFAULT 100,
+                        iterative_scan text DEFAULT 'relaxed_order'
+                    )
+                    RETURNS TABLE(
+                        id integer,
+                        robot_pdf_id integer,
+                        chunk_text text,
+                        chunk_index integer,
+                        similarity float,
+                        vector_similarity float,
+                        text_similarity float,
+                        rrf_score float,
+                        metadata jsonb
+                    ) AS $$
+                    BEGIN
+                        PERFORM configure_hnsw_scan(ef_search, iterative_scan);
+                        
+                        RETURN QUERY
+                        WITH vector_candidates AS MATERIALIZED (
+                            SELECT pc.id AS chunk_id, (pc.embedding <=> query_embedding) AS distance
+                            FROM pdf_chunks pc
+                            WHERE 
+                                (filter_robot_id IS NULL OR pc.robot_id = filter_robot_id)
+                                AND (robot_pdf_ids IS NULL OR pc.robot_pdf_id = ANY(robot_pdf_ids))
+                            ORDER BY pc.embedding <=> query_embedding
+                            LIMIT candidate_count
+                        ),
+                        vector_hits AS (
+                            SELECT 
+                                vc.chunk_id,
+                                (1 - vc.distance)::float AS score,
+                                row_number() OVER (ORDER BY vc.distance) AS rank
+                            FROM vector_candidates vc
+                            WHERE (1 - vc.distance) >= similarity_threshold
+                        ),
+                        text_hits AS (
+                            SELECT 
+                                tc.chunk_id,
+                                tc.score,
+                                row_number() OVER (ORDER BY tc.score DESC) AS rank
+                            FROM (
+                                SELECT pc.id AS chunk_id, similarity(lower(pc.chunk_text), lower(search_term))::float AS score
+                                FROM pdf_chunks pc
+                                WHERE 
+                                    (filter_robot_id IS NULL OR pc.robot_id = filter_robot_id)
+                                    AND (robot_pdf_ids IS NULL OR pc.robot_pdf_id = ANY(robot_pdf_ids))
+                                    AND similarity(lower(pc.chunk_text), lower(search_term)) >= text_threshold
+                                ORDER BY similarity(lower(pc.chunk_text), lower(search_term)) DESC
+                                LIMIT candidate_count
+                            ) tc
+                        ),
+                        fused AS (
+                            SELECT 
+                                COALESCE(vh.chunk_id, th.chunk_id) AS chunk_id,
+                                vh.score AS vector_score,
+                                th.score AS text_score,
+                                (COALESCE(vector_weight / (rrf_k + vh.rank), 0)
+                                    + COALESCE(text_weight / (rrf_k + th.rank), 0))::float AS fused_score
+                            FROM vector_hits vh
+                            FULL OUTER JOIN text_hits th ON th.chunk_id = vh.chunk_id
+                        )
+                        SELECT 
+                            pc.id,
+                            pc.robot_pdf_id,
+                            pc.chunk_text,
+                            pc.chunk_index,
+                            COALESCE(f.vector_score, f.text_score) AS similarity,
+                            f.vector_score AS vector_similarity,
+                            f.text_score AS text_similarity,
+                            f.fused_score AS rrf_score,
+                            pc.metadata
+                        FROM fused f
+                        JOIN pdf_chunks pc ON pc.id = f.chunk_id
+                        ORDER BY f.fused_score DESC, pc.id
+                        LIMIT limit_count;
+                    END;
+                    $$ LANGUAGE plpgsql;
+                """)
 
         except Exception as e:
             self.stdout.write(
@@ -0,0 +1,51 @@
+# Generated migration for background PDF ingestion jobs
+import django.db.models.deletion
+import django.utils.timezone
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('robots', '0026_add_custom_messages'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='PDFIngestionJob',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('file_name', models.CharField(max_length=200, verbose_name='Dosya Adı')),
+                ('content_type', models.CharField(default='application/pdf', max_length=100, verbose_name='İçerik Türü')),
+                ('file_data', models.BinaryField(blank=True, null=True, verbose_name='Dosya İçeriği')),
+                ('pdf_type', models.CharField(choices=[('bilgi', 'Bilgi'), ('kural', 'Kural'), ('rol', 'Rol'), ('beyan', 'Beyan')], default='bilgi', max_length=10, verbose_name='PDF Türü')),
+                ('aciklama', models.TextField(blank=True, default='', verbose_name='Açıklama')),
+                ('status', models.CharField(choices=[('queued', 'Sırada'), ('running', 'Çalışıyor'), ('completed', 'Tamamlandı'), ('failed', 'Başarısız')], default='queued', max_length=15, verbose_name='Durum')),
+                ('stage', models.CharField(choices=[('store', 'Depolama (Drive + Supabase)'), ('extract', 'Metin Çıkarma'), ('chunk', 'Chunklama'), ('embed', 'Embedding'), ('index', 'İndeksleme'), ('done', 'Tamamlandı')], default='store', max_length=10, verbose_name='Aşama')),
+                ('stage_progress', models.JSONField(blank=True, default=dict, verbose_name='Aşama İlerlemesi')),
+                ('attempts', models.PositiveIntegerField(default=0, verbose_name='Deneme Sayısı')),
+                ('max_attempts', models.PositiveIntegerField(default=3, verbose_name='Maksimum Deneme')),
+                ('last_error', models.TextField(blank=True, null=True, verbose_name='Son Hata')),
+                ('next_attempt_at', models.DateTimeField(default=django.utils.timezone.now, verbose_name='Sonraki Deneme')),
+                ('locked_by', models.CharField(blank=True, max_length=100, null=True, verbose_name='Worker')),
+                ('locked_at', models.DateTimeField(blank=True, null=True, verbose_name='Kilit Zamanı')),
+                ('created_at', models.DateTimeField(auto_now_add=True, verbose_name='Oluşturulma Zamanı')),
+                ('updated_at', models.DateTimeField(auto_now=True, verbose_name='Güncellenme Zamanı')),
+                ('completed_at', models.DateTimeField(blank=True, null=True, verbose_name='Tamamlanma Zamanı')),
+                ('created_by', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='pdf_ingestion_jobs', to=settings.AUTH_USER_MODEL, verbose_name='Yükleyen')),
+                ('robot', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='ingestion_jobs', to='robots.robot', verbose_name='Robot')),
+                ('robot_pdf', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='ingestion_jobs', to='robots.robotpdf', verbose_name='Robot PDF')),
+            ],
+            options={
+                'verbose_name': 'PDF Ingestion İşi',
+                'verbose_name_plural': 'PDF Ingestion İşleri',
+                'ordering': ['-created_at'],
+                'indexes': [
+                    models.Index(fields=['status', 'next_attempt_at'], name='pdfjob_status_next_idx'),
+                    models.Index(fields=['robot', 'created_at'], name='pdfjob_robot_created_idx'),
+                ],
+            },
+        ),
+    ]
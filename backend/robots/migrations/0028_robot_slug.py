@@ -0,0 +1,60 @@
+# Generated migration for persisted, unique robot slugs
+import re
+
+from django.db import migrations, models
+
+
+def build_slug(name):
+    """Robot.build_slug() ile aynı kurallar (migration anındaki hali)"""
+    name = name.lower()
+    # Türkçe karakterleri değiştir
+    name = name.replace('ğ', 'g').replace('ü', 'u').replace('ş', 's')
+    name = name.replace('ı', 'i').replace('ö', 'o').replace('ç', 'c')
+    # Özel durumlar
+    if 'zzen' in name:
+        return 'zzen'
+    elif 'sidrexgpt asistani' in name:
+        return 'sidrexgpt-asistani'
+    elif 'mag' in name:
+        return 'sidrexgpt-mag'
+    elif 'kids' in name:
+        return 'sidrexgpt-kids'
+    elif 'dorduncu robot' in name:
+        return 'zzen'
+    # Genel durum
+    name = re.sub(r'[^a-z0-9\s]', '', name)
+    name = re.sub(r'\s+', '-', name.strip())
+    return name
+
+
+def backfill_slugs(apps, schema_editor):
+    Robot = apps.get_model('robots', 'Robot')
+    used = set()
+    # Eski çözümleme Robot.objects.all() sırasındaki ilk eşleşmeyi seçiyordu;
+    # aynı sırayla ilerleyerek o robota sade slug'ı veriyoruz.
+    for robot in Robot.objects.order_by('-yaratilma_zamani', 'id'):
+        base_slug = build_slug(robot.name) or 'robot'
+        slug = base_slug
+        suffix = 2
+        while slug in used:
+            slug = f"{base_slug}-{suffix}"
+            suffix += 1
+        used.add(slug)
+        robot.slug = slug
+        robot.save(update_fields=['slug'])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('robots', '0027_pdfingestionjob'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='robot',
+            name='slug',
+            field=models.SlugField(blank=True, help_text='Boş bırakılırsa robot isminden otomatik oluşturulur', max_length=100, null=True, unique=True, verbose_name='Slug'),
+        ),
+        migrations.RunPython(backfill_slugs, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,17 @@
+# Generated migration for versioned per-robot context bundles
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('robots', '0028_robot_slug'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='robot',
+            name='context_version',
+            field=models.PositiveIntegerField(default=0, editable=False, help_text='PDF veya prompt değiştiğinde artar; önbellekteki bağlam paketlerini geçersiz kılar', verbose_name='Bağlam Versiyonu'),
+        ),
+    ]
@@ -0,0 +1,17 @@
+# Generated migration for per-robot vector encoding (quantized kNN)
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('robots', '0029_robot_context_version'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='robot',
+            name='vector_encoding',
+            field=models.CharField(choices=[('full', 'Tam (vector, float32)'), ('halfvec', 'Yarım hassasiyet (halfvec, float16)'), ('binary', 'İkili (bit) + tam hassasiyetle yeniden sıralama')], default='full', help_text='kNN aramasında kullanılan HNSW indeksi; quantize_embeddings komutuyla değiştirilir', max_length=10, verbose_name='Vektör Kodlaması'),
+        ),
+    ]
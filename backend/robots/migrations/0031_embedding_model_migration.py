@@ -0,0 +1,35 @@
+# Generated migration for zero-downtime embedding model upgrades
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('robots', '0030_robot_vector_encoding'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='robot',
+            name='embedding_model',
+            field=models.CharField(blank=True, default='', help_text='Boşsa RAG_EMBEDDING_MODEL; model geçişinde migrate_embedding_model --flip ile ayarlanır', max_length=255, verbose_name='Embedding Modeli'),
+        ),
+        migrations.CreateModel(
+            name='EmbeddingMigration',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('source_model', models.CharField(max_length=255, verbose_name='Kaynak Model')),
+                ('target_model', models.CharField(max_length=255, verbose_name='Hedef Model')),
+                ('dimensions', models.PositiveIntegerField(verbose_name='Hedef Boyut')),
+                ('status', models.CharField(choices=[('backfilling', 'Dolduruluyor'), ('completed', 'Tamamlandı'), ('aborted', 'İptal Edildi')], default='backfilling', max_length=15, verbose_name='Durum')),
+                ('rows_done', models.PositiveIntegerField(default=0, verbose_name='Doldurulan Satır')),
+                ('created_at', models.DateTimeField(auto_now_add=True, verbose_name='Oluşturulma Zamanı')),
+                ('completed_at', models.DateTimeField(blank=True, null=True, verbose_name='Tamamlanma Zamanı')),
+            ],
+            options={
+                'verbose_name': 'Embedding Model Geçişi',
+                'verbose_name_plural': 'Embedding Model Geçişleri',
+                'ordering': ['-created_at'],
+            },
+        ),
+    ]
@@ -0,0 +1,31 @@
+# Generated migration for sharded, time-bucketed brand usage ledger
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('robots', '0031_embedding_model_migration'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='BrandUsageBucket',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('bucket', models.DateTimeField(verbose_name='Saat Kovası')),
+                ('shard', models.PositiveSmallIntegerField(default=0, verbose_name='Shard')),
+                ('count', models.PositiveIntegerField(default=0, verbose_name='İstek Sayısı')),
+                ('reconciled', models.PositiveIntegerField(default=0, verbose_name='Uzlaştırılan')),
+                ('brand', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='usage_buckets', to='robots.brand', verbose_name='Marka')),
+            ],
+            options={
+                'verbose_name': 'Marka Kullanım Kovası',
+                'verbose_name_plural': 'Marka Kullanım Kovaları',
+                'ordering': ['-bucket', 'shard'],
+                'constraints': [models.UniqueConstraint(fields=('brand', 'bucket', 'shard'), name='brandusage_bucket_shard_uniq')],
+                'indexes': [models.Index(condition=models.Q(('count__gt', models.F('reconciled'))), fields=['brand'], name='brandusage_unreconciled_idx')],
+            },
+        ),
+    ]
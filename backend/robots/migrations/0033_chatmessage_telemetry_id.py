@@ -0,0 +1,17 @@
+# Generated migration for write-behind chat telemetry
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('robots', '0032_brandusagebucket'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='chatmessage',
+            name='telemetry_id',
+            field=models.UUIDField(blank=True, editable=False, help_text='Tampondan (write-behind) yazılan mesajların tekrar oynatmada çift yazılmaması için', null=True, unique=True, verbose_name='Telemetri ID'),
+        ),
+    ]
@@ -0,0 +1,17 @@
+# Generated migration for the durable optimization-mode flag
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('robots', '0033_chatmessage_telemetry_id'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='robot',
+            name='optimizasyon_modu',
+            field=models.BooleanField(default=False, help_text="Açıkken chat yanıtları optimize bağlam paketiyle üretilir; hızlı okuma için cache'e yansıtılır", verbose_name='Optimizasyon Modu'),
+        ),
+    ]
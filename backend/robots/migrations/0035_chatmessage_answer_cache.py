@@ -0,0 +1,22 @@
+# Generated migration for the semantic answer cache
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('robots', '0034_robot_optimizasyon_modu'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='chatmessage',
+            name='answer_cache_status',
+            field=models.CharField(blank=True, choices=[('', 'Kullanılmadı'), ('hit', 'İsabet'), ('miss', 'Iska')], default='', max_length=4, verbose_name='Yanıt Cache Durumu'),
+        ),
+        migrations.AddField(
+            model_name='chatmessage',
+            name='answer_cache_similarity',
+            field=models.FloatField(blank=True, help_text="Cache'teki en yakın sorunun kosinüs benzerliği", null=True, verbose_name='Yanıt Cache Benzerliği'),
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated migration: new robots follow the deployed embedding dimensions
+from django.db import migrations, models
+import robots.models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('robots', '0035_chatmessage_answer_cache'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='robot',
+            name='vector_encoding',
+            field=models.CharField(choices=[('full', 'Tam (vector, float32)'), ('halfvec', 'Yarım hassasiyet (halfvec, float16)'), ('binary', 'İkili (bit) + tam hassasiyetle yeniden sıralama')], default=robots.models.default_vector_encoding, help_text='kNN aramasında kullanılan HNSW indeksi; quantize_embeddings komutuyla değiştirilir', max_length=10, verbose_name='Vektör Kodlaması'),
+        ),
+    ]
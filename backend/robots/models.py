@@ -39,6 +39,17 @@ class Brand(models.Model):
     def __str__(self):
         return f"{self.name} - {self.get_paket_turu_display()} - {self.total_api_requests}/{self.request_limit} istek"
     
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        # save() sayacın elle değiştirilip değiştirilmediğini bu değerle anlar
+        instance._loaded_total_api_requests = instance.__dict__.get('total_api_requests')
+        return instance
+    
+    def refresh_from_db(self, *args, **kwargs):
+        super().refresh_from_db(*args, **kwargs)
+        self._loaded_total_api_requests = self.__dict__.get('total_api_requests')
+    
     def get_user_limit(self):
         """Paket türüne göre kullanıcı sınırını döndür"""
         user_limits = {
@@ -122,24 +133,43 @@ class Brand(models.Model):
             self.paket_baslangic_tarihi = timezone.now()
             self.paket_bitis_tarihi = timezone.now() + timedelta(days=self.paket_suresi)
             self.total_api_requests = 0  # Yeni paket ile sayacı sıfırla
+        elif (not args and kwargs.get('update_fields') is None
+              and self.total_api_requests == getattr(self, '_loaded_total_api_requests', None)):
+            # Sayaç yalnızca F() ile artırılır/uzlaştırılır; dokunulmamış (bayat olabilecek) değer yazılmaz.
+            # Sayaç elle değiştirildiyse ya da update_fields verildiyse kaydetme olduğu gibi yapılır.
+            kwargs['update_fields'] = [
+                field.name for field in self._meta.concrete_fields
+                if not field.primary_key and field.name != 'total_api_requests'
+            ]
+            logger.debug(f"Marka kaydı total_api_requests hariç yazıldı - Marka: {self.pk}")
+        elif 'total_api_requests' in (kwargs.get('update_fields') or ['total_api_requests']):
+            logger.info(f"🧾 Marka sayacı elle yazıldı - Marka: {self.pk}, Değer: {self.total_api_requests}")
         
         super().save(*args, **kwargs)
+        self._loaded_total_api_requests = self.total_api_requests
         
         # Paket değişikliği sonrası kullanıcı sınırını kontrol et
         if paket_changed:
+            from robots.quota import reset_brand_usage
+            reset_brand_usage(self.pk)
             deactivated = self.deactivate_excess_users()
             if deactivated:
                 print(f"⚠️ Paket {old_paket_turu} → {self.paket_turu} değişikliği: {len(deactivated)} kullanıcı pasif hale getirildi: {', '.join(deactivated)}")
     
     def increment_api_count(self):
-        """API istek sayısını 1 artır"""
-        self.total_api_requests += 1
-        self.save(update_fields=['total_api_requests', 'updated_at'])
-        return self.total_api_requests
+        """API istek sayısını 1 artır (limit kontrolü olmadan, kullanım defterine yazar)"""
+        from robots.quota import record_brand_request, get_brand_usage
+        record_brand_request(self.pk)
+        return get_brand_usage(self.pk)[0]
+    
+    def get_used_api_requests(self):
+        """Kesin kullanım: total_api_requests + henüz uzlaştırılmamış defter sayıları"""
+        from robots.quota import get_brand_usage
+        return get_brand_usage(self.pk)[0]
     
     def is_limit_exceeded(self):
         """İstek sınırı aşıldı mı kontrol et"""
-        return self.total_api_requests >= self.request_limit
+        return self.get_used_api_requests() >= self.request_limit
     
     def is_package_expired(self):
         """Paket süresi doldu mu kontrol et"""
@@ -150,7 +180,7 @@ class Brand(models.Model):
     
     def remaining_requests(self):
         """Kalan istek sayısını döndür"""
-        remaining = self.request_limit - self.total_api_requests
+        remaining = self.request_limit - self.get_used_api_requests()
         return max(0, remaining)
     
     def remaining_days(self):
@@ -208,6 +238,11 @@ class Brand(models.Model):
         
         self.save()  # save() metodunda kullanıcı kontrolü yapılacak
         
+        # Aynı pakete yenilemede de sayaç ve defterdeki eski kullanım sayılmasın
+        from robots.quota import reset_brand_usage
+        Brand.objects.filter(pk=self.pk).update(total_api_requests=0)
+        reset_brand_usage(self.pk)
+        
         new_user_limit = self.get_user_limit()
         
         return {
@@ -235,6 +270,50 @@ class Brand(models.Model):
         verbose_name_plural = 'Markalar'
         ordering = ['-total_api_requests', 'name']
 
+
+class BrandUsageBucket(models.Model):
+    """
+    Marka API kullanım defteri: saatlik kova başına birkaç shard satırı.
+    Chat istekleri rastgele bir shard'ı artırır (sıcak Brand satırında kilitlenmez);
+    `reconcile_brand_usage` komutu uzlaştırılmamış farkı total_api_requests'e taşır.
+    """
+    
+    brand = models.ForeignKey(Brand, on_delete=models.CASCADE, related_name='usage_buckets', verbose_name="Marka")
+    bucket = models.DateTimeField(verbose_name="Saat Kovası")
+    shard = models.PositiveSmallIntegerField(default=0, verbose_name="Shard")
+    count = models.PositiveIntegerField(default=0, verbose_name="İstek Sayısı")
+    reconciled = models.PositiveIntegerField(default=0, verbose_name="Uzlaştırılan")
+    
+    def __str__(self):
+        return f"{self.brand.name} - {self.bucket:%Y-%m-%d %H:00} #{self.shard}: {self.count}"
+    
+    class Meta:
+        verbose_name = 'Marka Kullanım Kovası'
+        verbose_name_plural = 'Marka Kullanım Kovaları'
+        ordering = ['-bucket', 'shard']
+        constraints = [
+            models.UniqueConstraint(fields=['brand', 'bucket', 'shard'], name='brandusage_bucket_shard_uniq'),
+        ]
+        indexes = [
+            # Kesin kullanım sorgusu yalnızca uzlaştırılmamış satırları okur
+            models.Index(
+                fields=['brand'],
+                name='brandusage_unreconciled_idx',
+                condition=models.Q(count__gt=models.F('reconciled'))
+            ),
+        ]
+
+def default_vector_encoding():
+    """
+    Yeni robotun kodlaması: RAG_VECTOR_ENCODING verilmişse o (tüm robotlar çevrildikten sonra),
+    değilse vector HNSW 2000 boyutun üstünü indeksleyemediği için halfvec, altında full
+    """
+    from robots.rag_config import RAGConfig
+    from robots.vector_stores import HNSW_MAX_DIMENSIONS
+    if RAGConfig.VECTOR_ENCODING:
+        return RAGConfig.VECTOR_ENCODING
+    return 'halfvec' if RAGConfig.EMBEDDING_DIMENSIONS > HNSW_MAX_DIMENSIONS else 'full'
+
 class Robot(models.Model):
     name = models.CharField(max_length=100, verbose_name="Robot İsmi")
     product_name = models.CharField(max_length=150, verbose_name="Ürün İsmi")
@@ -245,12 +324,66 @@ class Robot(models.Model):
         verbose_name="Özel Robot Mesajları",
         help_text="ZZEN robot için özelleştirilebilir mesajlar (maksimum 5 adet)"
     )
+    slug = models.SlugField(
+        max_length=100,
+        unique=True,
+        null=True,
+        blank=True,
+        verbose_name="Slug",
+        help_text="Boş bırakılırsa robot isminden otomatik oluşturulur"
+    )
+    context_version = models.PositiveIntegerField(
+        default=0,
+        editable=False,
+        verbose_name="Bağlam Versiyonu",
+        help_text="PDF veya prompt değiştiğinde artar; önbellekteki bağlam paketlerini geçersiz kılar"
+    )
+    VECTOR_ENCODING_CHOICES = [
+        ('full', 'Tam (vector, float32)'),
+        ('halfvec', 'Yarım hassasiyet (halfvec, float16)'),
+        ('binary', 'İkili (bit) + tam hassasiyetle yeniden sıralama'),
+    ]
+    vector_encoding = models.CharField(
+        max_length=10,
+        choices=VECTOR_ENCODING_CHOICES,
+        default=default_vector_encoding,
+        verbose_name="Vektör Kodlaması",
+        help_text="kNN aramasında kullanılan HNSW indeksi; quantize_embeddings komutuyla değiştirilir"
+    )
+    embedding_model = models.CharField(
+        max_length=255,
+        blank=True,
+        default='',
+        verbose_name="Embedding Modeli",
+        help_text="Boşsa RAG_EMBEDDING_MODEL; model geçişinde migrate_embedding_model --flip ile ayarlanır"
+    )
+    optimizasyon_modu = models.BooleanField(
+        default=False,
+        verbose_name="Optimizasyon Modu",
+        help_text="Açıkken chat yanıtları optimize bağlam paketiyle üretilir; hızlı okuma için cache'e yansıtılır"
+    )
     yaratilma_zamani = models.DateTimeField(auto_now_add=True)
     guncellenme_zamani = models.DateTimeField(auto_now=True)
     
     def __str__(self):
         return f"{self.name} - {self.product_name}"
     
+    def save(self, *args, **kwargs):
+        # Slug bir kez oluşturulur ve kalıcıdır (URL'ler isim değişikliğinden etkilenmez)
+        if not self.slug:
+            self.slug = self.build_unique_slug()
+        super().save(*args, **kwargs)
+    
+    def build_unique_slug(self):
+        """build_slug() sonucunu, çakışma varsa ID/sayı ekleyerek benzersiz yap"""
+        base_slug = self.build_slug() or 'robot'
+        slug = base_slug
+        suffix = 2
+        while Robot.objects.filter(slug=slug).exclude(pk=self.pk).exists():
+            slug = f"{base_slug}-{suffix}"
+            suffix += 1
+        return slug
+    
     @property
     def pdf_sayisi(self):
         """Robot'un toplam PDF sayısını döndürür"""
@@ -267,6 +400,10 @@ class Robot(models.Model):
         return self.pdf_dosyalari.filter(is_active=True)
     
     def get_slug(self):
+        """Robot'un kalıcı slug'ı (henüz kaydedilmemişse isimden üretilir)"""
+        return self.slug or self.build_slug()
+    
+    def build_slug(self):
         """Robot için URL-friendly slug oluştur"""
         name = self.name.lower()
         # Türkçe karakterleri değiştir
@@ -326,11 +463,14 @@ class Robot(models.Model):
             Yanıt dict'i
         """
         from django.conf import settings
-        from robots.scripts.ai_request import OpenRouterAIHandler
+        from robots.ai_client import get_ai_handler
         from robots.services import get_robot_pdf_contents_for_ai
         import os
         
+        from robots.quota import reserve_brand_request, release_brand_request
+        
         # Marka API istek sayısını kontrol et
+        quota_reservation = None
         if not user.is_staff and not user.is_superuser:
             if not hasattr(user, 'profil') or not user.profil.brand:
                 return {
@@ -351,22 +491,16 @@ class Robot(models.Model):
                     'error': random.choice(funny_tech_messages)
                 }
             
-            # İstek limiti kontrolü
-            if brand.is_limit_exceeded():
+            # İstek limiti kontrolü + sayaç artışı (tek atomik rezervasyon)
+            quota_reservation = reserve_brand_request(brand)
+            if quota_reservation is None:
                 return {
-                    'error': f'API istek limitiniz dolmuş. Lütfen paketinizi yükseltin. ({brand.total_api_requests}/{brand.request_limit})'
+                    'error': f'API istek limitiniz dolmuş. Lütfen paketinizi yükseltin. ({brand.get_used_api_requests()}/{brand.request_limit})'
                 }
-            
-            # API sayacını artır
-            brand.increment_api_count()
-            print(f"INFO Sidrex API request count incremented to: {brand.total_api_requests}/{brand.request_limit}")
         
         try:
-            # OpenRouter AI Handler'ı başlat
-            handler = OpenRouterAIHandler(
-                api_key=settings.OPENROUTER_API_KEY,
-                app_name="SidrexGPT"
-            )
+            # Paylaşımlı OpenRouter AI Handler'ı al
+            handler = get_ai_handler(settings.OPENROUTER_API_KEY)
             
             # PDF içeriklerini al (RAG sistemi)
             pdf_contents = get_robot_pdf_contents_for_ai(self)
@@ -424,6 +558,7 @@ class Robot(models.Model):
             
         except Exception as e:
             print(f"ERROR Error in chat: {str(e)}")
+            release_brand_request(quota_reservation)
             return {
                 'error': 'Üzgünüm, şu anda bir teknik sorun yaşıyorum. Lütfen daha sonra tekrar deneyin.',
                 'debug_error': str(e)
@@ -486,7 +621,9 @@ class RobotPDF(models.Model):
 
         # Sadece yeni bir PDF eklendiğinde içeriği doldur.
         # Mevcut PDF'lerin içeriğini doldurmak için ayrı bir management command kullanacağız.
-        if is_new and self.gdrive_file_id and not self.pdf_icerigi:
+        # Arka plan ingestion işi içeriği kendi "extract" aşamasında doldurur.
+        skip_extraction = getattr(self, '_skip_content_extraction', False)
+        if is_new and self.gdrive_file_id and not self.pdf_icerigi and not skip_extraction:
             try:
                 logger.info(f"Yeni PDF için içerik okunuyor: {self.dosya_adi} (ID: {self.id})")
                 pdf_stream = download_pdf_content_from_drive(self.gdrive_file_id)
@@ -573,10 +710,12 @@ class RobotSystemPrompt(models.Model):
         if not self.topic_keywords:
             return False  # Topic keywords yoksa match etmez, sadece fallback olarak kullanılır
         
-        message_lower = user_message.lower()
-        keywords = self.get_keywords_list()
+        from .prompt_matcher import normalize_keyword_text
         
-        return any(keyword in message_lower for keyword in keywords)
+        message = normalize_keyword_text(user_message)
+        keywords = [normalize_keyword_text(keyword) for keyword in self.get_keywords_list()]
+        
+        return any(keyword and keyword in message for keyword in keywords)
     
     class Meta:
         verbose_name = 'Robot Sistem Prompt'
@@ -603,16 +742,36 @@ class ChatSession(models.Model):
     def __str__(self):
         return f"{self.user.username} - {self.robot.name} - {self.session_id}"
     
+    @classmethod
+    def record_message(cls, session_id, response_time=None, count=1):
+        """
+        Biten mesaj(lar)ı istatistiklere O(1) ekle: tek UPDATE, F() ile eşzamanlı güvenli.
+        response_time `count` mesajın toplam süresidir; ortalama aynı ifadede türetilir.
+        """
+        from decimal import Decimal
+        
+        total_messages = models.F('total_messages') + count
+        total_response_time = models.F('total_response_time') + Decimal(str(response_time or 0))
+        cls.objects.filter(pk=session_id).update(
+            total_messages=total_messages,
+            total_response_time=total_response_time,
+            average_response_time=models.ExpressionWrapper(
+                total_response_time / total_messages,
+                output_field=models.DecimalField(max_digits=8, decimal_places=3)
+            )
+        )
+    
     def update_stats(self):
-        """Oturum istatistiklerini güncelle"""
-        messages = self.chat_messages.all()
-        self.total_messages = messages.count()
+        """İstatistikleri mesajlardan baştan hesapla (onarım; toplu hali rebuild_session_stats)"""
+        from decimal import Decimal
         
-        # Yanıt süreleri var olan mesajları al
-        response_times = messages.exclude(response_time__isnull=True).values_list('response_time', flat=True)
-        if response_times:
-            self.total_response_time = sum(response_times)
-            self.average_response_time = self.total_response_time / len(response_times)
+        stats = self.chat_messages.exclude(status='processing').aggregate(
+            count=models.Count('id'),
+            total=models.Sum('response_time')
+        )
+        self.total_messages = stats['count']
+        self.total_response_time = stats['total'] or Decimal('0')
+        self.average_response_time = self.total_response_time / self.total_messages if self.total_messages else Decimal('0')
         
         self.save(update_fields=['total_messages', 'total_response_time', 'average_response_time'])
     
@@ -661,6 +820,20 @@ class ChatMessage(models.Model):
     ai_model_used = models.CharField(max_length=100, null=True, blank=True, verbose_name="Kullanılan AI Modeli")
     tokens_used = models.PositiveIntegerField(null=True, blank=True, verbose_name="Kullanılan Token Sayısı")
     optimization_enabled = models.BooleanField(default=False, verbose_name="Optimizasyon Açık mıydı?")
+    ANSWER_CACHE_CHOICES = [
+        ('', 'Kullanılmadı'),
+        ('hit', 'İsabet'),
+        ('miss', 'Iska'),
+    ]
+    answer_cache_status = models.CharField(
+        max_length=4, choices=ANSWER_CACHE_CHOICES, blank=True, default='',
+        verbose_name="Yanıt Cache Durumu"
+    )
+    answer_cache_similarity = models.FloatField(
+        null=True, blank=True,
+        verbose_name="Yanıt Cache Benzerliği",
+        help_text="Cache'teki en yakın sorunun kosinüs benzerliği"
+    )
     context_used = models.BooleanField(default=False, verbose_name="Context Kullanıldı mı?")
     context_size = models.PositiveIntegerField(null=True, blank=True, verbose_name="Context Boyutu (karakter)")
     citations_count = models.PositiveIntegerField(default=0, verbose_name="Alıntı Sayısı")
@@ -674,6 +847,11 @@ class ChatMessage(models.Model):
         verbose_name="Kullanıcı Geri Bildirimi"
     )
     admin_notes = models.TextField(null=True, blank=True, verbose_name="Admin Notları")
+    telemetry_id = models.UUIDField(
+        null=True, blank=True, unique=True, editable=False,
+        verbose_name="Telemetri ID",
+        help_text="Tampondan (write-behind) yazılan mesajların tekrar oynatmada çift yazılmaması için"
+    )
     
     def __str__(self):
         return f"{self.user.username} - {self.robot.name} - {self.created_at.strftime('%Y-%m-%d %H:%M')}"
@@ -690,30 +868,48 @@ class ChatMessage(models.Model):
         """Mesajı tamamlandı olarak işaretle"""
         from django.utils import timezone
         
+        first_finish = self.status == 'processing'
         self.ai_response = ai_response
         self.citations_count = citations_count
         self.context_used = context_used
         self.status = 'completed'
         self.processing_ended_at = timezone.now()
         self.calculate_response_time()
+        
+        if self.pk is None:
+            # Write-behind: mesaj ve oturum istatistikleri telemetri tamponundan toplu yazılır
+            from robots.telemetry import chat_telemetry
+            chat_telemetry.submit(self)
+            return
+        
         self.save()
         
-        # Session istatistiklerini güncelle
-        self.session.update_stats()
+        # Session istatistiklerine bu mesajı ekle (tekrar işaretlemede iki kez sayılmaz)
+        if first_finish:
+            ChatSession.record_message(self.session_id, self.response_time)
     
     def mark_failed(self, error_message, error_type=None):
         """Mesajı başarısız olarak işaretle"""
         from django.utils import timezone
         
+        first_finish = self.status == 'processing'
         self.error_message = error_message
         self.error_type = error_type or 'unknown'
         self.status = 'failed'
         self.processing_ended_at = timezone.now()
         self.calculate_response_time()
+        
+        if self.pk is None:
+            # Write-behind: mesaj ve oturum istatistikleri telemetri tamponundan toplu yazılır
+            from robots.telemetry import chat_telemetry
+            chat_telemetry.submit(self)
+            return
+        
         self.save()
         
-        # Session istatistiklerini güncelle
-        self.session.update_stats()
+        # Session istatistiklerine bu mesajı ekle (tekrar işaretlemede iki kez sayılmaz)
+        if first_finish:
+            ChatSession.record_message(self.session_id, self.response_time)
     
     class Meta:
         verbose_name = 'Chat Mesajı'
@@ -725,4 +921,120 @@ class ChatMessage(models.Model):
             models.Index(fields=['status']),
             models.Index(fields=['response_time']),
             models.Index(fields=['created_at']),
-        ]
\ No newline at end of file
+        ]
+
+
+class PDFIngestionJob(models.Model):
+    """
+    Arka planda çalışan PDF ingestion işi.
+    Yükleme isteği dosyayı bu tabloya bırakır; `run_ingestion_worker` komutu
+    aşamaları (store -> extract -> chunk -> embed -> index) sırayla, hata
+    durumunda kaldığı aşamadan tekrar deneyerek işler.
+    """
+    
+    STAGE_CHOICES = [
+        ('store', 'Depolama (Drive + Supabase)'),
+        ('extract', 'Metin Çıkarma'),
+        ('chunk', 'Chunklama'),
+        ('embed', 'Embedding'),
+        ('index', 'İndeksleme'),
+        ('done', 'Tamamlandı'),
+    ]
+    STAGES = ['store', 'extract', 'chunk', 'embed', 'index']
+    
+    STATUS_CHOICES = [
+        ('queued', 'Sırada'),
+        ('running', 'Çalışıyor'),
+        ('completed', 'Tamamlandı'),
+        ('failed', 'Başarısız'),
+    ]
+    
+    robot = models.ForeignKey(Robot, on_delete=models.CASCADE, related_name='ingestion_jobs', verbose_name="Robot")
+    robot_pdf = models.ForeignKey(RobotPDF, on_delete=models.SET_NULL, null=True, blank=True, related_name='ingestion_jobs', verbose_name="Robot PDF")
+    created_by = models.ForeignKey(User, on_delete=models.SET_NULL, null=True, blank=True, related_name='pdf_ingestion_jobs', verbose_name="Yükleyen")
+    
+    # Yükleme bilgileri (dosya "store" aşamasına kadar veritabanında bekletilir)
+    file_name = models.CharField(max_length=200, verbose_name="Dosya Adı")
+    content_type = models.CharField(max_length=100, default='application/pdf', verbose_name="İçerik Türü")
+    file_data = models.BinaryField(null=True, blank=True, verbose_name="Dosya İçeriği")
+    pdf_type = models.CharField(max_length=10, choices=RobotPDF.PDF_TYPE_CHOICES, default='bilgi', verbose_name="PDF Türü")
+    aciklama = models.TextField(blank=True, default='', verbose_name="Açıklama")
+    
+    # Durum
+    status = models.CharField(max_length=15, choices=STATUS_CHOICES, default='queued', verbose_name="Durum")
+    stage = models.CharField(max_length=10, choices=STAGE_CHOICES, default='store', verbose_name="Aşama")
+    stage_progress = models.JSONField(default=dict, blank=True, verbose_name="Aşama İlerlemesi")
+    attempts = models.PositiveIntegerField(default=0, verbose_name="Deneme Sayısı")
+    max_attempts = models.PositiveIntegerField(default=3, verbose_name="Maksimum Deneme")
+    last_error = models.TextField(null=True, blank=True, verbose_name="Son Hata")
+    
+    # Kuyruk yönetimi
+    next_attempt_at = models.DateTimeField(default=timezone.now, verbose_name="Sonraki Deneme")
+    locked_by = models.CharField(max_length=100, null=True, blank=True, verbose_name="Worker")
+    locked_at = models.DateTimeField(null=True, blank=True, verbose_name="Kilit Zamanı")
+    
+    created_at = models.DateTimeField(auto_now_add=True, verbose_name="Oluşturulma Zamanı")
+    updated_at = models.DateTimeField(auto_now=True, verbose_name="Güncellenme Zamanı")
+    completed_at = models.DateTimeField(null=True, blank=True, verbose_name="Tamamlanma Zamanı")
+    
+    def __str__(self):
+        return f"{self.robot.name} - {self.file_name} ({self.get_status_display()} / {self.stage})"
+    
+    def set_stage_progress(self, stage, **values):
+        """Bir aşamanın ilerleme bilgisini güncelle ve kaydet"""
+        progress = self.stage_progress.get(stage, {})
+        progress.update(values)
+        self.stage_progress[stage] = progress
+        self.save(update_fields=['stage_progress', 'updated_at'])
+    
+    @property
+    def progress_percentage(self):
+        """Tamamlanan aşamalara göre yaklaşık ilerleme yüzdesi"""
+        if self.status == 'completed':
+            return 100
+        done = sum(1 for stage in self.STAGES if self.stage_progress.get(stage, {}).get('status') == 'completed')
+        return round(done * 100 / len(self.STAGES))
+    
+    class Meta:
+        verbose_name = 'PDF Ingestion İşi'
+        verbose_name_plural = 'PDF Ingestion İşleri'
+        ordering = ['-created_at']
+        indexes = [
+            models.Index(fields=['status', 'next_attempt_at'], name='pdfjob_status_next_idx'),
+            models.Index(fields=['robot', 'created_at'], name='pdfjob_robot_created_idx'),
+        ]
+
+
+class EmbeddingMigration(models.Model):
+    """
+    Embedding modeli geçişi. Yeni modelin vektörleri pdf_chunks.embedding_shadow
+    kolonuna arka planda doldurulur; dolumu biten robotların okumaları tek tek
+    yeni kolona çevrilir, tüm robotlar geçince kolonlar yer değiştirir.
+    """
+    
+    STATUS_CHOICES = [
+        ('backfilling', 'Dolduruluyor'),
+        ('completed', 'Tamamlandı'),
+        ('aborted', 'İptal Edildi'),
+    ]
+    
+    source_model = models.CharField(max_length=255, verbose_name="Kaynak Model")
+    target_model = models.CharField(max_length=255, verbose_name="Hedef Model")
+    dimensions = models.PositiveIntegerField(verbose_name="Hedef Boyut")
+    status = models.CharField(max_length=15, choices=STATUS_CHOICES, default='backfilling', verbose_name="Durum")
+    rows_done = models.PositiveIntegerField(default=0, verbose_name="Doldurulan Satır")
+    created_at = models.DateTimeField(auto_now_add=True, verbose_name="Oluşturulma Zamanı")
+    completed_at = models.DateTimeField(null=True, blank=True, verbose_name="Tamamlanma Zamanı")
+    
+    def __str__(self):
+        return f"{self.source_model} -> {self.target_model} ({self.get_status_display()})"
+    
+    @classmethod
+    def get_active(cls):
+        """Devam eden geçiş (yoksa None)"""
+        return cls.objects.filter(status='backfilling').order_by('-created_at').first()
+    
+    class Meta:
+        verbose_name = 'Embedding Model Geçişi'
+        verbose_name_plural = 'Embedding Model Geçişleri'
+        ordering = ['-created_at']
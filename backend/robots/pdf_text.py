@@ -0,0 +1,149 @@
+"""
+PDF Metin Çıkarma - SidrexGPT Robots App
+
+Sayfa metni önce pypdfium2 (hızlı), yetersizse pdfplumber (layout) ile okunur.
+Büyük belgeler sayfa bazında bir process pool'da paralel işlenebilir; bu yalnızca
+çağıran açıkça `max_workers` verdiğinde (ingestion worker'ı, management komutları)
+yapılır. İstek işleyicilerinde varsayılan seri okumadır.
+
+Pool `spawn` ile başlatılır: gunicorn/ingestion process'leri açık DB bağlantıları
+ve arka plan thread'leri (telemetri flush'ı, model kaydı kilidi) taşıdığı için
+fork edilmez. Modül Django'ya bağımlı değildir; spawn edilen worker yalnızca bu
+modülü import eder.
+"""
+
+import io
+import os
+import logging
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+
+import pdfplumber
+try:
+    import pypdfium2 as pdfium
+except ImportError:
+    pdfium = None
+
+logger = logging.getLogger(__name__)
+
+# Paralel çıkarma için worker sayısı (ingestion worker'ı ve komutlar kullanır)
+PDF_EXTRACT_WORKERS = int(os.getenv('PDF_EXTRACT_WORKERS', str(os.cpu_count() or 1)))
+PDF_PARALLEL_MIN_PAGES = int(os.getenv('PDF_PARALLEL_MIN_PAGES', '8'))
+# pypdfium2 bu kadar karakterden az metin verirse sayfa pdfplumber ile yeniden okunur
+PDFIUM_MIN_PAGE_CHARS = 20
+
+def _needs_layout_extraction(text):
+    """Hızlı geçişin sonucu yetersizse (boş/çok kısa/bozuk karakter) True"""
+    stripped = (text or '').strip()
+    if len(stripped) < PDFIUM_MIN_PAGE_CHARS:
+        return True
+    return stripped.count('\ufffd') > len(stripped) * 0.05
+
+
+class _PageTextExtractor:
+    """
+    Bir PDF'in sayfa metinlerini çıkarır: önce pypdfium2 (hızlı), gerekirse
+    pdfplumber (layout). Belgeler ilk ihtiyaçta bir kez açılır.
+    """
+
+    def __init__(self, pdf_bytes):
+        self.pdf_bytes = pdf_bytes
+        self._pdfium_doc = None
+        self._plumber_doc = None
+
+    def page_count(self):
+        if pdfium is not None:
+            return len(self._get_pdfium_doc())
+        return len(self._get_plumber_doc().pages)
+
+    def _get_pdfium_doc(self):
+        if self._pdfium_doc is None:
+            self._pdfium_doc = pdfium.PdfDocument(self.pdf_bytes)
+        return self._pdfium_doc
+
+    def _get_plumber_doc(self):
+        if self._plumber_doc is None:
+            self._plumber_doc = pdfplumber.open(io.BytesIO(self.pdf_bytes))
+        return self._plumber_doc
+
+    def extract(self, page_index):
+        text = ''
+
+        if pdfium is not None:
+            try:
+                page = self._get_pdfium_doc()[page_index]
+                textpage = page.get_textpage()
+                text = textpage.get_text_range().replace('\r\n', '\n').replace('\r', '\n')
+                textpage.close()
+                page.close()
+            except Exception as e:
+                logger.warning(f"pypdfium2 sayfa {page_index + 1} okunamadı: {e}")
+                text = ''
+
+        if _needs_layout_extraction(text):
+            try:
+                text = self._get_plumber_doc().pages[page_index].extract_text() or text
+            except Exception as e:
+                logger.warning(f"pdfplumber sayfa {page_index + 1} okunamadı: {e}")
+
+        return text
+
+    def close(self):
+        if self._pdfium_doc is not None:
+            self._pdfium_doc.close()
+        if self._plumber_doc is not None:
+            self._plumber_doc.close()
+        self._pdfium_doc = self._plumber_doc = None
+
+
+# Process pool worker'ında açık tutulan extractor (initializer ile bir kez kurulur)
+_worker_extractor = None
+
+
+def _init_pdf_worker(pdf_bytes):
+    global _worker_extractor
+    _worker_extractor = _PageTextExtractor(pdf_bytes)
+
+
+def _extract_page_text(page_index):
+    return _worker_extractor.extract(page_index)
+
+
+def iter_pdf_pages_text(pdf_stream, max_workers=None):
+    """
+    PDF sayfalarının metnini sayfa sırasıyla yield eder.
+    `max_workers` > 1 verilirse büyük belgelerde sayfalar spawn edilen bir process
+    pool'da paralel işlenir; sonuçlar yine de sırayla (executor.map) akar.
+    """
+    pdf_bytes = pdf_stream.read() if hasattr(pdf_stream, 'read') else bytes(pdf_stream)
+    extractor = _PageTextExtractor(pdf_bytes)
+
+    try:
+        page_count = extractor.page_count()
+        max_workers = min(max_workers or 1, page_count)
+
+        if max_workers <= 1 or page_count < PDF_PARALLEL_MIN_PAGES:
+            # Küçük belgede process açma maliyetine değmez
+            for page_index in range(page_count):
+                yield extractor.extract(page_index)
+            return
+    finally:
+        extractor.close()
+
+    with ProcessPoolExecutor(
+        max_workers=max_workers,
+        mp_context=multiprocessing.get_context('spawn'),
+        initializer=_init_pdf_worker,
+        initargs=(pdf_bytes,)
+    ) as executor:
+        chunksize = max(1, page_count // (max_workers * 4))
+        yield from executor.map(_extract_page_text, range(page_count), chunksize=chunksize)
+
+
+def extract_text_from_pdf_stream(pdf_stream, max_workers=None):
+    """Bir PDF dosya akışından metin içeriğini çıkarır (pypdfium2 + gerekirse pdfplumber; max_workers ile sayfa paralel)."""
+    try:
+        return "\n".join(text for text in iter_pdf_pages_text(pdf_stream, max_workers) if text)
+    except Exception as e:
+        logger.error(f"PDF'ten metin çıkarılırken hata oluştu: {e}")
+        return ""
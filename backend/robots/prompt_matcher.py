@@ -0,0 +1,122 @@
+"""
+Sistem Prompt Konu Eşleştirici - SidrexGPT Robots App
+
+Her robotun aktif prompt'larındaki `topic_keywords` tek bir derlenmiş regex'te
+toplanır. Alternatifler prompt önceliğine göre sıralanır; böylece mesaj
+üzerinde tek geçişte en yüksek öncelikli eşleşen prompt bulunur.
+Eşleştirici robotun `context_version` değeriyle süreç içinde cache'lenir;
+prompt değiştiğinde sinyaller versiyonu artırır ve eşleştirici yeniden kurulur.
+"""
+
+import re
+import threading
+import logging
+
+logger = logging.getLogger(__name__)
+
+_TURKISH_FOLD = str.maketrans({
+    'ı': 'i', 'ğ': 'g', 'ü': 'u', 'ş': 's', 'ç': 'c', 'ö': 'o',
+    'â': 'a', 'î': 'i', 'û': 'u',
+})
+
+
+# Eski sabit kodlu yönlendirme (get_optimized_system_prompt): topic_keywords'ünde bu konu
+# geçen ya da bu türdeki prompt'lar, ek olarak bu kelimelerle de eşleşir. Mevcut
+# robotların prompt'ları anahtar kelimeleri güncellenmeden aynı şekilde seçilir.
+LEGACY_TOPIC_TRIGGERS = {
+    'bağışıklık': ['bağışık', 'immun', 'immunity', 'hastal'],
+    'yorgunluk': ['yorgun', 'bitkin', 'enerji', 'güç'],
+}
+LEGACY_TYPE_TRIGGERS = {
+    'product_redirect': ['zzen', 'mag4ever', 'ana robot', 'imuntus'],
+}
+
+
+def normalize_keyword_text(text):
+    """Küçük harf + Türkçe karakterleri ASCII'ye indir + boşlukları tekle"""
+    if not text:
+        return ""
+    # 'İ'.lower() birleşik nokta üretir, önce elle çevrilir
+    text = text.replace('İ', 'i').replace('I', 'ı').lower().translate(_TURKISH_FOLD)
+    return ' '.join(text.split())
+
+
+class PromptKeywordMatcher:
+    """Bir robotun aktif prompt'ları için derlenmiş konu eşleştirici"""
+
+    def __init__(self, prompts):
+        # prompts: öncelik sırasına göre (-priority, -created_at) aktif prompt'lar
+        self.prompts = [
+            {'prompt_type': p.prompt_type, 'prompt_content': p.prompt_content}
+            for p in prompts
+        ]
+        self.pattern = self._compile(prompts)
+
+    @staticmethod
+    def prompt_keywords(prompt):
+        """Prompt'un normalize anahtar kelimeleri (eski sabit tetikleyiciler dahil)"""
+        keywords = {
+            normalize_keyword_text(keyword)
+            for keyword in (prompt.topic_keywords or '').split(',')
+        }
+        topics = normalize_keyword_text(prompt.topic_keywords)
+        for topic, triggers in LEGACY_TOPIC_TRIGGERS.items():
+            if normalize_keyword_text(topic) in topics:
+                keywords.update(normalize_keyword_text(trigger) for trigger in triggers)
+        keywords.update(normalize_keyword_text(trigger) for trigger in LEGACY_TYPE_TRIGGERS.get(prompt.prompt_type, []))
+        keywords.discard('')
+        return keywords
+
+    @classmethod
+    def _compile(cls, prompts):
+        groups = []
+        for rank, prompt in enumerate(prompts):
+            keywords = cls.prompt_keywords(prompt)
+            if not keywords:
+                continue
+            alternatives = '|'.join(re.escape(k) for k in sorted(keywords, key=len, reverse=True))
+            groups.append(f"(?P<p{rank}>{alternatives})")
+
+        if not groups:
+            return None
+        # Lookahead her konumda eşleşmeyi dener; alternatif sırası = öncelik sırası
+        return re.compile(f"(?=(?:{'|'.join(groups)}))")
+
+    def match(self, user_message):
+        """Mesajda anahtar kelimesi geçen en yüksek öncelikli prompt (yoksa None)"""
+        if self.pattern is None or not user_message:
+            return None
+
+        best_rank = None
+        for m in self.pattern.finditer(normalize_keyword_text(user_message)):
+            rank = int(m.lastgroup[1:])
+            if best_rank is None or rank < best_rank:
+                best_rank = rank
+                if rank == 0:
+                    break
+
+        return self.prompts[best_rank] if best_rank is not None else None
+
+    def default_prompt(self):
+        """Eşleşme yoksa: main prompt, o da yoksa en öncelikli prompt"""
+        if not self.prompts:
+            return None
+        return next((p for p in self.prompts if p['prompt_type'] == 'main'), self.prompts[0])
+
+
+_matchers = {}
+_matchers_lock = threading.Lock()
+
+
+def get_prompt_matcher(robot):
+    """Robotun eşleştiricisini döndür; context_version değişmişse yeniden kur"""
+    cached = _matchers.get(robot.id)
+    if cached is not None and cached[0] == robot.context_version:
+        return cached[1]
+
+    prompts = list(robot.system_prompts.filter(is_active=True).order_by('-priority', '-created_at'))
+    matcher = PromptKeywordMatcher(prompts)
+    with _matchers_lock:
+        _matchers[robot.id] = (robot.context_version, matcher)
+    logger.info(f"🔤 Prompt eşleştirici derlendi - Robot: {robot.id}, Prompt: {len(prompts)}, Versiyon: {robot.context_version}")
+    return matcher
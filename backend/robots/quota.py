@@ -0,0 +1,152 @@
+"""
+Marka API Kotası - SidrexGPT Robots App
+
+Chat istekleri markanın `request_limit` kotasından atomik olarak rezerve edilir.
+Sayım sıcak Brand satırında değil, `BrandUsageBucket` defterinde (saatlik kova x
+shard) tutulur: her istek rastgele bir shard satırını tek bir
+`INSERT ... ON CONFLICT DO UPDATE` ile artırır, böylece eşzamanlı chat'ler
+aynı satırda sıraya girmez ve hiçbir artış kaybolmaz.
+
+Kesin kullanım = Brand.total_api_requests + defterdeki uzlaştırılmamış sayılar
+(tek sorguda okunur). `reconcile_brand_usage` komutu farkı periyodik olarak
+total_api_requests'e taşır. Limite QUOTA_EXACT_MARGIN kadar yaklaşan markalarda
+rezervasyon Brand satırı kilitlenerek yapılır; limit sınırında sayım kesindir.
+"""
+
+import os
+import random
+import logging
+from typing import Dict, Optional, Tuple
+
+from django.db import connection, transaction
+from django.db.models import F
+from django.utils import timezone
+
+from .models import Brand, BrandUsageBucket
+
+logger = logging.getLogger(__name__)
+
+# Marka başına saatlik kova shard sayısı (eşzamanlı yazma dağılımı)
+QUOTA_SHARDS = int(os.getenv('BRAND_QUOTA_SHARDS', '8'))
+# Kalan istek bu değerin altına inince rezervasyon Brand satırı kilitlenerek yapılır
+QUOTA_EXACT_MARGIN = int(os.getenv('BRAND_QUOTA_EXACT_MARGIN', '50'))
+
+_USAGE_TABLE = BrandUsageBucket._meta.db_table
+_BRAND_TABLE = Brand._meta.db_table
+
+
+def current_bucket():
+    """İçinde bulunulan saatin başlangıcı"""
+    return timezone.now().replace(minute=0, second=0, microsecond=0)
+
+
+def get_brand_usage(brand_id: int) -> Tuple[int, int]:
+    """(kesin kullanım, istek sınırı); uzlaştırma ile aynı anda da tutarlı tek sorgu"""
+    with connection.cursor() as cursor:
+        cursor.execute(f"""
+            SELECT
+                b.total_api_requests + COALESCE((
+                    SELECT SUM(u.count - u.reconciled)
+                    FROM {_USAGE_TABLE} u
+                    WHERE u.brand_id = b.id AND u.count > u.reconciled
+                ), 0),
+                b.request_limit
+            FROM {_BRAND_TABLE} b
+            WHERE b.id = %s
+        """, [brand_id])
+        row = cursor.fetchone()
+    if row is None:
+        raise Brand.DoesNotExist(brand_id)
+    return int(row[0]), int(row[1])
+
+
+def record_brand_request(brand_id: int) -> Dict[str, object]:
+    """Defterde bir shard'ı atomik olarak 1 artır; rezervasyon bilgisini döndür"""
+    bucket = current_bucket()
+    shard = random.randrange(QUOTA_SHARDS)
+    # Ham SQL'de tarih, ORM filtreleriyle aynı biçimde yazılmalı (SQLite metin olarak saklar)
+    db_bucket = connection.ops.adapt_datetimefield_value(bucket)
+    with connection.cursor() as cursor:
+        cursor.execute(f"""
+            INSERT INTO {_USAGE_TABLE} (brand_id, bucket, shard, count, reconciled)
+            VALUES (%s, %s, %s, 1, 0)
+            ON CONFLICT (brand_id, bucket, shard)
+            DO UPDATE SET count = {_USAGE_TABLE}.count + 1
+        """, [brand_id, db_bucket, shard])
+    return {'brand_id': brand_id, 'bucket': bucket, 'shard': shard}
+
+
+def reserve_brand_request(brand: Brand) -> Optional[Dict[str, object]]:
+    """
+    Markanın kotasından bir istek rezerve et. Kota doluysa None döner.
+    Limitten uzakta kilitsiz yol, limite yakınken Brand satırı kilitli kesin yol kullanılır.
+    """
+    used, limit = get_brand_usage(brand.pk)
+    if limit - used > QUOTA_EXACT_MARGIN:
+        return record_brand_request(brand.pk)
+
+    with transaction.atomic():
+        # Limit sınırında rezervasyonlar marka bazında sıraya girer
+        Brand.objects.select_for_update().filter(pk=brand.pk).values_list('pk', flat=True).get()
+        used, limit = get_brand_usage(brand.pk)
+        if used >= limit:
+            logger.warning(f"🚫 Marka kotası dolu - Marka: {brand.pk}, Kullanım: {used}/{limit}")
+            return None
+        return record_brand_request(brand.pk)
+
+
+def release_brand_request(reservation: Optional[Dict[str, object]]):
+    """Yanıt üretilemeyen isteğin rezervasyonunu geri ver"""
+    if not reservation:
+        return
+
+    updated = BrandUsageBucket.objects.filter(
+        brand_id=reservation['brand_id'],
+        bucket=reservation['bucket'],
+        shard=reservation['shard'],
+        count__gt=F('reconciled'),
+    ).update(count=F('count') - 1)
+
+    if not updated:
+        # Kova arada uzlaştırıldı: geri alma toplam sayaçtan yapılır
+        Brand.objects.filter(pk=reservation['brand_id'], total_api_requests__gt=0).update(
+            total_api_requests=F('total_api_requests') - 1
+        )
+
+
+def reconcile_brand_usage(brand_id: int = None) -> Dict[int, int]:
+    """Uzlaştırılmamış defter sayılarını total_api_requests'e taşı; marka -> taşınan sayı"""
+    moved: Dict[int, int] = {}
+
+    pending = BrandUsageBucket.objects.filter(count__gt=F('reconciled'))
+    if brand_id is not None:
+        pending = pending.filter(brand_id=brand_id)
+    brand_ids = sorted(set(pending.values_list('brand_id', flat=True)))
+    if not brand_ids:
+        return moved
+
+    with transaction.atomic():
+        # Kilit sırası rezervasyonla aynı (önce Brand, sonra defter): deadlock olmaz
+        list(Brand.objects.select_for_update().filter(pk__in=brand_ids).order_by('pk').values_list('pk', flat=True))
+        buckets = BrandUsageBucket.objects.select_for_update().filter(
+            brand_id__in=brand_ids, count__gt=F('reconciled')
+        )
+
+        bucket_ids = []
+        for bucket_id, bucket_brand_id, count, reconciled in buckets.values_list('id', 'brand_id', 'count', 'reconciled'):
+            moved[bucket_brand_id] = moved.get(bucket_brand_id, 0) + count - reconciled
+            bucket_ids.append(bucket_id)
+
+        # Kilitli satırlar: aynı transaction'da hem toplam hem defter güncellenir
+        BrandUsageBucket.objects.filter(id__in=bucket_ids).update(reconciled=F('count'))
+        for moved_brand_id, delta in moved.items():
+            Brand.objects.filter(pk=moved_brand_id).update(total_api_requests=F('total_api_requests') + delta)
+
+    if moved:
+        logger.info(f"🧾 Marka kullanımı uzlaştırıldı: {moved}")
+    return moved
+
+
+def reset_brand_usage(brand_id: int):
+    """Paket yenilenince defterdeki uzlaştırılmamış kullanımı sayaca taşımadan kapat"""
+    BrandUsageBucket.objects.filter(brand_id=brand_id, count__gt=F('reconciled')).update(reconciled=F('count'))
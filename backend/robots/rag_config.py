@@ -12,10 +12,39 @@ class RAGConfig:
     # Embedding Parametreleri
     EMBEDDING_MODEL = os.getenv('RAG_EMBEDDING_MODEL', 'paraphrase-multilingual-MiniLM-L12-v2')
     EMBEDDING_DIMENSIONS = int(os.getenv('RAG_EMBEDDING_DIM', '384'))
+    EMBEDDING_BATCH_SIZE = int(os.getenv('RAG_EMBEDDING_BATCH_SIZE', '64'))
+    EMBEDDING_BATCH_TOKEN_BUDGET = int(os.getenv('RAG_EMBEDDING_BATCH_TOKEN_BUDGET', '100000'))
     
     # Arama Parametreleri
     TOP_K = int(os.getenv('RAG_TOP_K', '5'))
     SIMILARITY_THRESHOLD = float(os.getenv('RAG_SIMILARITY_THRESHOLD', '0.2'))
+    FUZZY_SIMILARITY_THRESHOLD = float(os.getenv('RAG_FUZZY_SIMILARITY_THRESHOLD', '0.2'))
+    
+    # Arama modu: 'hybrid' (tek SQL, reciprocal-rank fusion) veya 'fallback' (vektör + fuzzy ayrı sorgular)
+    SEARCH_MODE = os.getenv('RAG_SEARCH_MODE', 'hybrid')
+    HYBRID_VECTOR_WEIGHT = float(os.getenv('RAG_HYBRID_VECTOR_WEIGHT', '1.0'))
+    HYBRID_TEXT_WEIGHT = float(os.getenv('RAG_HYBRID_TEXT_WEIGHT', '1.0'))
+    HYBRID_RRF_K = int(os.getenv('RAG_HYBRID_RRF_K', '60'))
+    HYBRID_CANDIDATES = int(os.getenv('RAG_HYBRID_CANDIDATES', '20'))  # Her aramadan alınan aday sayısı
+    
+    # Vektör deposu: 'pgvector' (varsayılan), 'numpy' (process içi, robot başına matris) veya 'sqlite' (yerel)
+    VECTOR_BACKEND = os.getenv('RAG_VECTOR_BACKEND', 'pgvector')
+    NUMPY_INDEX_DIR = os.getenv('RAG_NUMPY_INDEX_DIR', '')  # Boş değilse matrisler .npy olarak yazılır (mmap)
+    SQLITE_VECTOR_PATH = os.getenv(
+        'RAG_SQLITE_VECTOR_PATH',
+        os.path.join(str(getattr(settings, 'BASE_DIR', '.')), 'vector_store.sqlite3')
+    )
+    
+    # Yeni robotların kNN kodlaması (full / halfvec / binary). Boşsa boyuta göre seçilir;
+    # quantize_embeddings --all ile tüm robotlar çevrildikten sonra aynı kodlamaya ayarlanmalı
+    VECTOR_ENCODING = os.getenv('RAG_VECTOR_ENCODING', '')
+    
+    # halfvec/binary kodlamalı robotlarda top_k * bu kadar aday tam hassasiyetle yeniden sıralanır
+    QUANTIZED_RERANK_FACTOR = int(os.getenv('RAG_QUANTIZED_RERANK_FACTOR', '8'))
+    
+    # HNSW tarama ayarları: filtreli (robot bazlı) aramalarda recall için
+    HNSW_EF_SEARCH = int(os.getenv('RAG_HNSW_EF_SEARCH', '100'))
+    HNSW_ITERATIVE_SCAN = os.getenv('RAG_HNSW_ITERATIVE_SCAN', 'relaxed_order')  # off / relaxed_order / strict_order
     
     # LLM Parametreleri
     MAX_CONTEXT_LENGTH = int(os.getenv('RAG_MAX_CONTEXT_LENGTH', '4000'))
@@ -24,6 +53,13 @@ class RAGConfig:
     # API Keys
     OPENAI_API_KEY = os.getenv('OPENAI_API_KEY') or getattr(settings, 'OPENROUTER_API_KEY', None)
     
+    # Sorgu embedding cache'i (process içi LRU + Django cache)
+    QUERY_EMBEDDING_CACHE_SIZE = int(os.getenv('RAG_QUERY_EMBEDDING_CACHE_SIZE', '2048'))
+    QUERY_EMBEDDING_CACHE_TTL = int(os.getenv('RAG_QUERY_EMBEDDING_CACHE_TTL', '86400'))
+    
+    # Worker başlangıcında embedding modelini yükle (AppConfig.ready)
+    WARMUP_EMBEDDINGS = os.getenv('RAG_WARMUP_EMBEDDINGS', 'False').lower() == 'true'
+    
     # Test ve Debug
     DEBUG_RAG = os.getenv('RAG_DEBUG', 'False').lower() == 'true'
     LOG_QUERIES = os.getenv('RAG_LOG_QUERIES', 'True').lower() == 'true'
@@ -42,6 +78,8 @@ class RAGConfig:
         return {
             'model': cls.EMBEDDING_MODEL,
             'dimensions': cls.EMBEDDING_DIMENSIONS,
+            'batch_size': cls.EMBEDDING_BATCH_SIZE,
+            'batch_token_budget': cls.EMBEDDING_BATCH_TOKEN_BUDGET,
             'api_key': cls.OPENAI_API_KEY
         }
     
@@ -50,7 +88,16 @@ class RAGConfig:
         """Arama ayarlarını döndürür"""
         return {
             'top_k': cls.TOP_K,
-            'similarity_threshold': cls.SIMILARITY_THRESHOLD
+            'similarity_threshold': cls.SIMILARITY_THRESHOLD,
+            'fuzzy_similarity_threshold': cls.FUZZY_SIMILARITY_THRESHOLD,
+            'mode': cls.SEARCH_MODE,
+            'hybrid_vector_weight': cls.HYBRID_VECTOR_WEIGHT,
+            'hybrid_text_weight': cls.HYBRID_TEXT_WEIGHT,
+            'hybrid_rrf_k': cls.HYBRID_RRF_K,
+            'hybrid_candidates': cls.HYBRID_CANDIDATES,
+            'hnsw_ef_search': cls.HNSW_EF_SEARCH,
+            'hnsw_iterative_scan': cls.HNSW_ITERATIVE_SCAN,
+            'vector_backend': cls.VECTOR_BACKEND
         }
     
     @classmethod
@@ -1,9 +1,16 @@
 import os
 import json
+import time
+import hashlib
 import logging
+import threading
+import functools
 import tiktoken
+import numpy as np
+from collections import OrderedDict
 from typing import List, Dict, Any, Tuple, Optional
 from django.db import connection
+from django.db.models import F
 from django.conf import settings
 from django.core.cache import cache
 from langchain.text_splitter import RecursiveCharacterTextSplitter
@@ -11,7 +18,11 @@ from openai import OpenAI
 from langchain_openai import OpenAIEmbeddings
 from langchain_community.vectorstores import PGVector
 from .rag_config import RAGConfig, EMBEDDING_MODELS
-from .models import RobotPDF, Brand
+from .models import Robot, RobotPDF, Brand, EmbeddingMigration
+from .vector_stores import (
+    VectorStore, get_vector_store, get_pgvector_tables, fuse_reciprocal_rank, to_vector_literal,
+    SHADOW_EMBEDDING_COLUMN,
+)
 import unicodedata
 import re
 
@@ -49,32 +60,187 @@ def normalize_text(text: str) -> str:
     
     return text
 
+@functools.lru_cache(maxsize=None)
+def get_token_encoding(name: str = "cl100k_base"):
+    """Process başına bir kez oluşturulan tiktoken encoder'ı"""
+    return tiktoken.get_encoding(name)
+
+
+def chunk_content_hash(text: str) -> str:
+    """Chunk metninin içerik hash'i (artımlı yeniden chunklama için)"""
+    return hashlib.sha256(text.encode('utf-8')).hexdigest()
+
+
+def embedding_text_hash(text: str) -> str:
+    """Embedding store anahtarı: normalize edilmiş metnin sha256'sı"""
+    return hashlib.sha256(normalize_text(text).encode('utf-8')).hexdigest()
+
+
+def get_embedding_model_config(model_name: str) -> Dict[str, Any]:
+    """Model konfigürasyonunu al"""
+    for key, config in EMBEDDING_MODELS.items():
+        if config['model'] == model_name:
+            return config
+    # Listede olmayan (ör. geçiş hedefi) modeller: OpenAI adı değilse SentenceTransformer
+    if model_name and not model_name.startswith('text-embedding-'):
+        return {
+            **EMBEDDING_MODELS['sentence_transformer'],
+            'model': model_name,
+            'dimensions': RAGConfig.EMBEDDING_DIMENSIONS,
+            'name': f'Sentence Transformer ({model_name})'
+        }
+    # Varsayılan OpenAI small
+    return EMBEDDING_MODELS['openai_small']
+
+
+# 🧠 Process başına model kaydı: model adı -> SentenceTransformer / OpenAI client
+_embedding_models: Dict[str, Any] = {}
+_embedding_models_lock = threading.Lock()
+
+
+def get_embedding_model(model_name: str = None):
+    """
+    Embedding modelini process genelinde tek sefer yükle ve paylaş.
+    OpenAI modelleri için client, diğerleri için SentenceTransformer döner.
+    """
+    model_name = model_name or RAGConfig.EMBEDDING_MODEL
+
+    model = _embedding_models.get(model_name)
+    if model is not None:
+        return model
+
+    with _embedding_models_lock:
+        model = _embedding_models.get(model_name)
+        if model is None:
+            config = get_embedding_model_config(model_name)
+            if 'openai' in config['name'].lower():
+                model = OpenAI(api_key=RAGConfig.OPENAI_API_KEY)
+            else:
+                # Sentence Transformer için (diskten yükleme pahalı, bir kez yapılır)
+                from sentence_transformers import SentenceTransformer
+                logger.info(f"🧠 Embedding modeli yükleniyor: {model_name}")
+                model = SentenceTransformer(model_name)
+            _embedding_models[model_name] = model
+        return model
+
+
+def warm_up_embedding_models(model_names: List[str] = None):
+    """Worker başlangıcında modelleri yükle ve ilk encode maliyetini öde"""
+    for model_name in model_names or [RAGConfig.EMBEDDING_MODEL]:
+        try:
+            EmbeddingService(model_name).create_embedding("warm-up")
+            logger.info(f"🔥 Embedding modeli hazır: {model_name}")
+        except Exception as e:
+            logger.error(f"Embedding modeli ısıtılamadı ({model_name}): {e}")
+
+
+class QueryEmbeddingCache:
+    """
+    Sorgu embedding'leri için iki katmanlı cache:
+    1. Process içi LRU (boyut + TTL sınırlı)
+    2. Django cache backend'i (worker'lar arası paylaşılan)
+    Anahtar: model adı + embedding'i çıkarılan sorgu metninin kendisi.
+    """
+
+    # v2: anahtar ham sorgu metni (v1 normalize metindi; eski kayıtlar okunmaz)
+    KEY_PREFIX = 'rag:qemb:v2'
+
+    def __init__(self, max_size: int = None, ttl: int = None):
+        self.max_size = max_size or RAGConfig.QUERY_EMBEDDING_CACHE_SIZE
+        self.ttl = ttl or RAGConfig.QUERY_EMBEDDING_CACHE_TTL
+        self._local: "OrderedDict[str, Tuple[float, List[float]]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.local_hits = 0
+        self.shared_hits = 0
+        self.misses = 0
+
+    def make_key(self, model_name: str, text: str) -> str:
+        digest = hashlib.sha1(text.encode('utf-8')).hexdigest()
+        return f"{self.KEY_PREFIX}:{model_name}:{digest}"
+
+    def get(self, model_name: str, text: str) -> Optional[List[float]]:
+        key = self.make_key(model_name, text)
+        now = time.monotonic()
+
+        with self._lock:
+            entry = self._local.get(key)
+            if entry is not None:
+                expires_at, embedding = entry
+                if expires_at > now:
+                    self._local.move_to_end(key)
+                    self.local_hits += 1
+                    return embedding
+                del self._local[key]
+
+        try:
+            embedding = cache.get(key)
+        except Exception as e:
+            logger.warning(f"Embedding cache okunamadı: {e}")
+            embedding = None
+
+        with self._lock:
+            if embedding is None:
+                self.misses += 1
+                return None
+            self.shared_hits += 1
+            self._store_local(key, embedding, now)
+        return embedding
+
+    def set(self, model_name: str, text: str, embedding: List[float]):
+        key = self.make_key(model_name, text)
+        with self._lock:
+            self._store_local(key, embedding, time.monotonic())
+        try:
+            cache.set(key, embedding, self.ttl)
+        except Exception as e:
+            logger.warning(f"Embedding cache yazılamadı: {e}")
+
+    def _store_local(self, key: str, embedding: List[float], now: float):
+        self._local[key] = (now + self.ttl, embedding)
+        self._local.move_to_end(key)
+        while len(self._local) > self.max_size:
+            self._local.popitem(last=False)
+
+    def clear(self):
+        """Process içi katmanı ve sayaçları sıfırla"""
+        with self._lock:
+            self._local.clear()
+            self.local_hits = self.shared_hits = self.misses = 0
+
+    def get_stats(self) -> Dict[str, Any]:
+        with self._lock:
+            lookups = self.local_hits + self.shared_hits + self.misses
+            return {
+                'local_hits': self.local_hits,
+                'shared_hits': self.shared_hits,
+                'misses': self.misses,
+                'hit_rate': round((self.local_hits + self.shared_hits) / lookups, 3) if lookups else 0.0,
+                'local_size': len(self._local),
+                'max_size': self.max_size,
+                'ttl': self.ttl,
+            }
+
+
+query_embedding_cache = QueryEmbeddingCache()
+
+
 class EmbeddingService:
     """Embedding oluşturma ve yönetimi servisi"""
     
     def __init__(self, model_name: str = None):
         self.model_name = model_name or RAGConfig.EMBEDDING_MODEL
-        self.model_config = self._get_model_config()
+        self.model_config = get_embedding_model_config(self.model_name)
         self.client = None
         self.sentence_model = None
         self._initialize_model()
     
-    def _get_model_config(self):
-        """Model konfigürasyonunu al"""
-        for key, config in EMBEDDING_MODELS.items():
-            if config['model'] == self.model_name:
-                return config
-        # Varsayılan OpenAI small
-        return EMBEDDING_MODELS['openai_small']
-    
     def _initialize_model(self):
-        """Model'i başlat"""
+        """Paylaşılan model kaydından modeli al"""
+        model = get_embedding_model(self.model_name)
         if 'openai' in self.model_config['name'].lower():
-            self.client = OpenAI(api_key=RAGConfig.OPENAI_API_KEY)
+            self.client = model
         else:
-            # Sentence Transformer için
-            from sentence_transformers import SentenceTransformer
-            self.sentence_model = SentenceTransformer(self.model_name)
+            self.sentence_model = model
     
     def create_embedding(self, text: str) -> List[float]:
         """Tekst için embedding oluştur"""
@@ -95,13 +261,60 @@ class EmbeddingService:
             logger.error(f"Embedding oluşturma hatası: {e}")
             raise
     
-    def create_embeddings_batch(self, texts: List[str]) -> List[List[float]]:
-        """Toplu embedding oluştur"""
-        embeddings = []
+    def create_embeddings_batch(self, texts: List[str], batch_size: int = None) -> np.ndarray:
+        """
+        Toplu embedding oluştur.
+        Metinler hem adet (batch_size) hem token bütçesine göre gruplanır; her grup
+        tek bir API çağrısı / encode geçişidir. Sonuç (len(texts), dim) float32 matristir.
+        """
+        if not texts:
+            return np.zeros((0, self.model_config['dimensions']), dtype=np.float32)
+
+        batch_size = batch_size or RAGConfig.EMBEDDING_BATCH_SIZE
+        matrices = []
+
+        try:
+            for batch in self._split_batches(texts, batch_size):
+                if self.client:
+                    # OpenAI: tek istekte input=[...] (boş string kabul edilmez)
+                    response = self.client.embeddings.create(
+                        model=self.model_name,
+                        input=[text or " " for text in batch]
+                    )
+                    rows = [item.embedding for item in sorted(response.data, key=lambda item: item.index)]
+                    matrices.append(np.asarray(rows, dtype=np.float32))
+                else:
+                    # Sentence Transformer: tek encode çağrısı, NumPy matris döner
+                    matrix = self.sentence_model.encode(
+                        batch,
+                        batch_size=batch_size,
+                        convert_to_numpy=True,
+                        show_progress_bar=False
+                    )
+                    matrices.append(matrix.astype(np.float32, copy=False))
+
+        except Exception as e:
+            logger.error(f"Toplu embedding oluşturma hatası: {e}")
+            raise
+
+        return np.vstack(matrices)
+
+    def _split_batches(self, texts: List[str], batch_size: int):
+        """Metinleri batch_size ve RAGConfig.EMBEDDING_BATCH_TOKEN_BUDGET sınırına göre böl"""
+        token_budget = RAGConfig.EMBEDDING_BATCH_TOKEN_BUDGET
+        encoding = get_token_encoding()
+
+        batch, batch_tokens = [], 0
         for text in texts:
-            embedding = self.create_embedding(text)
-            embeddings.append(embedding)
-        return embeddings
+            text_tokens = len(encoding.encode(text or ""))
+            if batch and (len(batch) >= batch_size or batch_tokens + text_tokens > token_budget):
+                yield batch
+                batch, batch_tokens = [], 0
+            batch.append(text)
+            batch_tokens += text_tokens
+
+        if batch:
+            yield batch
 
 class ChunkingService:
     """PDF chunklama servisi"""
@@ -110,8 +323,8 @@ class ChunkingService:
         self.chunk_size = chunk_size or RAGConfig.CHUNK_SIZE
         self.chunk_overlap = chunk_overlap or RAGConfig.CHUNK_OVERLAP
         
-        # Token sayısı için tiktoken
-        self.encoding = tiktoken.get_encoding("cl100k_base")
+        # Token sayısı için tiktoken (paylaşılan encoder)
+        self.encoding = get_token_encoding()
         
         # LangChain text splitter
         self.text_splitter = RecursiveCharacterTextSplitter(
@@ -145,100 +358,197 @@ class ChunkingService:
         
         return result
 
+def build_pdf_chunks(robot_pdf: RobotPDF, scenario: str = 'medium', chunking_service: 'ChunkingService' = None) -> Tuple[List[Dict[str, Any]], Dict[str, Any]]:
+    """PDF içeriğini senaryo ayarlarıyla chunk'la, (chunks, metadata) döndür"""
+    from .rag_config import CHUNK_SCENARIOS
+    
+    # Senaryo ayarlarını al
+    if scenario in CHUNK_SCENARIOS:
+        chunk_config = CHUNK_SCENARIOS[scenario]
+        chunking_service = ChunkingService(
+            chunk_size=chunk_config['chunk_size'],
+            chunk_overlap=chunk_config['chunk_overlap']
+        )
+    else:
+        chunking_service = chunking_service or ChunkingService()
+    
+    # Metadata hazırla
+    metadata = {
+        'pdf_id': robot_pdf.id,
+        'pdf_name': robot_pdf.dosya_adi,
+        'pdf_type': robot_pdf.pdf_type,
+        'robot_id': robot_pdf.robot_id,
+        'scenario': scenario
+    }
+    
+    # Chunk'la
+    chunks = chunking_service.chunk_text(
+        robot_pdf.pdf_icerigi or '', 
+        metadata
+    )
+    return chunks, metadata
+
+
+_active_migrations = {}
+_active_migrations_lock = threading.Lock()
+
+
+def get_active_migration(robot=None) -> Optional[EmbeddingMigration]:
+    """
+    Devam eden embedding geçişi. Robot verilirse sonuç robotun context_version'ı ile
+    süreç içinde cache'lenir; migrate_embedding_model geçişi başlatırken, bitirirken
+    ve iptal ederken tüm robotların versiyonunu artırır.
+    """
+    if robot is None:
+        return EmbeddingMigration.get_active()
+
+    cached = _active_migrations.get(robot.id)
+    if cached is not None and cached[0] == robot.context_version:
+        return cached[1]
+
+    migration = EmbeddingMigration.get_active()
+    with _active_migrations_lock:
+        _active_migrations[robot.id] = (robot.context_version, migration)
+    return migration
+
+
+def get_embedding_plan(robot_id: int = None, robot: Robot = None) -> Dict[str, Any]:
+    """
+    Robotun okuma/yazma embedding planı:
+    read_model/read_column/vector_encoding aramada, write_model/shadow_model chunk
+    yazarken kullanılır. Geçiş yoksa her şey RAGConfig.EMBEDDING_MODEL ve `embedding`
+    kolonudur. Chat akışı yüklü robotu verir; bu durumda sorgu atılmaz.
+    """
+    if robot is None and robot_id is not None:
+        robot = Robot.objects.filter(pk=robot_id).only(
+            'id', 'context_version', 'embedding_model', 'vector_encoding'
+        ).first()
+    migration = get_active_migration(robot)
+    vector_encoding = robot.vector_encoding if robot is not None else 'full'
+    if migration is None:
+        return {
+            'read_model': RAGConfig.EMBEDDING_MODEL,
+            'read_column': 'embedding',
+            'write_model': RAGConfig.EMBEDDING_MODEL,
+            'shadow_model': None,
+            'vector_encoding': vector_encoding,
+        }
+
+    # Geçiş sürerken birincil kolon kaynak modelde kalır, yeni chunk'lar gölge kolona da yazılır
+    flipped = robot is not None and robot.embedding_model == migration.target_model
+    return {
+        'read_model': migration.target_model if flipped else migration.source_model,
+        'read_column': SHADOW_EMBEDDING_COLUMN if flipped else 'embedding',
+        'write_model': migration.source_model,
+        'shadow_model': migration.target_model,
+        'vector_encoding': vector_encoding,
+    }
+
+
 class VectorSearchService:
-    """Vektör arama servisi"""
+    """Vektör arama servisi (chunk'lar RAGConfig.VECTOR_BACKEND deposunda tutulur)"""
     
-    def __init__(self):
-        self.embedding_service = EmbeddingService()
+    def __init__(self, embedding_service: EmbeddingService = None, store: VectorStore = None):
+        self.embedding_service = embedding_service or EmbeddingService()
+        self.store = store or get_vector_store()
+        self._embedding_services = {self.embedding_service.model_name: self.embedding_service}
     
+    def get_embedding_service(self, model_name: str) -> EmbeddingService:
+        """Model adına göre EmbeddingService (model geçişinde iki model birlikte kullanılır)"""
+        service = self._embedding_services.get(model_name)
+        if service is None:
+            service = self._embedding_services[model_name] = EmbeddingService(model_name)
+        return service
+    
+    def resolve_read_embedding(self, robot_id: int = None, robot: Robot = None) -> Tuple[EmbeddingService, Dict[str, Any]]:
+        """Arama için (embedding servisi, depoya geçilecek ek argümanlar)"""
+        if not getattr(self.store, 'supports_embedding_migration', False):
+            return self.embedding_service, {}
+        
+        plan = get_embedding_plan(robot_id, robot)
+        store_kwargs = {'vector_encoding': plan['vector_encoding']}
+        if plan['read_column'] != 'embedding':
+            store_kwargs['embedding_column'] = plan['read_column']
+        return self.get_embedding_service(plan['read_model']), store_kwargs
+    
+    def get_query_embedding(self, query: str, embedding_service: EmbeddingService = None) -> List[float]:
+        """Sorgunun hibrit embedding'i (tekrarlanan sorular cache'ten gelir)"""
+        embedding_service = embedding_service or self.embedding_service
+        model_name = embedding_service.model_name
+        cached = query_embedding_cache.get(model_name, query)
+        if cached is not None:
+            return cached
+
+        # Query'yi normalize et (Türkçe karakter sorunu için)
+        normalized_query = normalize_text(query)
+        
+        # Orijinal ve normalize query tek istekte; ikisi aynıysa tek embedding yeter
+        texts = [query] if normalized_query == query else [query, normalized_query]
+        embeddings = embedding_service.create_embeddings_batch(texts)
+        
+        # İki embedding'in ortalamasını al (hibrit yaklaşım)
+        hybrid_embedding = embeddings.mean(axis=0).tolist()
+
+        query_embedding_cache.set(model_name, query, hybrid_embedding)
+        return hybrid_embedding
+
     def search_similar_chunks(
         self, 
         query: str, 
         robot_pdf_ids: List[int] = None,
         top_k: int = None,
-        similarity_threshold: float = None
+        similarity_threshold: float = None,
+        robot_id: int = None,
+        robot: Robot = None
     ) -> List[Dict[str, Any]]:
         """Benzer chunk'ları ara"""
         
         top_k = top_k or RAGConfig.TOP_K
         similarity_threshold = similarity_threshold or RAGConfig.SIMILARITY_THRESHOLD
+        embedding_service, store_kwargs = self.resolve_read_embedding(robot_id, robot)
         
-        # Query'yi normalize et (Türkçe karakter sorunu için)
-        normalized_query = normalize_text(query)
-        
-        # Hem orijinal hem de normalize edilmiş query ile ara
-        query_embedding = self.embedding_service.create_embedding(query)
-        normalized_embedding = self.embedding_service.create_embedding(normalized_query)
-        
-        # İki embedding'in ortalamasını al (hibrit yaklaşım)
-        hybrid_embedding = [(a + b) / 2 for a, b in zip(query_embedding, normalized_embedding)]
-        
-        with connection.cursor() as cursor:
-            if robot_pdf_ids:
-                cursor.execute("""
-                    SELECT * FROM search_similar_chunks(
-                        %s::vector, %s, %s, %s
-                    )
-                """, [hybrid_embedding, robot_pdf_ids, top_k, similarity_threshold])
-            else:
-                cursor.execute("""
-                    SELECT * FROM search_similar_chunks(
-                        %s::vector, NULL, %s, %s
-                    )
-                """, [hybrid_embedding, top_k, similarity_threshold])
-            
-            columns = [desc[0] for desc in cursor.description]
-            results = []
-            
-            for row in cursor.fetchall():
-                result = dict(zip(columns, row))
-                results.append(result)
-            
-            return results
+        return self.store.knn(
+            self.get_query_embedding(query, embedding_service),
+            robot_id=robot_id,
+            robot_pdf_ids=robot_pdf_ids,
+            top_k=top_k,
+            similarity_threshold=similarity_threshold,
+            **store_kwargs
+        )
     
     def search_fuzzy_chunks(
         self, 
         query: str, 
         robot_pdf_ids: List[int] = None,
         top_k: int = 10,
-        similarity_threshold: float = 0.3
+        similarity_threshold: float = 0.3,
+        robot_id: int = None
     ) -> List[Dict[str, Any]]:
         """Fuzzy text search ile chunk ara (embedding bulamadığında fallback)"""
         
         # Query'yi normalize et
         normalized_query = normalize_text(query)
         
-        with connection.cursor() as cursor:
-            if robot_pdf_ids:
-                cursor.execute("""
-                    SELECT * FROM search_fuzzy_chunks(
-                        %s, %s, %s, %s
-                    )
-                """, [normalized_query, robot_pdf_ids, top_k, similarity_threshold])
-            else:
-                cursor.execute("""
-                    SELECT * FROM search_fuzzy_chunks(
-                        %s, NULL, %s, %s
-                    )
-                """, [normalized_query, top_k, similarity_threshold])
-            
-            columns = [desc[0] for desc in cursor.description]
-            results = []
-            
-            for row in cursor.fetchall():
-                result = dict(zip(columns, row))
-                # Consistency için similarity field'ını ekle
-                result['similarity'] = result.get('text_similarity', 0.0)
-                results.append(result)
-            
-            return results
+        results = self.store.text_search(
+            normalized_query,
+            robot_id=robot_id,
+            robot_pdf_ids=robot_pdf_ids,
+            top_k=top_k,
+            similarity_threshold=similarity_threshold
+        )
+        for result in results:
+            # Consistency için similarity field'ını ekle
+            result['similarity'] = result.get('text_similarity', 0.0)
+        return results
 
     def search_with_fallback(
         self, 
         query: str, 
         robot_pdf_ids: List[int] = None,
         top_k: int = None,
-        similarity_threshold: float = None
+        similarity_threshold: float = None,
+        robot_id: int = None,
+        robot: Robot = None
     ) -> List[Dict[str, Any]]:
         """Önce vector search, sonuçsuzsa fuzzy search (Türkçe karakter sorunları için)"""
         
@@ -247,7 +557,9 @@ class VectorSearchService:
             query=query,
             robot_pdf_ids=robot_pdf_ids,
             top_k=top_k,
-            similarity_threshold=similarity_threshold
+            similarity_threshold=similarity_threshold,
+            robot_id=robot_id,
+            robot=robot
         )
         
         # Eğer yeterli sonuç varsa vector search sonuçlarını döndür
@@ -261,7 +573,8 @@ class VectorSearchService:
             query=query,
             robot_pdf_ids=robot_pdf_ids,
             top_k=top_k or 10,
-            similarity_threshold=0.2  # Daha düşük threshold
+            similarity_threshold=RAGConfig.FUZZY_SIMILARITY_THRESHOLD,  # Daha düşük threshold
+            robot_id=robot_id
         )
         
         # Her iki sonucu birleştir ve tekrarları temizle
@@ -280,84 +593,187 @@ class VectorSearchService:
         final_top_k = top_k or RAGConfig.TOP_K
         return all_results[:final_top_k]
     
-    def store_chunks(self, robot_pdf_id: int, chunks: List[Dict[str, Any]]):
-        """Chunk'ları veritabanına kaydet"""
+    def search_hybrid(
+        self, 
+        query: str, 
+        robot_pdf_ids: List[int] = None,
+        top_k: int = None,
+        similarity_threshold: float = None,
+        robot_id: int = None,
+        robot: Robot = None
+    ) -> List[Dict[str, Any]]:
+        """
+        Vektör + trigram aramasını reciprocal-rank fusion ile birleştir.
+        pgvector tek SQL çağrısında yapar; diğer depolarda iki arama Python'da birleştirilir.
+        """
+        
+        top_k = top_k or RAGConfig.TOP_K
+        similarity_threshold = similarity_threshold or RAGConfig.SIMILARITY_THRESHOLD
+        
+        embedding_service, store_kwargs = self.resolve_read_embedding(robot_id, robot)
+        hybrid_embedding = self.get_query_embedding(query, embedding_service)
+        normalized_query = normalize_text(query)
+        
+        if hasattr(self.store, 'hybrid_search'):
+            return self.store.hybrid_search(
+                hybrid_embedding,
+                normalized_query,
+                robot_id=robot_id,
+                robot_pdf_ids=robot_pdf_ids,
+                top_k=top_k,
+                similarity_threshold=similarity_threshold,
+                **store_kwargs
+            )
+        
+        candidates = max(RAGConfig.HYBRID_CANDIDATES, top_k)
+        vector_results = self.store.knn(
+            hybrid_embedding, robot_id=robot_id, robot_pdf_ids=robot_pdf_ids,
+            top_k=candidates, similarity_threshold=similarity_threshold, **store_kwargs
+        )
+        text_results = self.store.text_search(
+            normalized_query, robot_id=robot_id, robot_pdf_ids=robot_pdf_ids,
+            top_k=candidates, similarity_threshold=RAGConfig.FUZZY_SIMILARITY_THRESHOLD
+        )
+        return fuse_reciprocal_rank(vector_results, text_results, top_k)
+    
+    def search(
+        self, 
+        query: str, 
+        robot_pdf_ids: List[int] = None,
+        top_k: int = None,
+        similarity_threshold: float = None,
+        robot_id: int = None,
+        robot: Robot = None
+    ) -> List[Dict[str, Any]]:
+        """RAGConfig.SEARCH_MODE'a göre hibrit ya da fallback arama"""
+        if RAGConfig.SEARCH_MODE == 'hybrid':
+            return self.search_hybrid(query, robot_pdf_ids, top_k, similarity_threshold, robot_id, robot)
+        return self.search_with_fallback(query, robot_pdf_ids, top_k, similarity_threshold, robot_id, robot)
+    
+    def store_chunks(self, robot_pdf_id: int, chunks: List[Dict[str, Any]]) -> Dict[str, int]:
+        """
+        Chunk'ları depoya artımlı kaydet.
+        Yeni chunk seti, content_hash üzerinden kayıtlı setle karşılaştırılır: yalnızca
+        yeni/değişen chunk'lar embed edilip yazılır, kaybolanlar silinir, aynı kalanların
+        sadece sırası/metadata'sı güncellenir.
+        """
         if not chunks:
-            return
+            return {'inserted': 0, 'updated': 0, 'deleted': 0, 'unchanged': 0}
         
-        # Önce mevcut chunk'ları sil
-        with connection.cursor() as cursor:
-            cursor.execute(
-                "DELETE FROM pdf_chunks WHERE robot_pdf_id = %s",
-                [robot_pdf_id]
+        # Robot filtreli arama için robot_id chunk satırlarına denormalize edilir
+        robot_id = RobotPDF.objects.filter(pk=robot_pdf_id).values_list('robot_id', flat=True).first()
+        
+        hashed_chunks = [{**chunk, 'content_hash': chunk_content_hash(chunk['text'])} for chunk in chunks]
+        
+        migration = (
+            EmbeddingMigration.get_active()
+            if getattr(self.store, 'supports_embedding_migration', False) else None
+        )
+        if migration is not None:
+            # Model geçişi: birincil kolon kaynak modelle, gölge kolon hedef modelle yazılır
+            write_service = self.get_embedding_service(migration.source_model)
+            shadow_service = self.get_embedding_service(migration.target_model)
+            stats = self.store.upsert(
+                robot_pdf_id, robot_id, hashed_chunks,
+                lambda texts: self.embed_chunk_texts(texts, write_service),
+                shadow_embed=lambda texts: self.embed_chunk_texts(texts, shadow_service)
             )
+        else:
+            stats = self.store.upsert(robot_pdf_id, robot_id, hashed_chunks, self.embed_chunk_texts)
         
-        # Yeni chunk'ları ekle
-        for chunk in chunks:
-            # Hem orijinal hem de normalize edilmiş text için embedding oluştur
-            original_text = chunk['text']
-            normalized_text = normalize_text(original_text)
-            
-            # Hibrit embedding oluştur
-            original_embedding = self.embedding_service.create_embedding(original_text)
-            normalized_embedding = self.embedding_service.create_embedding(normalized_text)
-            embedding = [(a + b) / 2 for a, b in zip(original_embedding, normalized_embedding)]
-            
-            with connection.cursor() as cursor:
-                cursor.execute("""
-                    INSERT INTO pdf_chunks 
-                    (robot_pdf_id, chunk_text, chunk_index, embedding, metadata)
-                    VALUES (%s, %s, %s, %s::vector, %s)
-                """, [
-                    robot_pdf_id,
-                    chunk['text'],
-                    chunk['chunk_index'],
-                    embedding,
-                    json.dumps(chunk['metadata'])
-                ])
+        if robot_id is not None and (stats['inserted'] or stats['updated'] or stats['deleted']):
+            # Chunk'lar değişti: bellek içi indeksler ve bağlam paketleri yenilensin
+            Robot.objects.filter(pk=robot_id).update(context_version=F('context_version') + 1)
+        
+        logger.info(f"PDF ID {robot_pdf_id} chunk senkronizasyonu ({self.store.name}): {stats}")
+        return stats
+    
+    def embed_chunk_texts(self, texts: List[str], embedding_service: EmbeddingService = None) -> np.ndarray:
+        """
+        Orijinal + normalize metinlerin hibrit (ortalama) embedding matrisi.
+        embedding_store varsa önce ona bakılır; yalnızca filoda ilk kez görülen metinler encode edilir.
+        """
+        embedding_service = embedding_service or self.embedding_service
+        if 'embedding_store' not in get_pgvector_tables():
+            return self.encode_hybrid(texts, embedding_service)
+        
+        model_name = embedding_service.model_name
+        hashes = [embedding_text_hash(text) for text in texts]
+        stored = self._load_stored_embeddings(model_name, set(hashes))
+        
+        # Aynı metin birden çok kez geçebilir; her benzersiz hash bir kez encode edilir
+        missing: Dict[str, str] = {}
+        for text, text_hash in zip(texts, hashes):
+            if text_hash not in stored and text_hash not in missing:
+                missing[text_hash] = text
+        
+        if missing:
+            computed = self.encode_hybrid(list(missing.values()), embedding_service)
+            new_rows = dict(zip(missing.keys(), computed))
+            self._save_stored_embeddings(model_name, new_rows)
+            stored.update(new_rows)
+        
+        logger.info(
+            f"Embedding store: {len(texts)} metin, {len(texts) - len(missing)} hazır, {len(missing)} yeni encode"
+        )
+        return np.vstack([stored[text_hash] for text_hash in hashes])
+    
+    def encode_hybrid(self, texts: List[str], embedding_service: EmbeddingService = None) -> np.ndarray:
+        """Orijinal ve normalize metin embedding'lerinin ortalaması (depoya bakmadan)"""
+        embedding_service = embedding_service or self.embedding_service
+        normalized_texts = [normalize_text(text) for text in texts]
+        # Orijinal ve normalize metinler aynı batch'lerde gönderilir
+        embeddings = embedding_service.create_embeddings_batch(texts + normalized_texts)
+        return (embeddings[:len(texts)] + embeddings[len(texts):]) / 2
+    
+    def _load_stored_embeddings(self, model_name: str, hashes: set) -> Dict[str, np.ndarray]:
+        """embedding_store'dan hash -> vektör eşlemesini oku"""
+        if not hashes:
+            return {}
+        with connection.cursor() as cursor:
+            cursor.execute("""
+                SELECT text_hash, embedding::text
+                FROM embedding_store
+                WHERE model_name = %s AND text_hash = ANY(%s)
+            """, [model_name, list(hashes)])
+            return {
+                text_hash: np.asarray(json.loads(embedding), dtype=np.float32)
+                for text_hash, embedding in cursor.fetchall()
+            }
+    
+    def _save_stored_embeddings(self, model_name: str, embeddings: Dict[str, np.ndarray]):
+        """Yeni hesaplanan vektörleri embedding_store'a yaz (çakışmada mevcut kalır)"""
+        with connection.cursor() as cursor:
+            cursor.executemany("""
+                INSERT INTO embedding_store (text_hash, model_name, embedding)
+                VALUES (%s, %s, %s::vector)
+                ON CONFLICT (text_hash, model_name) DO NOTHING
+            """, [
+                (text_hash, model_name, to_vector_literal(embedding))
+                for text_hash, embedding in embeddings.items()
+            ])
 
 class RAGService:
     """Ana RAG servisi - tüm bileşenleri koordine eder"""
     
     def __init__(self):
         self.chunking_service = ChunkingService()
-        self.vector_service = VectorSearchService()
         self.embedding_service = EmbeddingService()
+        self.vector_service = VectorSearchService(self.embedding_service)
+    
+    def build_chunks(self, robot_pdf: RobotPDF, scenario: str = 'medium') -> Tuple[List[Dict[str, Any]], Dict[str, Any]]:
+        """PDF içeriğini senaryo ayarlarıyla chunk'la, (chunks, metadata) döndür"""
+        return build_pdf_chunks(robot_pdf, scenario, self.chunking_service)
     
     def process_pdf(self, robot_pdf: RobotPDF, scenario: str = 'medium') -> Dict[str, Any]:
         """PDF'i işle ve chunk'la"""
-        from .rag_config import CHUNK_SCENARIOS
-        
         if not robot_pdf.pdf_icerigi:
             return {
                 'success': False,
                 'error': 'PDF içeriği bulunamadı'
             }
         
-        # Senaryo ayarlarını al
-        if scenario in CHUNK_SCENARIOS:
-            chunk_config = CHUNK_SCENARIOS[scenario]
-            chunking_service = ChunkingService(
-                chunk_size=chunk_config['chunk_size'],
-                chunk_overlap=chunk_config['chunk_overlap']
-            )
-        else:
-            chunking_service = self.chunking_service
-        
-        # Metadata hazırla
-        metadata = {
-            'pdf_id': robot_pdf.id,
-            'pdf_name': robot_pdf.dosya_adi,
-            'pdf_type': robot_pdf.pdf_type,
-            'robot_id': robot_pdf.robot.id,
-            'scenario': scenario
-        }
-        
-        # Chunk'la
-        chunks = chunking_service.chunk_text(
-            robot_pdf.pdf_icerigi, 
-            metadata
-        )
+        chunks, metadata = self.build_chunks(robot_pdf, scenario)
         
         if not chunks:
             return {
@@ -367,11 +783,12 @@ class RAGService:
         
         # Veritabanına kaydet
         try:
-            self.vector_service.store_chunks(robot_pdf.id, chunks)
+            sync_stats = self.vector_service.store_chunks(robot_pdf.id, chunks)
             
             return {
                 'success': True,
                 'chunks_count': len(chunks),
+                'sync_stats': sync_stats,
                 'scenario': scenario,
                 'metadata': metadata
             }
@@ -387,25 +804,31 @@ class RAGService:
         self, 
         query: str, 
         robot_id: int,
-        max_context_length: int = None
+        max_context_length: int = None,
+        robot: Robot = None
     ) -> Tuple[str, List[Dict[str, Any]]]:
-        """Sorgu için alakalı context'i al"""
+        """Sorgu için alakalı context'i al (yüklü robot verilirse embedding planı sorgusuz çözülür)"""
         
         max_context_length = max_context_length or RAGConfig.MAX_CONTEXT_LENGTH
         
-        # Robot'un PDF'lerini al
-        robot_pdfs = RobotPDF.objects.filter(
-            robot_id=robot_id, 
-            is_active=True
-        ).values_list('id', flat=True)
+        # Robot'un PDF'lerini al (citation bilgileri de bu tek sorgudan gelir)
+        robot_pdfs = {
+            pdf.id: pdf
+            for pdf in RobotPDF.objects.filter(
+                robot_id=robot_id, 
+                is_active=True
+            ).only('id', 'dosya_adi', 'pdf_type')
+        }
         
         if not robot_pdfs:
             return "Bu robot için aktif PDF bulunamadı.", []
         
-        # Benzer chunk'ları ara (fallback ile)
-        similar_chunks = self.vector_service.search_with_fallback(
+        # Benzer chunk'ları ara (varsayılan: tek sorguda hibrit RRF)
+        similar_chunks = self.vector_service.search(
             query=query,
-            robot_pdf_ids=list(robot_pdfs)
+            robot_pdf_ids=list(robot_pdfs),
+            robot_id=robot_id,
+            robot=robot
         )
         
         if not similar_chunks:
@@ -415,7 +838,7 @@ class RAGService:
         context_parts = []
         citations = []
         total_tokens = 0
-        encoding = tiktoken.get_encoding("cl100k_base")
+        encoding = get_token_encoding()
         
         for chunk in similar_chunks:
             chunk_text = chunk['chunk_text']
@@ -424,8 +847,10 @@ class RAGService:
             if total_tokens + chunk_tokens > max_context_length:
                 break
             
-            # Citation bilgisi ekle
-            robot_pdf = RobotPDF.objects.get(id=chunk['robot_pdf_id'])
+            # Citation bilgisi ekle (önceden yüklenen PDF'lerden, ek sorgu yok)
+            robot_pdf = robot_pdfs.get(chunk['robot_pdf_id'])
+            if robot_pdf is None:
+                continue
             
             citation = {
                 'source': robot_pdf.dosya_adi,
@@ -450,17 +875,13 @@ class RAGService:
         
         if RAGConfig.DEBUG_RAG:
             logger.info(f"RAG Context oluşturuldu: {len(citations)} chunk, {total_tokens} token")
+            logger.info(f"Sorgu embedding cache: {query_embedding_cache.get_stats()}")
         
         return context, citations
     
     def delete_chunks_for_pdf(self, robot_pdf_id: int) -> int:
         """Belirli bir PDF'e ait tüm chunk'ları sil"""
-        with connection.cursor() as cursor:
-            cursor.execute(
-                "DELETE FROM pdf_chunks WHERE robot_pdf_id = %s",
-                [robot_pdf_id]
-            )
-            deleted_count = cursor.rowcount
+        deleted_count = self.vector_service.store.delete_by_pdf(robot_pdf_id)
         
         logger.info(f"PDF ID {robot_pdf_id} için {deleted_count} chunk silindi")
         return deleted_count
@@ -477,14 +898,7 @@ class RAGService:
     
     def update_pdf_type_metadata(self, robot_pdf_id: int, new_pdf_type: str) -> int:
         """PDF chunk'larında type metadata'sını güncelle"""
-        with connection.cursor() as cursor:
-            cursor.execute("""
-                UPDATE pdf_chunks 
-                SET metadata = jsonb_set(metadata, '{pdf_type}', %s)
-                WHERE robot_pdf_id = %s
-            """, [json.dumps(new_pdf_type), robot_pdf_id])
-            
-            updated_count = cursor.rowcount
+        updated_count = self.vector_service.store.set_pdf_type(robot_pdf_id, new_pdf_type)
         
         logger.info(f"PDF ID {robot_pdf_id} için {updated_count} chunk metadata'sı güncellendi")
         return updated_count
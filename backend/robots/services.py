@@ -1,5 +1,6 @@
 import os
 import io
+import re
 from django.conf import settings
 from django.utils.text import slugify
 from google.oauth2.service_account import Credentials
@@ -22,6 +23,7 @@ try:
     import PyPDF2
 except ImportError:
     PyPDF2 = None
+from .pdf_text import extract_text_from_pdf_stream, iter_pdf_pages_text  # noqa: F401 (geriye dönük import yolu)
 
 # Hata ayıklama ve bilgilendirme için logger yapılandırması
 logger = logging.getLogger(__name__)
@@ -61,29 +63,20 @@ def download_pdf_content_from_drive(gdrive_file_id):
         logger.error(f"Drive'dan dosya indirilirken hata oluştu: {error}")
         return None
 
-def extract_text_from_pdf_stream(pdf_stream):
-    """Bir PDF dosya akışından metin içeriğini pdfplumber kullanarak çıkarır."""
-    text_content = []
-    try:
-        with pdfplumber.open(pdf_stream) as pdf:
-            for page in pdf.pages:
-                text = page.extract_text()
-                if text:
-                    text_content.append(text)
-        return "\n".join(text_content)
-    except Exception as e:
-        logger.error(f"PDF'ten metin çıkarılırken pdfplumber ile hata oluştu: {e}")
-        return ""
-
 def get_robot_pdf_contents_for_ai(robot):
+    """Standart PDF bağlamı; önbellekteki versiyonlu paketten döner"""
+    return get_robot_context_bundle(robot, 'standard')
+
+def build_robot_pdf_contents_for_ai(robot):
     """
     Bir robotun tüm aktif PDF'lerinin içeriğini veritabanından, belirli bir öncelik sırasına göre alır
     ve yapay zeka için biçimlendirilmiş bir metin döndürür.
     Artık Google Drive'dan indirme yapmaz, doğrudan modeldeki 'pdf_icerigi' alanını kullanır.
     """
-    active_pdfs = robot.pdf_dosyalari.filter(is_active=True).order_by('pdf_type')
+    # Tek sorgu: türlere göre gruplama Python'da yapılır
+    active_pdfs = list(robot.pdf_dosyalari.filter(is_active=True).order_by('pdf_type'))
     
-    if not active_pdfs.exists():
+    if not active_pdfs:
         return "Bu robot için kullanılabilir PDF bilgisi bulunmamaktadır."
 
     all_pdf_content = []
@@ -98,7 +91,7 @@ def get_robot_pdf_contents_for_ai(robot):
     }
 
     for pdf_type in pdf_types_priority:
-        pdfs_of_type = active_pdfs.filter(pdf_type=pdf_type)
+        pdfs_of_type = [pdf for pdf in active_pdfs if pdf.pdf_type == pdf_type]
         for pdf in pdfs_of_type:
             logger.info(f"Veritabanından okunuyor: {pdf.dosya_adi} (Tür: {pdf_type})")
             content = pdf.pdf_icerigi
@@ -283,26 +276,18 @@ def get_robot_system_prompt(robot, user_message=""):
     Robot için kullanıcı mesajına en uygun sistem prompt'unu getir
     """
     try:
-        # Aktif sistem prompt'larını getir
-        active_prompts = robot.system_prompts.filter(is_active=True).order_by('-priority', '-created_at')
+        from .prompt_matcher import get_prompt_matcher
+        
+        # Derlenmiş eşleştirici prompt'lar değişene kadar cache'te tutulur
+        matcher = get_prompt_matcher(robot)
         
-        if not active_prompts.exists():
+        if not matcher.prompts:
             # Eğer robot-özel prompt yoksa varsayılan prompt'u döndür
             return get_default_system_prompt(robot)
         
-        # Önce topic keywords'e sahip olan prompt'ları kontrol et
-        topic_prompts = [p for p in active_prompts if p.topic_keywords]
-        for prompt in topic_prompts:
-            if prompt.matches_topic(user_message):
-                return prompt.prompt_content
-        
-        # Hiçbiri uygun değilse main prompt'u kullan
-        main_prompt = active_prompts.filter(prompt_type='main').first()
-        if main_prompt:
-            return main_prompt.prompt_content
-        
-        # Hiçbir main prompt yoksa ilk prompt'u kullan
-        return active_prompts.first().prompt_content
+        # Mesajda konu anahtar kelimesi geçen en öncelikli prompt; yoksa main/ilk prompt
+        prompt = matcher.match(user_message) or matcher.default_prompt()
+        return prompt['prompt_content']
         
     except Exception as e:
         logger.error(f"Robot system prompt alınırken hata: {e}")
@@ -514,6 +499,11 @@ def create_generic_prompts(robot):
 # ==================== YENİ OPTİMİZASYON FONKSİYONLARI ====================
 
 def get_optimized_robot_pdf_contents_for_ai(robot):
+    """Optimize PDF bağlamı; önbellekteki versiyonlu paketten döner"""
+    return get_robot_context_bundle(robot, 'optimized')
+
+
+def build_optimized_robot_pdf_contents_for_ai(robot):
     """
     AI için optimize edilmiş PDF içerikleri - TOPLAM ~8000 karakter
     Beyan PDF'i tam tutulur, diğerleri akıllıca kısaltılır
@@ -526,12 +516,13 @@ def get_optimized_robot_pdf_contents_for_ai(robot):
     char_count = 0
     
     try:
+        # Her türün en güncel aktif PDF'i tek sorguda (varsayılan sıralama: -yukleme_zamani)
+        latest_pdfs = {}
+        for pdf in RobotPDF.objects.filter(robot=robot, is_active=True):
+            latest_pdfs.setdefault(pdf.pdf_type, pdf)
+        
         # Beyan PDF'ini TAM al (3000 karakter)
-        beyan_pdf = RobotPDF.objects.filter(
-            robot=robot, 
-            pdf_type='beyan', 
-            is_active=True
-        ).first()
+        beyan_pdf = latest_pdfs.get('beyan')
         
         if beyan_pdf and beyan_pdf.pdf_icerigi:
             beyan_content = beyan_pdf.pdf_icerigi[:3000]  # 3000 karakter limit
@@ -540,11 +531,7 @@ def get_optimized_robot_pdf_contents_for_ai(robot):
             logger.info(f"✅ BEYAN PDF eklendi: {len(beyan_content)} karakter")
         
         # Rol PDF'inden özet al (2000 karakter)
-        rol_pdf = RobotPDF.objects.filter(
-            robot=robot, 
-            pdf_type='rol', 
-            is_active=True
-        ).first()
+        rol_pdf = latest_pdfs.get('rol')
         
         if rol_pdf and rol_pdf.pdf_icerigi:
             rol_content = _extract_key_content(rol_pdf.pdf_icerigi, 2000, 'rol')
@@ -553,11 +540,7 @@ def get_optimized_robot_pdf_contents_for_ai(robot):
             logger.info(f"✅ ROL PDF eklendi: {len(rol_content)} karakter")
         
         # Kural PDF'inden özet al (2000 karakter)
-        kural_pdf = RobotPDF.objects.filter(
-            robot=robot, 
-            pdf_type='kural', 
-            is_active=True
-        ).first()
+        kural_pdf = latest_pdfs.get('kural')
         
         if kural_pdf and kural_pdf.pdf_icerigi:
             kural_content = _extract_key_content(kural_pdf.pdf_icerigi, 2000, 'kural')
@@ -566,11 +549,7 @@ def get_optimized_robot_pdf_contents_for_ai(robot):
             logger.info(f"✅ KURAL PDF eklendi: {len(kural_content)} karakter")
         
         # Bilgi PDF'inden özet al (1000 karakter)
-        bilgi_pdf = RobotPDF.objects.filter(
-            robot=robot, 
-            pdf_type='bilgi', 
-            is_active=True
-        ).first()
+        bilgi_pdf = latest_pdfs.get('bilgi')
         
         if bilgi_pdf and bilgi_pdf.pdf_icerigi:
             bilgi_content = _extract_key_content(bilgi_pdf.pdf_icerigi, 1000, 'bilgi')
@@ -586,7 +565,7 @@ def get_optimized_robot_pdf_contents_for_ai(robot):
     except Exception as e:
         logger.error(f"❌ PDF içerik optimizasyonu hatası: {e}")
         # Hata durumunda eski fonksiyonu kullan
-        return get_robot_pdf_contents_for_ai(robot)
+        return build_robot_pdf_contents_for_ai(robot)
 
 
 def _extract_key_content(content, max_chars, pdf_type):
@@ -630,45 +609,13 @@ def get_optimized_system_prompt(robot, user_message=""):
     Optimize edilmiş sistem prompt'u - Kısa ve öz (~500 karakter)
     """
     try:
-        # Kullanıcı mesajına göre dinamik prompt seçimi
+        # Kullanıcı mesajına göre dinamik prompt seçimi (tek geçişte konu eşleştirme)
         if user_message:
-            # Özel durumlar için dinamik prompt'lar
-            from .models import RobotSystemPrompt
+            from .prompt_matcher import get_prompt_matcher
             
-            keywords_to_check = user_message.lower()
-            
-            # Bağışıklık/immunite ile ilgili soru
-            if any(word in keywords_to_check for word in ['bağışık', 'immun', 'immunity', 'hastal']):
-                matching_prompts = RobotSystemPrompt.objects.filter(
-                    robot=robot,
-                    is_active=True,
-                    topic_keywords__icontains='bağışıklık'
-                ).order_by('-priority')
-                
-                if matching_prompts.exists():
-                    return matching_prompts.first().prompt_content
-            
-            # Yorgunluk/enerji ile ilgili soru
-            elif any(word in keywords_to_check for word in ['yorgun', 'bitkin', 'enerji', 'güç']):
-                matching_prompts = RobotSystemPrompt.objects.filter(
-                    robot=robot,
-                    is_active=True,
-                    topic_keywords__icontains='yorgunluk'
-                ).order_by('-priority')
-                
-                if matching_prompts.exists():
-                    return matching_prompts.first().prompt_content
-            
-            # Başka ürün soruları
-            elif any(word in keywords_to_check for word in ['zzen', 'mag4ever', 'ana robot', 'imuntus']):
-                matching_prompts = RobotSystemPrompt.objects.filter(
-                    robot=robot,
-                    is_active=True,
-                    prompt_type='product_redirect'
-                ).order_by('-priority')
-                
-                if matching_prompts.exists():
-                    return matching_prompts.first().prompt_content
+            matching_prompt = get_prompt_matcher(robot).match(user_message)
+            if matching_prompt:
+                return matching_prompt['prompt_content']
         
         # Genel optimize prompt
         return f"""Sen {robot.name} adında uzman bir yapay zeka asistanısın.
@@ -689,40 +636,206 @@ KURALLAR:
         return get_default_system_prompt(robot)
 
 
+# ==================== OPTİMİZASYON MODU ====================
+
+# Kaynak Robot.optimizasyon_modu alanıdır; cache yalnızca sıcak okuma aynasıdır.
+# Cache boşsa ya da erişilemiyorsa değer veritabanından okunur.
+OPTIMIZATION_CACHE_TIMEOUT = 60 * 60  # 1 saat
+
+
+def _optimization_cache_key(robot_id):
+    return f"robot_optimization_{robot_id}"
+
+
+def cache_optimization_flag(robot_id, enabled):
+    """Veritabanındaki optimizasyon durumunu cache'e yansıt (None: anahtarı sil)"""
+    from django.core.cache import cache
+    
+    cache_key = _optimization_cache_key(robot_id)
+    try:
+        if enabled is None:
+            cache.delete(cache_key)
+        else:
+            cache.set(cache_key, bool(enabled), OPTIMIZATION_CACHE_TIMEOUT)
+    except Exception as e:
+        logger.warning(f"⚠️ Optimizasyon durumu cache'e yazılamadı (Robot: {robot_id}): {e}")
+
+
 def toggle_optimization_mode(robot_id, enable_optimization=True):
     """
-    Robot için optimizasyon modunu açar/kapatır
-    Güvenli geçiş için toggle sistemi
+    Robot için optimizasyon modunu açar/kapatır.
+    Durum veritabanına yazılır, commit sonrası tüm worker'ların okuduğu cache'e yansıtılır.
     """
+    from django.db import transaction
     from .models import Robot
     
     try:
-        robot = Robot.objects.get(id=robot_id)
-        
-        # Robot'a optimizasyon flag'i ekle (eğer yoksa)
-        if not hasattr(robot, 'use_optimization'):
-            # Model'e yeni field eklemek yerine cache kullan
-            from django.core.cache import cache
-            cache_key = f"robot_optimization_{robot_id}"
-            cache.set(cache_key, enable_optimization, timeout=86400)  # 24 saat
-            
-        logger.info(f"Robot {robot.name} optimizasyon modu: {'AÇIK' if enable_optimization else 'KAPALI'}")
+        updated = Robot.objects.filter(id=robot_id).update(optimizasyon_modu=enable_optimization)
+        if not updated:
+            logger.error(f"Robot bulunamadı: {robot_id}")
+            return False
+        
+        transaction.on_commit(lambda: cache_optimization_flag(robot_id, enable_optimization))
+        logger.info(f"Robot {robot_id} optimizasyon modu: {'AÇIK' if enable_optimization else 'KAPALI'}")
         return True
         
-    except Robot.DoesNotExist:
-        logger.error(f"Robot bulunamadı: {robot_id}")
-        return False
     except Exception as e:
         logger.error(f"Optimizasyon toggle hatası: {e}")
         return False
 
 
+# ==================== BAĞLAM PAKETLERİ ====================
+
+# Paketler Robot.context_version ile anahtarlanır; versiyon veritabanında
+# tutulduğu için başka bir süreçte yapılan değişiklik de eski paketi geçersiz kılar.
+CONTEXT_BUNDLE_TIMEOUT = 60 * 60 * 24  # 24 saat
+
+def build_robot_active_pdf_names(robot):
+    """Her türün en güncel aktif PDF adı (içerik yüklenmeden)"""
+    pdf_names = {}
+    for pdf_type, dosya_adi in robot.pdf_dosyalari.filter(is_active=True).values_list('pdf_type', 'dosya_adi'):
+        pdf_names.setdefault(pdf_type, dosya_adi)
+    return pdf_names
+
+
+CONTEXT_BUNDLE_BUILDERS = {
+    'standard': build_robot_pdf_contents_for_ai,
+    'optimized': build_optimized_robot_pdf_contents_for_ai,
+    'pdf_names': build_robot_active_pdf_names,
+}
+
+
+def _context_bundle_cache_key(robot_id, version, kind):
+    return f"robot_context_{robot_id}_v{version}_{kind}"
+
+
+def build_robot_context_bundle(robot, kind):
+    """Paketi PDF içeriklerinden üretip robotun güncel versiyonuyla cache'e yaz"""
+    from django.core.cache import cache
+    from django.utils import timezone
+    
+    bundle = {
+        'version': robot.context_version,
+        'content': CONTEXT_BUNDLE_BUILDERS[kind](robot),
+        'built_at': timezone.now().isoformat(),
+    }
+    cache.set(_context_bundle_cache_key(robot.id, robot.context_version, kind), bundle, CONTEXT_BUNDLE_TIMEOUT)
+    logger.info(f"📦 Bağlam paketi hazırlandı - Robot: {robot.id}, Tür: {kind}, Versiyon: {robot.context_version}")
+    return bundle
+
+
+def get_robot_context_bundle(robot, kind):
+    """
+    Robotun hazır bağlam metnini döndürür. Cache'te yoksa (ilk istek, süre dolması)
+    bir kez üretilir; sohbet akışında PDF metni yeniden işlenmez.
+    """
+    from django.core.cache import cache
+    
+    bundle = cache.get(_context_bundle_cache_key(robot.id, robot.context_version, kind))
+    if bundle is None:
+        bundle = build_robot_context_bundle(robot, kind)
+    return bundle['content']
+
+
+def bump_robot_context_version(robot_id):
+    """Robotun bağlam versiyonunu artır; eski versiyonun paketleri artık okunmaz"""
+    from django.db.models import F
+    from .models import Robot
+    
+    Robot.objects.filter(pk=robot_id).update(context_version=F('context_version') + 1)
+
+
+def rebuild_robot_context_bundles(robot_id):
+    """Tüm paket türlerini robotun güncel versiyonuyla hazırla"""
+    from .models import Robot
+    
+    robot = Robot.objects.filter(pk=robot_id).first()
+    if robot is None:
+        return None
+    
+    for kind in CONTEXT_BUNDLE_BUILDERS:
+        build_robot_context_bundle(robot, kind)
+    return robot.context_version
+
+
+# ==================== SLUG ÇÖZÜMLEME ====================
+
+def resolve_robot_by_slug(slug, fallback=None):
+    """
+    Slug'a karşılık gelen robotu döndürür (bulunamazsa None).
+    Tek sorgu: unique (indeksli) slug kolonu + marka join'i. Cache kullanılmaz;
+    paylaşılan cache'te bile bu sorgudan ucuz bir okuma yolu yoktur.
+    `fallback(slug)` eski alias slug'ları çözmek için verilebilir.
+    """
+    from .models import Robot
+    
+    robot = Robot.objects.select_related('brand').filter(slug=slug).first()
+    if robot is None and fallback is not None:
+        robot = fallback(slug)
+    return robot
+
+
+def create_robot_slug(name):
+    """Robot isminden slug oluştur"""
+    # Türkçe karakterleri değiştir
+    name = name.lower()
+    name = name.replace('ğ', 'g').replace('ü', 'u').replace('ş', 's')
+    name = name.replace('ı', 'i').replace('ö', 'o').replace('ç', 'c')
+    # Sadece harfler ve sayılar bırak, boşlukları tire yap
+    name = re.sub(r'[^a-z0-9\s]', '', name)
+    name = re.sub(r'\s+', '-', name.strip())
+    return name
+
+
+def find_robot_by_legacy_slug(slug):
+    """
+    Kalıcı slug ile eşleşmeyen eski alias slug'ları (robots_root'un ürettiği)
+    isim üzerinden çöz (yalnızca slug kolonunda eşleşme yoksa çağrılır).
+    """
+    from .models import Robot
+    
+    if slug == 'sidrexgpt':
+        return Robot.objects.filter(name__icontains='SidrexGPT Asistanı').first()
+    elif slug == 'sidrexgpt-mag':
+        return Robot.objects.filter(name__icontains='Mag').first()
+    elif slug == 'sidrexgpt-kids':
+        return Robot.objects.filter(name__icontains='Kids').first()
+    elif slug == 'repro-womens':
+        return Robot.objects.filter(name__icontains='Repro').first() or \
+               Robot.objects.filter(name__icontains='Women').first()
+    elif slug == 'milk-thistle':
+        return Robot.objects.filter(name__icontains='Milk Thistle').first()
+    elif slug == 'alyuvar':
+        return Robot.objects.filter(name__icontains='Lipo Iron').first()
+    elif slug == 'kabak-cekirdegi':
+        return Robot.objects.filter(name__icontains='Pro Men').first()
+    elif slug == 'kalkan':
+        return Robot.objects.filter(name__icontains='Imuntus').first()
+    
+    # Genel slug araması (slug'ı kalıcı kolonla eşleşmeyen eski bağlantılar)
+    for robot in Robot.objects.only('id', 'name'):
+        if create_robot_slug(robot.name) == slug:
+            return Robot.objects.select_related('brand').get(pk=robot.pk)
+    return None
+
+
 def is_optimization_enabled(robot_id):
-    """Robot için optimizasyon modunun aktif olup olmadığını kontrol eder"""
+    """Robot için optimizasyon modunun aktif olup olmadığını kontrol eder (önce cache, sonra veritabanı)"""
     from django.core.cache import cache
+    from .models import Robot
+    
+    try:
+        enabled = cache.get(_optimization_cache_key(robot_id))
+    except Exception as e:
+        logger.warning(f"⚠️ Optimizasyon durumu cache'ten okunamadı (Robot: {robot_id}): {e}")
+        enabled = None
+    if enabled is not None:
+        return enabled
     
-    cache_key = f"robot_optimization_{robot_id}"
-    return cache.get(cache_key, False)  # Varsayılan: kapalı
+    enabled = Robot.objects.filter(id=robot_id).values_list('optimizasyon_modu', flat=True).first()
+    enabled = bool(enabled)  # Robot yoksa: kapalı
+    cache_optimization_flag(robot_id, enabled)
+    return enabled
 
 
 def get_optimization_stats(robot_id):
@@ -1,7 +1,11 @@
-from django.db.models.signals import post_delete
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save
 from django.dispatch import receiver
-from .models import RobotPDF
-from .services import delete_pdf_from_services
+from .models import Robot, RobotPDF, RobotSystemPrompt
+from .services import (
+    delete_pdf_from_services, cache_optimization_flag,
+    bump_robot_context_version, rebuild_robot_context_bundles,
+)
 from .rag_services import RAGService
 import logging
 
@@ -25,4 +29,42 @@ def delete_files_on_pdf_delete(sender, instance, **kwargs):
         logger.error(f"RAG chunks silinirken hata oluştu: {e}")
     
     # Sonra dosyaları sil
-    delete_pdf_from_services(instance) 
\ No newline at end of file
+    delete_pdf_from_services(instance) 
+
+
+@receiver(post_save, sender=Robot)
+def mirror_optimization_flag_on_save(sender, instance, update_fields=None, **kwargs):
+    """Admin ya da script ile değişen optimizasyon durumunu commit sonrası cache'e yansıt"""
+    if update_fields is not None and 'optimizasyon_modu' not in update_fields:
+        # Alan yazılmadı; örnekteki değer eski olabilir
+        return
+    robot_id, enabled = instance.pk, instance.optimizasyon_modu
+    transaction.on_commit(lambda: cache_optimization_flag(robot_id, enabled))
+
+
+@receiver(post_delete, sender=Robot)
+def forget_optimization_flag_on_delete(sender, instance, **kwargs):
+    robot_id = instance.pk
+    transaction.on_commit(lambda: cache_optimization_flag(robot_id, None))
+
+
+@receiver(post_save, sender=RobotPDF)
+@receiver(post_delete, sender=RobotPDF)
+@receiver(post_save, sender=RobotSystemPrompt)
+@receiver(post_delete, sender=RobotSystemPrompt)
+def refresh_robot_context_on_change(sender, instance, **kwargs):
+    """
+    PDF eklendiğinde, içeriği/aktifliği değiştiğinde, silindiğinde ya da prompt
+    güncellendiğinde bağlam versiyonunu artır; paketleri commit sonrası yeniden hazırla.
+    """
+    robot_id = instance.robot_id
+    bump_robot_context_version(robot_id)
+
+    def rebuild():
+        try:
+            rebuild_robot_context_bundles(robot_id)
+        except Exception as e:
+            # Paket ilk sohbet isteğinde yeniden üretilir
+            logger.error(f"Bağlam paketi hazırlanırken hata oluştu (Robot: {robot_id}): {e}")
+
+    transaction.on_commit(rebuild)
@@ -0,0 +1,448 @@
+"""
+Chat Telemetri Tamponu (write-behind) - SidrexGPT Robots App
+
+Chat turu boyunca ChatMessage bellekte tutulur (kaydedilmez); mark_completed /
+mark_failed mesajı bu tampona bırakır ve yanıt analitik yazmalarını beklemeden
+döner. Arka plan thread'i tamponu boyut (CHAT_TELEMETRY_BATCH_SIZE) ya da süre
+(CHAT_TELEMETRY_FLUSH_INTERVAL) dolunca tek transaction'da yazar: oturumlar
+çözülür, mesajlar `bulk_create` ile eklenir, oturum istatistikleri oturum başına
+tek F() UPDATE ile artırılır.
+
+Çökme güvenliği: her olay önce worker örneğine (PID + rastgele örnek ID) özel
+bir JSONL dosyasına eklenir (CHAT_TELEMETRY_SPILL_DIR). Worker ömrü boyunca
+örneğin `.lock` dosyasında flock tutar; kilidi alınabilen örnek ölmüştür (PID
+konteyner yeniden başlayınca tekrar kullanılsa da). Yazılan segmentler silinir;
+ölü örneklerin dosyaları diğer worker'lar ya da `flush_chat_telemetry` komutu
+tarafından tekrar oynatılır. `telemetry_id` sayesinde tekrar oynatma çift kayıt
+üretmez.
+
+Yazılamayan batch CHAT_TELEMETRY_MAX_ATTEMPTS denemeden sonra tek tek yazılır;
+yine yazılamayan (zehirli) olaylar dead-letter dosyasına taşınır. Bağlantı
+hataları deneme sayılmaz.
+"""
+
+import atexit
+import itertools
+import json
+import logging
+import os
+import re
+import threading
+import time
+import uuid
+from decimal import Decimal
+from typing import Any, Dict, List, Optional, Tuple
+
+from django.conf import settings
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db import InterfaceError, OperationalError, close_old_connections, transaction
+
+try:
+    import fcntl
+except ImportError:  # Windows: örnek sahipliği yalnızca PID ile kontrol edilir
+    fcntl = None
+
+from .models import ChatMessage, ChatSession
+
+logger = logging.getLogger(__name__)
+
+TELEMETRY_ENABLED = os.getenv('CHAT_TELEMETRY_ENABLED', 'True').lower() == 'true'
+TELEMETRY_BATCH_SIZE = int(os.getenv('CHAT_TELEMETRY_BATCH_SIZE', '100'))
+TELEMETRY_FLUSH_INTERVAL = float(os.getenv('CHAT_TELEMETRY_FLUSH_INTERVAL', '2.0'))
+TELEMETRY_SPILL_DIR = os.getenv(
+    'CHAT_TELEMETRY_SPILL_DIR',
+    os.path.join(str(getattr(settings, 'BASE_DIR', '.')), 'telemetry_spill')
+)
+# Bu kadar başarısız denemeden sonra batch tek tek yazılır, zehirli olaylar dead-letter'a gider
+TELEMETRY_MAX_ATTEMPTS = int(os.getenv('CHAT_TELEMETRY_MAX_ATTEMPTS', '5'))
+DEAD_LETTER_NAME = 'chat-telemetry-dead.jsonl'
+# Spill dosyası olmayan sahipsiz kilit dosyaları bu süreden sonra silinir (saniye)
+_STALE_LOCK_AGE = 60
+
+# chat-telemetry-<pid>-<örnek>.jsonl / .<n>.flushing / .lock
+_SPILL_NAME = re.compile(r'^chat-telemetry-((\d+)-[0-9a-f]+)\.')
+
+# Tamponla yazılan alanlar: id veritabanında, session flush sırasında çözülür
+_MESSAGE_FIELDS = [
+    field for field in ChatMessage._meta.concrete_fields
+    if field.name not in ('id', 'session', 'created_at')
+]
+
+
+def serialize_message(message: ChatMessage) -> Dict[str, Any]:
+    """Kaydedilmemiş mesajı tampon olayına çevir (oturum anahtarı dahil)"""
+    if message.telemetry_id is None:
+        message.telemetry_id = uuid.uuid4()
+
+    session = getattr(message, 'telemetry_session', None) or {'pk': message.session_id}
+    return {
+        'fields': {field.attname: getattr(message, field.attname) for field in _MESSAGE_FIELDS},
+        'session': session,
+    }
+
+
+def build_message(event: Dict[str, Any], session_id: int) -> ChatMessage:
+    """Olaydan (bellekten ya da spill dosyasından) ChatMessage örneği kur"""
+    values = {
+        field.attname: field.to_python(event['fields'].get(field.attname))
+        for field in _MESSAGE_FIELDS
+    }
+    return ChatMessage(session_id=session_id, **values)
+
+
+def _pid_alive(pid: int) -> bool:
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        return True
+    return True
+
+
+class ChatTelemetryBuffer:
+    """Process başına mesaj tamponu + arka plan flush thread'i"""
+
+    def __init__(self, batch_size: int = None, flush_interval: float = None,
+                 spill_dir: str = None, enabled: bool = None):
+        self.batch_size = batch_size or TELEMETRY_BATCH_SIZE
+        self.flush_interval = flush_interval or TELEMETRY_FLUSH_INTERVAL
+        self.spill_dir = TELEMETRY_SPILL_DIR if spill_dir is None else spill_dir
+        self.enabled = TELEMETRY_ENABLED if enabled is None else enabled
+
+        self._lock = threading.Lock()
+        self._flush_lock = threading.Lock()
+        self._wakeup = threading.Event()
+        self._pid = None
+        self._instance = None
+        self._owner_lock = None
+        self._events: List[Dict[str, Any]] = []
+        self._retry: List[Tuple[Optional[str], List[Dict[str, Any]], int]] = []
+        self._spill = None
+        self._segments = itertools.count()
+
+    # ------------------------------------------------------------------
+    # Yazma yolu (istek thread'i)
+    # ------------------------------------------------------------------
+
+    def submit(self, message: ChatMessage):
+        """Biten mesajı tampona ekle; tampon kapalıysa hemen yaz"""
+        event = serialize_message(message)
+        if not self.enabled:
+            self.write_events([event])
+            return
+
+        with self._lock:
+            self._ensure_started()
+            self._events.append(event)
+            self._spill_write(event)
+            full = len(self._events) >= self.batch_size
+
+        if full:
+            self._wakeup.set()
+
+    def _ensure_started(self):
+        """İlk olayda (ya da fork sonrası) flush thread'ini başlat"""
+        if self._pid == os.getpid():
+            return
+
+        # Fork edilen worker ebeveynin tamponunu ve dosyasını devralmaz
+        self._pid = os.getpid()
+        self._events = []
+        self._retry = []
+        self._spill = None
+
+        thread = threading.Thread(target=self._run, name='chat-telemetry', daemon=True)
+        thread.start()
+        atexit.register(self.flush)
+
+    @property
+    def instance(self) -> str:
+        """Process örneğinin kimliği (PID + rastgele); fork sonrası yenilenir, kilit devralınmaz"""
+        if self._instance is None or not self._instance.startswith(f"{os.getpid()}-"):
+            self._instance = f"{os.getpid()}-{uuid.uuid4().hex[:12]}"
+            self._owner_lock = None
+        return self._instance
+
+    def _spill_path(self, suffix: str = 'jsonl', instance: str = None) -> str:
+        return os.path.join(self.spill_dir, f"chat-telemetry-{instance or self.instance}.{suffix}")
+
+    def _hold_owner_lock(self):
+        """Örnek ömrü boyunca tutulan kilit; spill dosyasından önce alınır"""
+        path = self._spill_path('lock')  # örnek kimliğini (fork sonrası) yeniler
+        if fcntl is None or self._owner_lock is not None:
+            return
+        lock = open(path, 'w')
+        fcntl.flock(lock, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        self._owner_lock = lock
+
+    def _spill_write(self, event: Dict[str, Any]):
+        if not self.spill_dir:
+            return
+        try:
+            if self._spill is None:
+                os.makedirs(self.spill_dir, exist_ok=True)
+                self._hold_owner_lock()
+                self._spill = open(self._spill_path(), 'a', encoding='utf-8')
+            # flush(): worker çökse de satır işletim sistemi tamponunda kalır
+            self._spill.write(json.dumps(event, cls=DjangoJSONEncoder, ensure_ascii=False) + '\n')
+            self._spill.flush()
+        except OSError as e:
+            logger.warning(f"⚠️ Telemetri spill dosyasına yazılamadı: {e}")
+
+    def _rotate_spill(self) -> Optional[str]:
+        """Aktif spill dosyasını flush segmentine çevir (kilit altında çağrılır)"""
+        if self._spill is None:
+            return None
+        self._spill.close()
+        self._spill = None
+        segment = self._spill_path(f"{next(self._segments)}.flushing")
+        os.replace(self._spill_path(), segment)
+        return segment
+
+    # ------------------------------------------------------------------
+    # Flush (arka plan thread'i)
+    # ------------------------------------------------------------------
+
+    def _run(self):
+        try:
+            self.recover_orphans()
+        except Exception as e:
+            logger.error(f"❌ Telemetri spill kurtarma hatası: {e}")
+
+        while True:
+            self._wakeup.wait(self.flush_interval)
+            self._wakeup.clear()
+            try:
+                close_old_connections()
+                self.flush()
+            except Exception as e:
+                logger.error(f"❌ Telemetri flush hatası: {e}")
+
+    def flush(self) -> int:
+        """Tampondaki ve yeniden denenecek olayları yaz, yazılan mesaj sayısını döndür"""
+        with self._flush_lock:
+            with self._lock:
+                events, self._events = self._events, []
+                segment = self._rotate_spill() if events else None
+                batches, self._retry = self._retry, []
+
+            if events:
+                batches.append((segment, events, 0))
+
+            written = 0
+            for path, batch, attempts in batches:
+                try:
+                    written += self.write_events(batch)
+                except (OperationalError, InterfaceError) as e:
+                    # Veritabanına ulaşılamıyor: deneme sayılmaz, segment diskte kalır
+                    logger.error(f"❌ Telemetri yazılamadı ({len(batch)} olay), bağlantı bekleniyor: {e}")
+                    self._retry.append((path, batch, attempts))
+                    continue
+                except Exception as e:
+                    attempts += 1
+                    if attempts < TELEMETRY_MAX_ATTEMPTS:
+                        logger.error(f"❌ Telemetri yazılamadı ({len(batch)} olay, deneme {attempts}), tekrar denenecek: {e}")
+                        self._retry.append((path, batch, attempts))
+                        continue
+                    written += self._write_singly(batch)
+                if path:
+                    try:
+                        os.remove(path)
+                    except OSError:
+                        pass
+
+            if written:
+                logger.debug(f"📝 Telemetri yazıldı: {written} mesaj")
+            return written
+
+    def _write_singly(self, batch: List[Dict[str, Any]]) -> int:
+        """Batch'i olay olay yaz; yazılamayanları dead-letter dosyasına taşı"""
+        written = 0
+        dead = []
+        for event in batch:
+            try:
+                written += self.write_events([event])
+            except Exception as e:
+                logger.error(f"❌ Zehirli telemetri olayı dead-letter'a taşındı ({event['fields'].get('telemetry_id')}): {e}")
+                dead.append(event)
+
+        if dead and self.spill_dir:
+            try:
+                with open(os.path.join(self.spill_dir, DEAD_LETTER_NAME), 'a', encoding='utf-8') as f:
+                    for event in dead:
+                        f.write(json.dumps(event, cls=DjangoJSONEncoder, ensure_ascii=False) + '\n')
+            except OSError as e:
+                logger.error(f"❌ Telemetri dead-letter dosyasına yazılamadı ({len(dead)} olay): {e}")
+        return written
+
+    def write_events(self, events: List[Dict[str, Any]]) -> int:
+        """Olayları tek transaction'da yaz: oturumlar, mesajlar (bulk_create), istatistikler"""
+        if not events:
+            return 0
+
+        # Aynı mesaj iki kez işaretlendiyse (ör. önce failed sonra completed) son hali yazılır
+        latest = {str(event['fields']['telemetry_id']): event for event in events}
+        with transaction.atomic():
+            # Tekrar oynatılan (zaten yazılmış) olaylar atlanır
+            existing = {
+                str(telemetry_id) for telemetry_id in ChatMessage.objects.filter(
+                    telemetry_id__in=list(latest)
+                ).values_list('telemetry_id', flat=True)
+            }
+            pending = [
+                event for telemetry_id, event in latest.items()
+                if telemetry_id not in existing
+            ]
+            if not pending:
+                return 0
+
+            sessions: Dict[Tuple, int] = {}
+            messages = []
+            for event in pending:
+                messages.append(build_message(event, self._resolve_session(event['session'], sessions)))
+
+            ChatMessage.objects.bulk_create(messages, batch_size=self.batch_size)
+
+            # Oturum başına tek UPDATE (mesaj sayısı + toplam süre)
+            per_session: Dict[int, Tuple[int, Decimal]] = {}
+            for message in messages:
+                count, total = per_session.get(message.session_id, (0, Decimal('0')))
+                per_session[message.session_id] = (count + 1, total + Decimal(str(message.response_time or 0)))
+            for session_id, (count, total) in per_session.items():
+                ChatSession.record_message(session_id, total, count=count)
+
+        return len(messages)
+
+    def _resolve_session(self, key: Dict[str, Any], resolved: Dict[Tuple, int]) -> int:
+        """Oturum anahtarını ChatSession ID'sine çevir (chat turunda ertelenen get_or_create)"""
+        if key.get('pk'):
+            return key['pk']
+
+        lookup = (key['session_id'], key.get('user_id'), key['robot_id'])
+        if lookup not in resolved:
+            session, _ = ChatSession.objects.get_or_create(
+                session_id=key['session_id'],
+                user_id=key.get('user_id'),
+                robot_id=key['robot_id'],
+                defaults={
+                    'is_active': True,
+                    'user_ip': key.get('user_ip'),
+                    'user_agent': key.get('user_agent'),
+                }
+            )
+            resolved[lookup] = session.pk
+        return resolved[lookup]
+
+    # ------------------------------------------------------------------
+    # Kurtarma
+    # ------------------------------------------------------------------
+
+    @property
+    def retry_count(self) -> int:
+        """Yazılamayıp tekrar denenecek olay sayısı"""
+        return sum(len(batch) for _, batch, _ in self._retry)
+
+    def spill_files(self, include_locks: bool = False) -> List[str]:
+        if not self.spill_dir or not os.path.isdir(self.spill_dir):
+            return []
+        return sorted(
+            name for name in os.listdir(self.spill_dir)
+            if _SPILL_NAME.match(name) and (include_locks or not name.endswith('.lock'))
+        )
+
+    def _owner_alive(self, instance: str, pid: int) -> bool:
+        """Örnek hâlâ çalışıyor mu: kilidi tutuluyorsa evet (PID tekrar kullanımından etkilenmez)"""
+        if fcntl is None:
+            return _pid_alive(pid)
+
+        lock_path = self._spill_path('lock', instance)
+        try:
+            lock = open(lock_path, 'a')
+        except OSError:
+            # Kilit her zaman spill dosyasından önce alınır; kilitsiz dosyanın sahibi yok
+            return False
+        with lock:
+            try:
+                fcntl.flock(lock, fcntl.LOCK_EX | fcntl.LOCK_NB)
+            except OSError:
+                return True
+        return False
+
+    def _forget_owner(self, instance: str, claimed_files: bool):
+        """Ölü örneğin kilit dosyasını kaldır (spill'siz yeni kilitler başlangıç yarışı için bırakılır)"""
+        lock_path = self._spill_path('lock', instance)
+        try:
+            if claimed_files or os.path.getmtime(lock_path) < time.time() - _STALE_LOCK_AGE:
+                os.remove(lock_path)
+        except OSError:
+            pass
+
+    def recover_orphans(self) -> int:
+        """Ölü worker örneklerinin spill dosyalarını sahiplenip yaz"""
+        recovered = 0
+        owners: Dict[str, List[str]] = {}
+        for name in self.spill_files(include_locks=True):
+            match = _SPILL_NAME.match(name)
+            names = owners.setdefault(match.group(1), [])
+            if not name.endswith('.lock'):
+                names.append(name)
+
+        for instance, names in owners.items():
+            if instance == self.instance or self._owner_alive(instance, int(instance.split('-')[0])):
+                continue
+
+            for name in names:
+                claimed = self._claim(name)
+                if claimed is not None:
+                    recovered += len(claimed[1])
+            self._forget_owner(instance, bool(names))
+
+        if recovered:
+            logger.info(f"🧯 Telemetri spill dosyalarından {recovered} olay kurtarıldı")
+            self.flush()
+        return recovered
+
+    def _claim(self, name: str) -> Optional[Tuple[str, List[Dict[str, Any]]]]:
+        """Dosyayı atomik rename ile sahiplen (aynı dosyayı iki worker oynatmaz) ve tekrar kuyruğuna al"""
+        claimed = self._spill_path(f"{next(self._segments)}.flushing")
+        try:
+            os.replace(os.path.join(self.spill_dir, name), claimed)
+        except OSError:
+            return None
+
+        events = self._read_events(claimed)
+        with self._flush_lock:
+            self._retry.append((claimed, events, 0))
+        return claimed, events
+
+    @staticmethod
+    def _read_events(path: str) -> List[Dict[str, Any]]:
+        events = []
+        with open(path, encoding='utf-8') as f:
+            for line in f:
+                try:
+                    events.append(json.loads(line))
+                except json.JSONDecodeError:
+                    # Çökme anında yarım kalmış son satır
+                    continue
+        return events
+
+    def replay_dead_letters(self) -> Tuple[int, int]:
+        """Dead-letter olaylarını (hata giderildikten sonra) tekrar yaz; (yazılan, okunan) döner"""
+        if not self.spill_dir:
+            return 0, 0
+        claimed = self._spill_path(f"{next(self._segments)}.flushing")
+        try:
+            os.replace(os.path.join(self.spill_dir, DEAD_LETTER_NAME), claimed)
+        except OSError:
+            return 0, 0
+
+        # Yine yazılamayanlar _write_singly ile dead-letter dosyasına geri döner
+        events = self._read_events(claimed)
+        written = self._write_singly(events)
+        os.remove(claimed)
+        return written, len(events)
+
+
+chat_telemetry = ChatTelemetryBuffer()
@@ -0,0 +1,212 @@
+"""
+Bellek İçi Vektör İndeksi - SidrexGPT Robots App
+
+Her robotun chunk embedding'leri process içinde tek bir float32 matriste
+tutulur (satır normları önceden hesaplanır) ve top-k `argpartition` ile
+bulunur. Birkaç yüz chunk'lık robotlarda arama mikro saniyeler sürer ve
+pgvector gerektirmez.
+
+İndeks robotun `context_version` değeriyle anahtarlanır; PDF veya chunk
+değiştiğinde versiyon artar ve bir sonraki aramada indeks yeniden kurulur.
+`RAGConfig.NUMPY_INDEX_DIR` verilirse matris `.npy` olarak yazılır ve
+`mmap_mode='r'` ile açılır; aynı makinedeki worker'lar sayfaları paylaşır.
+"""
+
+import json
+import logging
+import os
+import re
+import threading
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+import numpy as np
+
+from .rag_config import RAGConfig
+
+logger = logging.getLogger(__name__)
+
+# loader(robot_id) -> (embedding matrisi, satır bilgileri)
+IndexLoader = Callable[[int], Tuple[np.ndarray, List[Dict[str, Any]]]]
+
+
+def trigram_set(text: str) -> frozenset:
+    """pg_trgm ile aynı kurallar: kelime başına '  kelime ' dolgusu ile 3'lüler"""
+    grams = set()
+    for word in re.findall(r'\w+', (text or '').lower()):
+        padded = f"  {word} "
+        grams.update(padded[i:i + 3] for i in range(len(padded) - 2))
+    return frozenset(grams)
+
+
+def trigram_similarity(left: frozenset, right: frozenset) -> float:
+    """pg_trgm similarity(): ortak trigram / birleşim"""
+    if not left or not right:
+        return 0.0
+    return len(left & right) / len(left | right)
+
+
+class RobotVectorIndex:
+    """Tek bir robotun chunk matrisi + satır bilgileri"""
+
+    def __init__(self, robot_id: int, version: int, matrix: np.ndarray, rows: List[Dict[str, Any]]):
+        self.robot_id = robot_id
+        self.version = version
+        self.rows = rows
+        self.matrix = matrix if matrix.dtype == np.float32 else matrix.astype(np.float32)
+        norms = np.linalg.norm(self.matrix, axis=1) if len(rows) else np.zeros(0, dtype=np.float32)
+        norms[norms == 0] = 1.0
+        self.norms = norms.astype(np.float32)
+        self.pdf_ids = np.fromiter((row['robot_pdf_id'] for row in rows), dtype=np.int64, count=len(rows))
+        self._trigrams = None
+
+    def __len__(self):
+        return len(self.rows)
+
+    def knn(
+        self,
+        query_embedding,
+        top_k: int,
+        similarity_threshold: float = 0.0,
+        robot_pdf_ids: List[int] = None
+    ) -> List[Dict[str, Any]]:
+        """Cosine benzerliğine göre en yakın top_k chunk (eşik altındakiler atılır)"""
+        if not self.rows or top_k <= 0:
+            return []
+
+        query = np.asarray(query_embedding, dtype=np.float32)
+        query_norm = float(np.linalg.norm(query))
+        if query_norm == 0:
+            return []
+
+        scores = (self.matrix @ query) / (self.norms * query_norm)
+        if robot_pdf_ids:
+            scores = np.where(np.isin(self.pdf_ids, robot_pdf_ids), scores, -np.inf)
+
+        k = min(top_k, len(scores))
+        candidates = np.argpartition(-scores, k - 1)[:k]
+        ordered = candidates[np.argsort(-scores[candidates], kind='stable')]
+
+        results = []
+        for position in ordered:
+            score = float(scores[position])
+            if score < similarity_threshold:
+                break
+            results.append({**self.rows[position], 'similarity': score})
+        return results
+
+    def text_search(
+        self,
+        query: str,
+        top_k: int,
+        similarity_threshold: float = 0.0,
+        robot_pdf_ids: List[int] = None
+    ) -> List[Dict[str, Any]]:
+        """pg_trgm benzeri trigram benzerliğiyle metin araması (pg_trgm'siz backend'ler için)"""
+        if not self.rows or top_k <= 0:
+            return []
+
+        query_grams = trigram_set(query)
+        if self._trigrams is None:
+            self._trigrams = [trigram_set(row['chunk_text']) for row in self.rows]
+
+        allowed = set(robot_pdf_ids) if robot_pdf_ids else None
+        scored = []
+        for row, grams in zip(self.rows, self._trigrams):
+            if allowed is not None and row['robot_pdf_id'] not in allowed:
+                continue
+            score = trigram_similarity(query_grams, grams)
+            if score >= similarity_threshold:
+                scored.append((score, row))
+
+        scored.sort(key=lambda item: item[0], reverse=True)
+        return [{**row, 'text_similarity': score} for score, row in scored[:top_k]]
+
+
+def _index_paths(robot_id: int, version: int) -> Tuple[str, str]:
+    base = os.path.join(RAGConfig.NUMPY_INDEX_DIR, f"robot_{robot_id}_v{version}")
+    return f"{base}.npy", f"{base}.json"
+
+
+def _load_persisted(robot_id: int, version: int) -> Optional[RobotVectorIndex]:
+    matrix_path, rows_path = _index_paths(robot_id, version)
+    if not (os.path.exists(matrix_path) and os.path.exists(rows_path)):
+        return None
+    with open(rows_path, encoding='utf-8') as f:
+        rows = json.load(f)
+    matrix = np.load(matrix_path, mmap_mode='r')
+    return RobotVectorIndex(robot_id, version, matrix, rows)
+
+
+def _persist(index: RobotVectorIndex):
+    """Matris + satırları atomik olarak diske yaz, robotun eski versiyonlarını temizle"""
+    os.makedirs(RAGConfig.NUMPY_INDEX_DIR, exist_ok=True)
+    matrix_path, rows_path = _index_paths(index.robot_id, index.version)
+    pid = os.getpid()
+
+    with open(f"{matrix_path}.{pid}.tmp", 'wb') as f:
+        np.save(f, np.ascontiguousarray(index.matrix))
+    with open(f"{rows_path}.{pid}.tmp", 'w', encoding='utf-8') as f:
+        json.dump(index.rows, f, ensure_ascii=False)
+    os.replace(f"{matrix_path}.{pid}.tmp", matrix_path)
+    os.replace(f"{rows_path}.{pid}.tmp", rows_path)
+
+    prefix = f"robot_{index.robot_id}_v"
+    current = os.path.basename(matrix_path)[:-len('.npy')]
+    for name in os.listdir(RAGConfig.NUMPY_INDEX_DIR):
+        if name.startswith(prefix) and not name.startswith(f"{current}.") and not name.endswith('.tmp'):
+            try:
+                os.remove(os.path.join(RAGConfig.NUMPY_INDEX_DIR, name))
+            except OSError:
+                pass
+
+
+class VectorIndexRegistry:
+    """Robot ID -> güncel RobotVectorIndex; versiyon değişince yeniden kurar"""
+
+    def __init__(self):
+        self._indexes: Dict[int, RobotVectorIndex] = {}
+        self._locks: Dict[int, threading.Lock] = {}
+        self._lock = threading.Lock()
+
+    def get(self, robot_id: int, version: int, loader: IndexLoader) -> RobotVectorIndex:
+        index = self._indexes.get(robot_id)
+        if index is not None and index.version == version:
+            return index
+
+        with self._lock:
+            robot_lock = self._locks.setdefault(robot_id, threading.Lock())
+
+        # Aynı robotun indeksini eşzamanlı istekler tek sefer kurar
+        with robot_lock:
+            index = self._indexes.get(robot_id)
+            if index is not None and index.version == version:
+                return index
+
+            index = _load_persisted(robot_id, version) if RAGConfig.NUMPY_INDEX_DIR else None
+            if index is None:
+                matrix, rows = loader(robot_id)
+                index = RobotVectorIndex(robot_id, version, matrix, rows)
+                if RAGConfig.NUMPY_INDEX_DIR:
+                    _persist(index)
+                logger.info(f"🧮 Bellek içi vektör indeksi kuruldu - Robot: {robot_id}, Chunk: {len(index)}, Versiyon: {version}")
+
+            self._indexes[robot_id] = index
+            return index
+
+    def invalidate(self, robot_id: int = None):
+        with self._lock:
+            if robot_id is None:
+                self._indexes.clear()
+            else:
+                self._indexes.pop(robot_id, None)
+
+    def get_stats(self) -> Dict[str, Any]:
+        indexes = list(self._indexes.values())
+        return {
+            'robots': len(indexes),
+            'chunks': sum(len(index) for index in indexes),
+            'bytes': sum(int(index.matrix.nbytes) for index in indexes),
+        }
+
+
+vector_index_registry = VectorIndexRegistry()
@@ -0,0 +1,795 @@
+"""
+Vektör Depoları - SidrexGPT Robots App
+
+`VectorSearchService` chunk'ları doğrudan SQL ile değil bir `VectorStore`
+üzerinden yazar ve arar. Backend `RAGConfig.VECTOR_BACKEND` ile seçilir:
+
+    pgvector : PostgreSQL + pgvector/pg_trgm (varsayılan, üretim)
+    numpy    : process içi matris indeksi; kalıcı kaynak pgvector ya da SQLite
+    sqlite   : Postgres eklentisi gerektirmeyen yerel depo (geliştirme/test)
+
+Tüm backend'ler aynı sonuç sözlüğünü döndürür: id, robot_pdf_id, chunk_text,
+chunk_index, metadata ve `similarity` (knn) / `text_similarity` (text_search).
+"""
+
+import functools
+import json
+import logging
+import sqlite3
+import threading
+from contextlib import closing
+from typing import Any, Callable, Dict, List, Optional, Protocol, Tuple, runtime_checkable
+
+import numpy as np
+from django.db import connection, transaction
+
+from .models import Robot, RobotPDF
+from .rag_config import RAGConfig
+from .vector_index import RobotVectorIndex, vector_index_registry
+
+logger = logging.getLogger(__name__)
+
+# embed(texts) -> (len(texts), boyut) float32 matris
+Embedder = Callable[[List[str]], np.ndarray]
+
+
+def to_vector_literal(embedding) -> str:
+    """Embedding'i pgvector metin formatına çevir: '[0.1,0.2,...]'"""
+    return '[' + ','.join(f"{float(value):.7g}" for value in embedding) + ']'
+
+
+@functools.lru_cache(maxsize=1)
+def get_pgvector_tables() -> frozenset:
+    """setup_pgvector ile kurulan tablolardan mevcut olanlar (process başına bir kez bakılır)"""
+    tables = set(connection.introspection.table_names())
+    return frozenset(tables & {'pdf_chunks', 'embedding_store'})
+
+
+@runtime_checkable
+class VectorStore(Protocol):
+    """Chunk deposu arayüzü"""
+
+    name: str
+
+    def upsert(self, robot_pdf_id: int, robot_id: Optional[int], chunks: List[Dict[str, Any]], embed: Embedder) -> Dict[str, int]:
+        """PDF'in chunk setini senkronize et; chunk'larda `content_hash` bulunur"""
+
+    def delete_by_pdf(self, robot_pdf_id: int) -> int:
+        """PDF'e ait chunk'ları sil, silinen sayıyı döndür"""
+
+    def set_pdf_type(self, robot_pdf_id: int, pdf_type: str) -> int:
+        """Chunk metadata'sındaki pdf_type'ı güncelle"""
+
+    def knn(self, query_embedding, robot_id: int = None, robot_pdf_ids: List[int] = None,
+            top_k: int = 5, similarity_threshold: float = 0.0) -> List[Dict[str, Any]]:
+        """Cosine benzerliğine göre en yakın chunk'lar"""
+
+    def text_search(self, query: str, robot_id: int = None, robot_pdf_ids: List[int] = None,
+                    top_k: int = 10, similarity_threshold: float = 0.3) -> List[Dict[str, Any]]:
+        """Trigram benzerliğine göre chunk'lar"""
+
+    def stats(self, robot_id: int = None, robot_pdf_id: int = None) -> Dict[str, Any]:
+        """Chunk/PDF sayıları ve backend'e özgü boyut bilgileri"""
+
+
+def plan_chunk_sync(existing_rows, chunks: List[Dict[str, Any]]):
+    """
+    Kayıtlı satırlar [(id, content_hash, chunk_index, metadata)] ile yeni chunk setini
+    content_hash üzerinden karşılaştır. (yeni chunk'lar, güncellemeler, silinecek id'ler,
+    değişmeyen sayısı) döner; güncellemeler (chunk_index, metadata, id) biçimindedir.
+    """
+    existing_by_hash: Dict[str, List[tuple]] = {}
+    for row_id, content_hash, chunk_index, metadata in existing_rows:
+        # Hash'i olmayan eski satırlar hiçbir chunk ile eşleşmez ve yenilenir
+        existing_by_hash.setdefault(content_hash, []).append((row_id, chunk_index, metadata))
+
+    new_chunks = []
+    updates = []
+    unchanged = 0
+    for chunk in chunks:
+        matches = existing_by_hash.get(chunk['content_hash'])
+        if not matches:
+            new_chunks.append(chunk)
+            continue
+
+        row_id, chunk_index, metadata = matches.pop(0)
+        if chunk_index != chunk['chunk_index'] or metadata != chunk['metadata']:
+            updates.append((chunk['chunk_index'], chunk['metadata'], row_id))
+        else:
+            unchanged += 1
+
+    stale_ids = [row[0] for rows in existing_by_hash.values() for row in rows]
+    return new_chunks, updates, stale_ids, unchanged
+
+
+def embed_chunks_by_hash(chunks: List[Dict[str, Any]], embed: Embedder,
+                         embedded: Dict[str, np.ndarray] = None) -> Dict[str, np.ndarray]:
+    """
+    content_hash -> embedding. `embedded` içinde olmayan hash'ler tek `embed` çağrısıyla
+    hesaplanır; aynı metin chunk sette birden fazla geçse de bir kez encode edilir.
+    """
+    embedded = dict(embedded or {})
+    missing: Dict[str, str] = {}
+    for chunk in chunks:
+        if chunk['content_hash'] not in embedded:
+            missing.setdefault(chunk['content_hash'], chunk['text'])
+
+    if missing:
+        matrix = embed(list(missing.values()))
+        embedded.update(zip(missing.keys(), matrix))
+    return embedded
+
+
+def fuse_reciprocal_rank(
+    vector_results: List[Dict[str, Any]],
+    text_results: List[Dict[str, Any]],
+    top_k: int
+) -> List[Dict[str, Any]]:
+    """search_hybrid_chunks ile aynı ağırlıklı RRF birleştirmesi (SQL'siz backend'ler için)"""
+    k = RAGConfig.HYBRID_RRF_K
+    fused: Dict[Any, Dict[str, Any]] = {}
+
+    for rank, result in enumerate(vector_results, 1):
+        entry = fused.setdefault(result['id'], {**result, 'vector_similarity': result['similarity'],
+                                                'text_similarity': None, 'rrf_score': 0.0})
+        entry['rrf_score'] += RAGConfig.HYBRID_VECTOR_WEIGHT / (k + rank)
+
+    for rank, result in enumerate(text_results, 1):
+        entry = fused.get(result['id'])
+        if entry is None:
+            entry = fused[result['id']] = {**result, 'similarity': result['text_similarity'],
+                                           'vector_similarity': None, 'rrf_score': 0.0}
+        entry['text_similarity'] = result['text_similarity']
+        entry['rrf_score'] += RAGConfig.HYBRID_TEXT_WEIGHT / (k + rank)
+
+    ranked = sorted(fused.values(), key=lambda entry: (-entry['rrf_score'], entry['id']))
+    return ranked[:top_k]
+
+
+# ------------------------------------------------------------------
+# pgvector
+# ------------------------------------------------------------------
+
+# Robot.vector_encoding -> (HNSW indeks adı, indeks ifadesi, kNN sıralama ifadesi).
+# Quantize indeksler mevcut `embedding` kolonu üzerinde ifade indeksidir: yeni satırlar
+# ek yazma olmadan indekslenir, tam hassasiyetli vektör yeniden sıralamada kullanılır.
+VECTOR_ENCODING_INDEXES = {
+    'full': (
+        'pdf_chunks_embedding_cosine_idx',
+        'embedding vector_cosine_ops',
+        'pc.embedding <=> %(query)s::vector',
+    ),
+    'halfvec': (
+        'pdf_chunks_embedding_half_idx',
+        '(embedding::halfvec({dims})) halfvec_cosine_ops',
+        'pc.embedding::halfvec({dims}) <=> %(query)s::halfvec({dims})',
+    ),
+    'binary': (
+        'pdf_chunks_embedding_bit_idx',
+        '(binary_quantize(embedding)::bit({dims})) bit_hamming_ops',
+        'binary_quantize(pc.embedding)::bit({dims}) <~> binary_quantize(%(query)s::vector)',
+    ),
+}
+
+
+def vector_index_ddl(encoding: str, dims: int = None, concurrently: bool = True) -> str:
+    """Kodlamanın HNSW indeksini oluşturan DDL"""
+    name, expression, _ = VECTOR_ENCODING_INDEXES[encoding]
+    expression = expression.format(dims=dims or RAGConfig.EMBEDDING_DIMENSIONS)
+    return (
+        f"CREATE INDEX {'CONCURRENTLY ' if concurrently else ''}IF NOT EXISTS {name} "
+        f"ON pdf_chunks USING hnsw ({expression})"
+    )
+
+
+# Embedding modeli geçişinde yeni modelin vektörleri bu kolona doldurulur
+SHADOW_EMBEDDING_COLUMN = 'embedding_shadow'
+SHADOW_INDEX_NAME = 'pdf_chunks_embedding_shadow_idx'
+# pgvector HNSW `vector` için en fazla 2000 boyut indeksler; üstü halfvec ifadesiyle indekslenir
+HNSW_MAX_DIMENSIONS = 2000
+# halfvec HNSW sınırı; üstünde yalnızca binary kodlama indekslenebilir
+HALFVEC_HNSW_MAX_DIMENSIONS = 4000
+
+CHUNK_COPY_COLUMNS = ('robot_pdf_id', 'robot_id', 'chunk_text', 'chunk_index', 'embedding', 'metadata', 'content_hash')
+
+
+def shadow_index_ddl(dims: int, concurrently: bool = True) -> str:
+    """Gölge kolonun HNSW (cosine) indeksini oluşturan DDL"""
+    if dims > HNSW_MAX_DIMENSIONS:
+        expression = f"({SHADOW_EMBEDDING_COLUMN}::halfvec({dims})) halfvec_cosine_ops"
+    else:
+        expression = f"{SHADOW_EMBEDDING_COLUMN} vector_cosine_ops"
+    return (
+        f"CREATE INDEX {'CONCURRENTLY ' if concurrently else ''}IF NOT EXISTS {SHADOW_INDEX_NAME} "
+        f"ON pdf_chunks USING hnsw ({expression})"
+    )
+
+
+def shadow_order_expression(dims: int) -> str:
+    """Gölge kolon indeksini kullanan kNN sıralama ifadesi"""
+    if dims > HNSW_MAX_DIMENSIONS:
+        return f"pc.{SHADOW_EMBEDDING_COLUMN}::halfvec({dims}) <=> %(query)s::halfvec({dims})"
+    return f"pc.{SHADOW_EMBEDDING_COLUMN} <=> %(query)s::vector"
+
+
+class PgVectorStore:
+    """pdf_chunks tablosu + setup_pgvector'daki arama fonksiyonları"""
+
+    name = 'pgvector'
+    # migrate_embedding_model: gölge kolona çift yazma ve robot bazlı okuma çevirme
+    supports_embedding_migration = True
+
+    def _existing_chunk_rows(self, cursor, robot_pdf_id, lock: bool = False):
+        cursor.execute(f"""
+            SELECT id, content_hash, chunk_index, metadata
+            FROM pdf_chunks
+            WHERE robot_pdf_id = %s
+            ORDER BY chunk_index
+            {'FOR UPDATE' if lock else ''}
+        """, [robot_pdf_id])
+        return cursor.fetchall()
+
+    def upsert(self, robot_pdf_id, robot_id, chunks, embed, shadow_embed: Embedder = None):
+        stats = {'inserted': 0, 'updated': 0, 'deleted': 0, 'unchanged': 0}
+
+        # Embedding'ler (ağ çağrısı olabilir) kilit almadan, ön planla hesaplanır
+        with connection.cursor() as cursor:
+            planned_chunks = plan_chunk_sync(self._existing_chunk_rows(cursor, robot_pdf_id), chunks)[0]
+        embeddings = embed_chunks_by_hash(planned_chunks, embed)
+        shadow_embeddings = embed_chunks_by_hash(planned_chunks, shadow_embed) if shadow_embed is not None else None
+
+        with transaction.atomic():
+            with connection.cursor() as cursor:
+                # Mevcut chunk'ları kilitle ve planı kilit altında yeniden çıkar (eşzamanlı yeniden işlemeye karşı)
+                new_chunks, updates, stale_ids, unchanged = plan_chunk_sync(
+                    self._existing_chunk_rows(cursor, robot_pdf_id, lock=True), chunks
+                )
+
+                if stale_ids:
+                    cursor.execute("DELETE FROM pdf_chunks WHERE id = ANY(%s)", [stale_ids])
+
+                if updates:
+                    cursor.executemany(
+                        "UPDATE pdf_chunks SET chunk_index = %s, metadata = %s WHERE id = %s",
+                        [(chunk_index, json.dumps(metadata), row_id) for chunk_index, metadata, row_id in updates]
+                    )
+
+                # robot_id kolonu eklenmeden önce yazılmış satırlar
+                cursor.execute(
+                    "UPDATE pdf_chunks SET robot_id = %s WHERE robot_pdf_id = %s AND robot_id IS DISTINCT FROM %s",
+                    [robot_id, robot_pdf_id, robot_id]
+                )
+
+                if new_chunks:
+                    # Ön plandan sonra başka bir işlemin sildiği chunk'lar nadiren kilit altında encode edilir
+                    embeddings = embed_chunks_by_hash(new_chunks, embed, embeddings)
+                    rows = [
+                        (
+                            robot_pdf_id,
+                            robot_id,
+                            chunk['text'],
+                            chunk['chunk_index'],
+                            to_vector_literal(embeddings[chunk['content_hash']]),
+                            json.dumps(chunk['metadata']),
+                            chunk['content_hash']
+                        )
+                        for chunk in new_chunks
+                    ]
+                    columns = CHUNK_COPY_COLUMNS
+                    if shadow_embed is not None:
+                        # Model geçişi sürüyor: yeni chunk'lar gölge kolona da yazılır (backfill beklemez)
+                        shadow_embeddings = embed_chunks_by_hash(new_chunks, shadow_embed, shadow_embeddings)
+                        rows = [
+                            row + (to_vector_literal(shadow_embeddings[chunk['content_hash']]),)
+                            for row, chunk in zip(rows, new_chunks)
+                        ]
+                        columns = CHUNK_COPY_COLUMNS + (SHADOW_EMBEDDING_COLUMN,)
+                    self._bulk_insert_chunks(cursor, rows, columns)
+
+        stats.update(inserted=len(new_chunks), updated=len(updates), deleted=len(stale_ids), unchanged=unchanged)
+        return stats
+
+    def _bulk_insert_chunks(self, cursor, rows: List[tuple], columns: Tuple[str, ...] = CHUNK_COPY_COLUMNS):
+        """Satırları COPY ile (psycopg 3), değilse executemany ile yaz"""
+        raw_cursor = getattr(cursor, 'cursor', cursor)
+        column_list = ', '.join(columns)
+
+        if hasattr(raw_cursor, 'copy'):
+            with raw_cursor.copy(f"COPY pdf_chunks ({column_list}) FROM STDIN") as copy:
+                for row in rows:
+                    copy.write_row(row)
+        else:
+            placeholders = ', '.join('%s::vector' if column.startswith('embedding') else '%s' for column in columns)
+            cursor.executemany(
+                f"INSERT INTO pdf_chunks ({column_list}) VALUES ({placeholders})",
+                rows
+            )
+
+    def delete_by_pdf(self, robot_pdf_id):
+        with connection.cursor() as cursor:
+            cursor.execute("DELETE FROM pdf_chunks WHERE robot_pdf_id = %s", [robot_pdf_id])
+            return cursor.rowcount
+
+    def set_pdf_type(self, robot_pdf_id, pdf_type):
+        with connection.cursor() as cursor:
+            cursor.execute("""
+                UPDATE pdf_chunks
+                SET metadata = jsonb_set(metadata, '{pdf_type}', %s)
+                WHERE robot_pdf_id = %s
+            """, [json.dumps(pdf_type), robot_pdf_id])
+            return cursor.rowcount
+
+    def _fetch_dicts(self, sql: str, params: list) -> List[Dict[str, Any]]:
+        with connection.cursor() as cursor:
+            cursor.execute(sql, params)
+            columns = [desc[0] for desc in cursor.description]
+            return [dict(zip(columns, row)) for row in cursor.fetchall()]
+
+    def get_robot_encoding(self, robot_id) -> str:
+        if robot_id is None:
+            return 'full'
+        return Robot.objects.filter(pk=robot_id).values_list('vector_encoding', flat=True).first() or 'full'
+
+    def knn(self, query_embedding, robot_id=None, robot_pdf_ids=None, top_k=5, similarity_threshold=0.0,
+            embedding_column='embedding', vector_encoding=None):
+        if embedding_column != 'embedding':
+            # Yeni modele çevrilmiş robot: gölge kolon indeksi + aynı kolonla yeniden sıralama
+            order_expression = shadow_order_expression(len(query_embedding))
+            return self._rerank_knn(
+                order_expression, embedding_column, query_embedding, robot_id, robot_pdf_ids, top_k, similarity_threshold
+            )
+
+        encoding = vector_encoding or self.get_robot_encoding(robot_id)
+        if encoding != 'full':
+            order_expression = VECTOR_ENCODING_INDEXES[encoding][2].format(dims=RAGConfig.EMBEDDING_DIMENSIONS)
+            return self._rerank_knn(
+                order_expression, 'embedding', query_embedding, robot_id, robot_pdf_ids, top_k, similarity_threshold
+            )
+
+        return self._fetch_dicts("""
+            SELECT * FROM search_similar_chunks(
+                %s::vector, %s, %s, %s, %s, %s, %s
+            )
+        """, [
+            query_embedding, robot_id, robot_pdf_ids or None, top_k, similarity_threshold,
+            RAGConfig.HNSW_EF_SEARCH, RAGConfig.HNSW_ITERATIVE_SCAN
+        ])
+
+    def _rerank_knn(self, order_expression, column, query_embedding, robot_id, robot_pdf_ids, top_k, similarity_threshold):
+        """
+        HNSW indeksiyle (order_expression) geniş aday kümesi al, adayları tam hassasiyetli
+        `column` ile yeniden sırala (halfvec/binary recall kaybını telafi eder).
+        """
+        params = {
+            'query': to_vector_literal(query_embedding),
+            'robot_id': robot_id,
+            'robot_pdf_ids': robot_pdf_ids or None,
+            'candidates': top_k * RAGConfig.QUANTIZED_RERANK_FACTOR,
+            'top_k': top_k,
+            'threshold': similarity_threshold,
+        }
+
+        # configure_hnsw_scan transaction'a yerel ayar yapar; arama aynı transaction'da çalışmalı
+        with transaction.atomic():
+            with connection.cursor() as cursor:
+                cursor.execute(
+                    "SELECT configure_hnsw_scan(%s, %s)",
+                    [max(RAGConfig.HNSW_EF_SEARCH, params['candidates']), RAGConfig.HNSW_ITERATIVE_SCAN]
+                )
+                cursor.execute(f"""
+                    WITH candidates AS MATERIALIZED (
+                        SELECT pc.id
+                        FROM pdf_chunks pc
+                        WHERE 
+                            pc.{column} IS NOT NULL
+                            AND (%(robot_id)s::integer IS NULL OR pc.robot_id = %(robot_id)s)
+                            AND (%(robot_pdf_ids)s::integer[] IS NULL OR pc.robot_pdf_id = ANY(%(robot_pdf_ids)s))
+                        ORDER BY {order_expression}
+                        LIMIT %(candidates)s
+                    )
+                    SELECT 
+                        pc.id,
+                        pc.robot_pdf_id,
+                        pc.chunk_text,
+                        pc.chunk_index,
+                        (1 - (pc.{column} <=> %(query)s::vector))::float AS similarity,
+                        pc.metadata
+                    FROM candidates c
+                    JOIN pdf_chunks pc ON pc.id = c.id
+                    WHERE (1 - (pc.{column} <=> %(query)s::vector)) >= %(threshold)s
+                    ORDER BY pc.{column} <=> %(query)s::vector
+                    LIMIT %(top_k)s
+                """, params)
+                columns = [desc[0] for desc in cursor.description]
+                return [dict(zip(columns, row)) for row in cursor.fetchall()]
+
+    def text_search(self, query, robot_id=None, robot_pdf_ids=None, top_k=10, similarity_threshold=0.3):
+        return self._fetch_dicts("""
+            SELECT * FROM search_fuzzy_chunks(
+                %s, %s, %s, %s, %s
+            )
+        """, [query, robot_id, robot_pdf_ids or None, top_k, similarity_threshold])
+
+    def hybrid_search(self, query_embedding, query, robot_id=None, robot_pdf_ids=None, top_k=5, similarity_threshold=0.0,
+                      embedding_column='embedding', vector_encoding=None):
+        """Vektör + trigram aramasını tek SQL çağrısında reciprocal-rank fusion ile birleştir"""
+        vector_encoding = vector_encoding or self.get_robot_encoding(robot_id)
+        if embedding_column != 'embedding' or vector_encoding != 'full':
+            # Quantize / gölge kolona çevrilmiş robotlar: yeniden sıralamalı kNN + trigram, RRF Python'da
+            candidates = max(RAGConfig.HYBRID_CANDIDATES, top_k)
+            vector_results = self.knn(
+                query_embedding, robot_id, robot_pdf_ids, candidates, similarity_threshold, embedding_column,
+                vector_encoding
+            )
+            text_results = self.text_search(
+                query, robot_id, robot_pdf_ids, candidates, RAGConfig.FUZZY_SIMILARITY_THRESHOLD
+            )
+            return fuse_reciprocal_rank(vector_results, text_results, top_k)
+
+        return self._fetch_dicts("""
+            SELECT * FROM search_hybrid_chunks(
+                %s::vector, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s
+            )
+        """, [
+            query_embedding,
+            query,
+            robot_id,
+            robot_pdf_ids or None,
+            top_k,
+            similarity_threshold,
+            RAGConfig.FUZZY_SIMILARITY_THRESHOLD,
+            max(RAGConfig.HYBRID_CANDIDATES, top_k),
+            RAGConfig.HYBRID_VECTOR_WEIGHT,
+            RAGConfig.HYBRID_TEXT_WEIGHT,
+            RAGConfig.HYBRID_RRF_K,
+            RAGConfig.HNSW_EF_SEARCH,
+            RAGConfig.HNSW_ITERATIVE_SCAN,
+        ])
+
+    def load_robot_rows(self, robot_id, embedding_column='embedding'):
+        """
+        Robotun aktif PDF chunk'larını (matris, satırlar) olarak yükle.
+        Yeni modele çevrilmiş robotlar için gölge kolon okunur; henüz doldurulmamış satırlar atlanır.
+        """
+        if embedding_column not in ('embedding', SHADOW_EMBEDDING_COLUMN):
+            raise ValueError(f"Bilinmeyen embedding kolonu: {embedding_column}")
+
+        with connection.cursor() as cursor:
+            cursor.execute(f"""
+                SELECT pc.id, pc.robot_pdf_id, pc.chunk_text, pc.chunk_index, pc.metadata, pc.{embedding_column}::text
+                FROM pdf_chunks pc
+                JOIN robots_robotpdf rp ON rp.id = pc.robot_pdf_id
+                WHERE rp.robot_id = %s AND rp.is_active AND pc.{embedding_column} IS NOT NULL
+                ORDER BY pc.robot_pdf_id, pc.chunk_index
+            """, [robot_id])
+            fetched = cursor.fetchall()
+
+        rows = [
+            {
+                'id': row_id,
+                'robot_pdf_id': robot_pdf_id,
+                'chunk_text': chunk_text,
+                'chunk_index': chunk_index,
+                'metadata': json.loads(metadata) if isinstance(metadata, str) else metadata
+            }
+            for row_id, robot_pdf_id, chunk_text, chunk_index, metadata, _ in fetched
+        ]
+        if not rows:
+            return np.zeros((0, RAGConfig.EMBEDDING_DIMENSIONS), dtype=np.float32), []
+        matrix = np.asarray([json.loads(embedding) for *_, embedding in fetched], dtype=np.float32)
+        return matrix, rows
+
+    def stats(self, robot_id=None, robot_pdf_id=None):
+        with connection.cursor() as cursor:
+            cursor.execute("""
+                SELECT COUNT(*), COUNT(DISTINCT robot_pdf_id)
+                FROM pdf_chunks
+                WHERE (%s::integer IS NULL OR robot_id = %s)
+                  AND (%s::integer IS NULL OR robot_pdf_id = %s)
+            """, [robot_id, robot_id, robot_pdf_id, robot_pdf_id])
+            chunks, pdfs = cursor.fetchone()
+            cursor.execute("""
+                SELECT pg_table_size('pdf_chunks'), pg_indexes_size('pdf_chunks')
+            """)
+            table_bytes, index_bytes = cursor.fetchone()
+        return {
+            'backend': self.name,
+            'chunks': chunks,
+            'pdfs': pdfs,
+            'table_bytes': table_bytes,
+            'index_bytes': index_bytes,
+        }
+
+
+# ------------------------------------------------------------------
+# SQLite
+# ------------------------------------------------------------------
+
+class SQLiteVectorStore:
+    """
+    Postgres eklentisi gerektirmeyen yerel depo. Embedding'ler float32 BLOB
+    olarak tutulur; arama, robotun satırları üzerinde NumPy ile yapılır.
+    """
+
+    name = 'sqlite'
+
+    def __init__(self, path: str = None):
+        self.path = path or RAGConfig.SQLITE_VECTOR_PATH
+        self._ensure_schema()
+
+    def _connect(self):
+        return closing(sqlite3.connect(self.path, timeout=30))
+
+    def _ensure_schema(self):
+        with self._connect() as conn, conn:
+            conn.executescript("""
+                CREATE TABLE IF NOT EXISTS pdf_chunks (
+                    id INTEGER PRIMARY KEY AUTOINCREMENT,
+                    robot_pdf_id INTEGER NOT NULL,
+                    robot_id INTEGER,
+                    chunk_text TEXT NOT NULL,
+                    chunk_index INTEGER NOT NULL,
+                    embedding BLOB NOT NULL,
+                    metadata TEXT NOT NULL DEFAULT '{}',
+                    content_hash TEXT
+                );
+                CREATE INDEX IF NOT EXISTS pdf_chunks_robot_id_idx ON pdf_chunks (robot_id);
+                CREATE INDEX IF NOT EXISTS pdf_chunks_pdf_hash_idx ON pdf_chunks (robot_pdf_id, content_hash);
+            """)
+
+    def _existing_chunk_rows(self, conn, robot_pdf_id):
+        return [
+            (row_id, content_hash, chunk_index, json.loads(metadata))
+            for row_id, content_hash, chunk_index, metadata in conn.execute(
+                "SELECT id, content_hash, chunk_index, metadata FROM pdf_chunks "
+                "WHERE robot_pdf_id = ? ORDER BY chunk_index",
+                [robot_pdf_id]
+            )
+        ]
+
+    def upsert(self, robot_pdf_id, robot_id, chunks, embed):
+        stats = {'inserted': 0, 'updated': 0, 'deleted': 0, 'unchanged': 0}
+
+        # Embedding'ler yazma kilidi alınmadan hesaplanır
+        with closing(self._connect()) as conn:
+            planned_chunks = plan_chunk_sync(self._existing_chunk_rows(conn, robot_pdf_id), chunks)[0]
+        embeddings = embed_chunks_by_hash(planned_chunks, embed)
+
+        with self._connect() as conn, conn:
+            # Yazma kilidini al, planı kilit altında yeniden çıkar (eşzamanlı yeniden işlemeye karşı)
+            conn.execute("BEGIN IMMEDIATE")
+            new_chunks, updates, stale_ids, unchanged = plan_chunk_sync(
+                self._existing_chunk_rows(conn, robot_pdf_id), chunks
+            )
+
+            conn.executemany("DELETE FROM pdf_chunks WHERE id = ?", [(row_id,) for row_id in stale_ids])
+            conn.executemany(
+                "UPDATE pdf_chunks SET chunk_index = ?, metadata = ? WHERE id = ?",
+                [(chunk_index, json.dumps(metadata), row_id) for chunk_index, metadata, row_id in updates]
+            )
+            conn.execute("UPDATE pdf_chunks SET robot_id = ? WHERE robot_pdf_id = ?", [robot_id, robot_pdf_id])
+
+            if new_chunks:
+                embeddings = embed_chunks_by_hash(new_chunks, embed, embeddings)
+                conn.executemany("""
+                    INSERT INTO pdf_chunks
+                    (robot_pdf_id, robot_id, chunk_text, chunk_index, embedding, metadata, content_hash)
+                    VALUES (?, ?, ?, ?, ?, ?, ?)
+                """, [
+                    (
+                        robot_pdf_id,
+                        robot_id,
+                        chunk['text'],
+                        chunk['chunk_index'],
+                        np.asarray(embeddings[chunk['content_hash']], dtype=np.float32).tobytes(),
+                        json.dumps(chunk['metadata']),
+                        chunk['content_hash']
+                    )
+                    for chunk in new_chunks
+                ])
+
+        stats.update(inserted=len(new_chunks), updated=len(updates), deleted=len(stale_ids), unchanged=unchanged)
+        return stats
+
+    def delete_by_pdf(self, robot_pdf_id):
+        with self._connect() as conn, conn:
+            return conn.execute("DELETE FROM pdf_chunks WHERE robot_pdf_id = ?", [robot_pdf_id]).rowcount
+
+    def set_pdf_type(self, robot_pdf_id, pdf_type):
+        with self._connect() as conn, conn:
+            return conn.execute(
+                "UPDATE pdf_chunks SET metadata = json_set(metadata, '$.pdf_type', ?) WHERE robot_pdf_id = ?",
+                [pdf_type, robot_pdf_id]
+            ).rowcount
+
+    def _load_index(self, robot_id=None, robot_pdf_ids=None) -> RobotVectorIndex:
+        where, params = [], []
+        if robot_id is not None:
+            where.append("robot_id = ?")
+            params.append(robot_id)
+        if robot_pdf_ids:
+            where.append(f"robot_pdf_id IN ({','.join('?' * len(robot_pdf_ids))})")
+            params.extend(robot_pdf_ids)
+
+        sql = "SELECT id, robot_pdf_id, chunk_text, chunk_index, metadata, embedding FROM pdf_chunks"
+        if where:
+            sql += " WHERE " + " AND ".join(where)
+        sql += " ORDER BY robot_pdf_id, chunk_index"
+
+        with self._connect() as conn:
+            fetched = conn.execute(sql, params).fetchall()
+
+        rows = [
+            {
+                'id': row_id,
+                'robot_pdf_id': robot_pdf_id,
+                'chunk_text': chunk_text,
+                'chunk_index': chunk_index,
+                'metadata': json.loads(metadata)
+            }
+            for row_id, robot_pdf_id, chunk_text, chunk_index, metadata, _ in fetched
+        ]
+        vectors = [np.frombuffer(embedding, dtype=np.float32) for *_, embedding in fetched]
+        matrix = np.vstack(vectors) if vectors else np.zeros((0, RAGConfig.EMBEDDING_DIMENSIONS), dtype=np.float32)
+        return RobotVectorIndex(robot_id or 0, 0, matrix, rows)
+
+    def knn(self, query_embedding, robot_id=None, robot_pdf_ids=None, top_k=5, similarity_threshold=0.0):
+        return self._load_index(robot_id, robot_pdf_ids).knn(query_embedding, top_k, similarity_threshold)
+
+    def text_search(self, query, robot_id=None, robot_pdf_ids=None, top_k=10, similarity_threshold=0.3):
+        return self._load_index(robot_id, robot_pdf_ids).text_search(query, top_k, similarity_threshold)
+
+    def load_robot_rows(self, robot_id, embedding_column='embedding'):
+        """Robotun aktif PDF chunk'larını (matris, satırlar) olarak yükle"""
+        if embedding_column != 'embedding':
+            # SQLite deposunda gölge kolon yok (embedding model geçişi desteklenmez)
+            raise ValueError(f"{self.name} deposu embedding model geçişini desteklemiyor: {embedding_column}")
+        active_ids = list(RobotPDF.objects.filter(robot_id=robot_id, is_active=True).values_list('id', flat=True))
+        if not active_ids:
+            return np.zeros((0, RAGConfig.EMBEDDING_DIMENSIONS), dtype=np.float32), []
+        index = self._load_index(robot_id, active_ids)
+        return index.matrix, index.rows
+
+    def stats(self, robot_id=None, robot_pdf_id=None):
+        with self._connect() as conn:
+            chunks, pdfs = conn.execute("""
+                SELECT COUNT(*), COUNT(DISTINCT robot_pdf_id)
+                FROM pdf_chunks
+                WHERE (? IS NULL OR robot_id = ?) AND (? IS NULL OR robot_pdf_id = ?)
+            """, [robot_id, robot_id, robot_pdf_id, robot_pdf_id]).fetchone()
+        return {'backend': self.name, 'chunks': chunks, 'pdfs': pdfs, 'path': self.path}
+
+
+# ------------------------------------------------------------------
+# NumPy (bellek içi)
+# ------------------------------------------------------------------
+
+class NumpyVectorStore:
+    """
+    Aramalar robot başına bellek içi matriste yapılır; yazmalar kalıcı kaynağa
+    (pgvector ya da SQLite) gider. İndeks robotun context_version'ı ile yenilenir.
+    Embedding model geçişinde her robotun matrisi, planındaki okuma kolonundan kurulur
+    (çevirme context_version'ı artırdığından indeks kendiliğinden yenilenir).
+    """
+
+    name = 'numpy'
+
+    def __init__(self, source: VectorStore):
+        self.source = source
+
+    @property
+    def supports_embedding_migration(self) -> bool:
+        # Gölge kolon kalıcı kaynakta tutulur (yalnızca pgvector)
+        return getattr(self.source, 'supports_embedding_migration', False)
+
+    def upsert(self, robot_pdf_id, robot_id, chunks, embed, shadow_embed: Embedder = None):
+        if shadow_embed is not None:
+            return self.source.upsert(robot_pdf_id, robot_id, chunks, embed, shadow_embed=shadow_embed)
+        return self.source.upsert(robot_pdf_id, robot_id, chunks, embed)
+
+    def delete_by_pdf(self, robot_pdf_id):
+        return self.source.delete_by_pdf(robot_pdf_id)
+
+    def set_pdf_type(self, robot_pdf_id, pdf_type):
+        return self.source.set_pdf_type(robot_pdf_id, pdf_type)
+
+    def _read_column(self, robot) -> str:
+        """Robotun matrisinin kurulacağı embedding kolonu (geçiş yoksa `embedding`)"""
+        if not self.supports_embedding_migration:
+            return 'embedding'
+        from .rag_services import get_embedding_plan
+        return get_embedding_plan(robot=robot)['read_column']
+
+    def _indexes(self, robot_id=None, robot_pdf_ids=None, embedding_column=None) -> List[RobotVectorIndex]:
+        """
+        Robotların bellek içi indeksleri. embedding_column verilirse yalnızca okuma kolonu
+        bu olan robotlar döner (sorgu embedding'i başka modelin uzayındaki matrislerle karşılaştırılmaz).
+        """
+        if robot_id is not None:
+            robot_ids = [robot_id]
+        elif robot_pdf_ids:
+            robot_ids = sorted(set(
+                RobotPDF.objects.filter(pk__in=robot_pdf_ids).values_list('robot_id', flat=True)
+            ))
+        else:
+            robot_ids = list(Robot.objects.values_list('id', flat=True))
+
+        robots = Robot.objects.filter(pk__in=robot_ids).only(
+            'id', 'context_version', 'embedding_model', 'vector_encoding'
+        ).order_by('id')
+        indexes = []
+        for robot in robots:
+            column = self._read_column(robot)
+            if embedding_column is not None and column != embedding_column:
+                continue
+            indexes.append(vector_index_registry.get(
+                robot.id, robot.context_version,
+                lambda rid, column=column: self.source.load_robot_rows(rid, embedding_column=column)
+            ))
+        return indexes
+
+    def knn(self, query_embedding, robot_id=None, robot_pdf_ids=None, top_k=5, similarity_threshold=0.0,
+            embedding_column='embedding', vector_encoding=None):
+        # vector_encoding yalnızca pgvector indeksleri içindir; bellek içi matris her zaman float32
+        results = []
+        for index in self._indexes(robot_id, robot_pdf_ids, embedding_column):
+            results.extend(index.knn(query_embedding, top_k, similarity_threshold, robot_pdf_ids))
+        results.sort(key=lambda result: result['similarity'], reverse=True)
+        return results[:top_k]
+
+    def text_search(self, query, robot_id=None, robot_pdf_ids=None, top_k=10, similarity_threshold=0.3):
+        results = []
+        for index in self._indexes(robot_id, robot_pdf_ids):
+            results.extend(index.text_search(query, top_k, similarity_threshold, robot_pdf_ids))
+        results.sort(key=lambda result: result['text_similarity'], reverse=True)
+        return results[:top_k]
+
+    def load_robot_rows(self, robot_id, embedding_column='embedding'):
+        return self.source.load_robot_rows(robot_id, embedding_column=embedding_column)
+
+    def stats(self, robot_id=None, robot_pdf_id=None):
+        return {
+            **self.source.stats(robot_id, robot_pdf_id),
+            'backend': self.name,
+            'source': self.source.name,
+            'memory': vector_index_registry.get_stats(),
+        }
+
+
+# ------------------------------------------------------------------
+# Seçim
+# ------------------------------------------------------------------
+
+VECTOR_STORE_CLASSES = {
+    'pgvector': PgVectorStore,
+    'sqlite': SQLiteVectorStore,
+    'numpy': NumpyVectorStore,
+}
+
+_stores: Dict[str, VectorStore] = {}
+_stores_lock = threading.RLock()  # numpy deposu kaynağını da bu kilit altında alır
+
+
+def create_vector_store(backend: str) -> VectorStore:
+    """Backend adına göre yeni bir depo oluştur"""
+    if backend not in VECTOR_STORE_CLASSES:
+        raise ValueError(f"Bilinmeyen vektör backend'i: {backend} (seçenekler: {', '.join(VECTOR_STORE_CLASSES)})")
+
+    if backend == 'numpy':
+        # Kalıcı kaynak: pgvector şeması kuruluysa Postgres, değilse yerel SQLite
+        source = 'pgvector' if 'pdf_chunks' in get_pgvector_tables() else 'sqlite'
+        return NumpyVectorStore(get_vector_store(source))
+    return VECTOR_STORE_CLASSES[backend]()
+
+
+def get_vector_store(backend: str = None) -> VectorStore:
+    """Process başına backend başına tek depo (varsayılan: RAGConfig.VECTOR_BACKEND)"""
+    backend = backend or RAGConfig.VECTOR_BACKEND
+    store = _stores.get(backend)
+    if store is None:
+        with _stores_lock:
+            store = _stores.get(backend)
+            if store is None:
+                store = _stores[backend] = create_vector_store(backend)
+                logger.info(f"🗄️ Vektör deposu hazır: {store.name}")
+    return store
@@ -0,0 +1,118 @@
+"""
+Marka kotası testleri (robots/quota.py)
+Rezervasyon, geri verme, uzlaştırma ve paket yenilemede sayaç sıfırlama
+"""
+
+from unittest import mock
+
+from django.test import TestCase
+
+from robots.models import Brand, BrandUsageBucket
+from robots.quota import (
+    get_brand_usage, reconcile_brand_usage, release_brand_request, reserve_brand_request,
+)
+
+
+class BrandQuotaTests(TestCase):
+
+    def setUp(self):
+        self.brand = Brand.objects.create(name='Test Marka')
+
+    def test_reserve_counts_in_ledger_not_on_brand_row(self):
+        reservations = [reserve_brand_request(self.brand) for _ in range(3)]
+
+        self.assertTrue(all(reservations))
+        self.assertEqual(get_brand_usage(self.brand.pk), (3, 500))
+        self.assertEqual(self.brand.get_used_api_requests(), 3)
+        self.brand.refresh_from_db()
+        self.assertEqual(self.brand.total_api_requests, 0)
+
+    def test_release_gives_the_reservation_back(self):
+        reservation = reserve_brand_request(self.brand)
+
+        release_brand_request(reservation)
+        release_brand_request(None)
+
+        self.assertEqual(get_brand_usage(self.brand.pk)[0], 0)
+
+    def test_reconcile_moves_ledger_counts_to_total(self):
+        for _ in range(4):
+            reserve_brand_request(self.brand)
+        other = Brand.objects.create(name='Diğer Marka')
+        reserve_brand_request(other)
+
+        self.assertEqual(reconcile_brand_usage(self.brand.pk), {self.brand.pk: 4})
+        self.assertEqual(reconcile_brand_usage(), {other.pk: 1})
+        self.assertEqual(reconcile_brand_usage(), {})
+
+        self.brand.refresh_from_db()
+        self.assertEqual(self.brand.total_api_requests, 4)
+        self.assertEqual(get_brand_usage(self.brand.pk)[0], 4)
+        self.assertFalse(BrandUsageBucket.objects.filter(brand=self.brand, count__gt=0, reconciled=0).exists())
+
+    def test_release_after_reconcile_decrements_total(self):
+        reservation = reserve_brand_request(self.brand)
+        reconcile_brand_usage()
+
+        release_brand_request(reservation)
+
+        self.brand.refresh_from_db()
+        self.assertEqual(self.brand.total_api_requests, 0)
+        self.assertEqual(get_brand_usage(self.brand.pk)[0], 0)
+
+    def test_limit_is_exact_near_the_boundary(self):
+        Brand.objects.filter(pk=self.brand.pk).update(total_api_requests=498)
+
+        with mock.patch('robots.quota.QUOTA_EXACT_MARGIN', 50):
+            self.assertIsNotNone(reserve_brand_request(self.brand))
+            reservation = reserve_brand_request(self.brand)
+            self.assertIsNotNone(reservation)
+            self.assertIsNone(reserve_brand_request(self.brand))
+
+            # Geri verilen rezervasyon kotayı tekrar açar
+            release_brand_request(reservation)
+            self.assertIsNotNone(reserve_brand_request(self.brand))
+
+        self.assertEqual(get_brand_usage(self.brand.pk), (500, 500))
+        self.assertTrue(self.brand.is_limit_exceeded())
+
+    def test_plain_save_does_not_overwrite_counter(self):
+        stale = Brand.objects.get(pk=self.brand.pk)
+        reserve_brand_request(self.brand)
+        reconcile_brand_usage()
+
+        stale.name = 'Yeni İsim'
+        stale.save()
+
+        self.brand.refresh_from_db()
+        self.assertEqual((self.brand.name, self.brand.total_api_requests), ('Yeni İsim', 1))
+
+    def test_explicit_counter_edit_is_saved(self):
+        reserve_brand_request(self.brand)
+        reconcile_brand_usage()
+        brand = Brand.objects.get(pk=self.brand.pk)
+
+        brand.total_api_requests = 10
+        brand.save()
+
+        brand.refresh_from_db()
+        self.assertEqual(brand.total_api_requests, 10)
+
+        # Yenilenen örnek sayaca dokunmadan kaydedilince F() artışları korunur
+        reserve_brand_request(brand)
+        reconcile_brand_usage()
+        brand.name = 'Başka İsim'
+        brand.save()
+        self.assertEqual(Brand.objects.get(pk=brand.pk).total_api_requests, 11)
+
+    def test_package_renewal_resets_counter_and_ledger(self):
+        for _ in range(2):
+            reserve_brand_request(self.brand)
+        reconcile_brand_usage()
+        reserve_brand_request(self.brand)
+
+        result = self.brand.change_package_type('normal')
+
+        self.assertTrue(result['reset_requests'])
+        self.assertEqual(get_brand_usage(self.brand.pk)[0], 0)
+        self.assertEqual(reconcile_brand_usage(), {})
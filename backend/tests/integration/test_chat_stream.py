@@ -0,0 +1,103 @@
+"""
+SSE chat endpoint'i testleri (/api/robots/<slug>/chat/stream/)
+Herkese açık JSON chat endpoint'i ile ortak tur: anonim erişim, alias slug'lar, Sidrex kotası
+"""
+
+import json
+from unittest import mock
+
+from django.test import TestCase
+from rest_framework.test import APIClient
+
+from robots.api.chat_turn import PublicChatTurnMixin
+from robots.models import Brand, Robot
+from robots.quota import get_brand_usage
+
+
+class FakeAIHandler:
+
+    def __init__(self, deltas=(), error=None):
+        self.deltas = deltas
+        self.error = error
+
+    def stream_chat(self, messages, model=None, max_tokens=6000):
+        yield from self.deltas
+        if self.error is not None:
+            raise self.error
+
+
+def parse_events(response):
+    """SSE çerçevelerini (event, data) listesine çevir"""
+    events = []
+    for frame in b''.join(response.streaming_content).decode('utf-8').split('\n\n'):
+        if not frame:
+            continue
+        event, data = 'message', None
+        for line in frame.split('\n'):
+            if line.startswith('event: '):
+                event = line[len('event: '):]
+            elif line.startswith('data: '):
+                data = json.loads(line[len('data: '):])
+        events.append((event, data))
+    return events
+
+
+class RobotChatStreamTests(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.brand = Brand.objects.create(name='Stream Marka')
+        cls.robot = Robot.objects.create(name='SidrexGPT Asistanı', product_name='Ürün', brand=cls.brand)
+
+    def setUp(self):
+        self.client = APIClient()
+        self.sidrex = Brand.get_or_create_sidrex()
+        patches = [
+            mock.patch('robots.api.chat_turn.answer_cache', enabled=False),
+            mock.patch('robots.telemetry.chat_telemetry.submit'),
+            mock.patch.object(PublicChatTurnMixin, 'build_system_prompt', return_value=('Sistem', {}, {})),
+        ]
+        for patcher in patches:
+            patcher.start()
+            self.addCleanup(patcher.stop)
+
+    def post_stream(self, handler, slug='sidrexgpt'):
+        with mock.patch('robots.api.views.get_ai_handler', return_value=handler):
+            response = self.client.post(
+                f'/api/robots/{slug}/chat/stream/', {'message': 'Merhaba'}, format='json'
+            )
+            events = parse_events(response) if response.streaming else None
+        return response, events
+
+    def test_anonymous_widget_streams_through_legacy_alias(self):
+        response, events = self.post_stream(FakeAIHandler(deltas=['Mer', 'haba']))
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(events[:2], [('message', {'delta': 'Mer'}), ('message', {'delta': 'haba'})])
+        event, payload = events[-1]
+        self.assertEqual(event, 'done')
+        # JSON endpoint'i ile aynı yanıt sözleşmesi
+        self.assertEqual((payload['robot_id'], payload['robot_response']), (self.robot.id, 'Merhaba'))
+        # Kota robotun markasından değil Sidrex markasından harcanır
+        self.assertEqual(get_brand_usage(self.sidrex.pk)[0], 1)
+        self.assertEqual(get_brand_usage(self.brand.pk)[0], 0)
+
+    def test_failed_stream_gives_the_reservation_back(self):
+        response, events = self.post_stream(FakeAIHandler(deltas=['Yar'], error=ValueError('AI hatası')))
+
+        self.assertEqual(events[-1][0], 'error')
+        self.assertEqual(events[-1][1]['robot_response'], 'AI hatası')
+        self.assertEqual(get_brand_usage(self.sidrex.pk)[0], 0)
+
+    def test_limit_exceeded_returns_json_without_streaming(self):
+        Brand.objects.filter(pk=self.sidrex.pk).update(total_api_requests=self.sidrex.request_limit)
+
+        response, events = self.post_stream(FakeAIHandler(deltas=['Hiç']))
+
+        self.assertIsNone(events)
+        self.assertTrue(response.json()['limit_exceeded'])
+
+    def test_unknown_slug_is_not_found(self):
+        response, _ = self.post_stream(FakeAIHandler(), slug='olmayan-robot')
+
+        self.assertEqual(response.status_code, 404)
@@ -0,0 +1,162 @@
+"""
+Write-behind chat telemetrisi testleri (robots/telemetry.py)
+Flush, telemetry_id ile tekilleştirme, yeniden deneme, dead-letter ve spill kurtarma
+"""
+
+import json
+import os
+import tempfile
+from unittest import mock
+
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db import OperationalError
+from django.test import TestCase
+
+from robots.models import Brand, ChatMessage, ChatSession, Robot
+from robots.telemetry import DEAD_LETTER_NAME, ChatTelemetryBuffer, serialize_message
+
+try:
+    import fcntl
+except ImportError:  # Windows
+    fcntl = None
+
+
+class ChatTelemetryBufferTests(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        brand = Brand.objects.create(name='Telemetri Marka')
+        cls.robot = Robot.objects.create(name='Telemetri Robot', product_name='Ürün', brand=brand)
+
+    def setUp(self):
+        spill_dir = tempfile.TemporaryDirectory()
+        self.addCleanup(spill_dir.cleanup)
+        self.spill_dir = spill_dir.name
+
+        self.buffer = ChatTelemetryBuffer(batch_size=10, spill_dir=self.spill_dir, enabled=True)
+        # Arka plan thread'i başlatılmaz; flush testte elle çağrılır
+        patcher = mock.patch.object(self.buffer, '_ensure_started')
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self.addCleanup(self.close_buffer_files)
+
+    def close_buffer_files(self):
+        for handle in (self.buffer._spill, self.buffer._owner_lock):
+            if handle is not None:
+                handle.close()
+
+    def make_message(self, text='Merhaba', session_id='oturum-1', **fields):
+        message = ChatMessage(
+            robot_id=self.robot.id, message_type='user', user_message=text, status='processing', **fields
+        )
+        message.telemetry_session = {
+            'session_id': session_id, 'user_id': None, 'robot_id': self.robot.id,
+            'user_ip': '127.0.0.1', 'user_agent': 'test',
+        }
+        return message
+
+    def test_flush_writes_last_state_once_per_telemetry_id(self):
+        message = self.make_message()
+        message.status = 'failed'
+        self.buffer.submit(message)
+        message.status = 'completed'
+        message.ai_response = 'Cevap'
+        self.buffer.submit(message)
+
+        self.assertEqual(self.buffer.flush(), 1)
+
+        saved = ChatMessage.objects.get(telemetry_id=message.telemetry_id)
+        self.assertEqual((saved.status, saved.ai_response), ('completed', 'Cevap'))
+        session = ChatSession.objects.get(session_id='oturum-1')
+        self.assertEqual(session.total_messages, 1)
+        # Yazılan segment silinir; sadece örnek kilidi kalır
+        self.assertEqual(self.buffer.spill_files(), [])
+
+    def test_messages_of_one_session_share_the_resolved_session(self):
+        for text in ('Bir', 'İki'):
+            self.buffer.submit(self.make_message(text, response_time='1.500'))
+
+        self.assertEqual(self.buffer.flush(), 2)
+
+        session = ChatSession.objects.get(session_id='oturum-1')
+        self.assertEqual(session.total_messages, 2)
+        self.assertEqual(session.chat_messages.count(), 2)
+
+    def test_replayed_events_are_skipped(self):
+        event = serialize_message(self.make_message())
+
+        self.assertEqual(self.buffer.write_events([event]), 1)
+        self.assertEqual(self.buffer.write_events([event]), 0)
+
+        self.assertEqual(ChatMessage.objects.filter(telemetry_id=event['fields']['telemetry_id']).count(), 1)
+        self.assertEqual(ChatSession.objects.get(session_id='oturum-1').total_messages, 1)
+
+    def test_unreachable_database_keeps_batch_for_retry(self):
+        self.buffer.submit(self.make_message())
+
+        with mock.patch.object(self.buffer, 'write_events', side_effect=OperationalError('bağlantı yok')):
+            self.assertEqual(self.buffer.flush(), 0)
+        self.assertEqual(self.buffer.retry_count, 1)
+        self.assertEqual(len(self.buffer.spill_files()), 1)
+
+        self.assertEqual(self.buffer.flush(), 1)
+        self.assertEqual(self.buffer.retry_count, 0)
+        self.assertEqual(self.buffer.spill_files(), [])
+
+    @mock.patch('robots.telemetry.TELEMETRY_MAX_ATTEMPTS', 1)
+    def test_poison_event_goes_to_dead_letter_and_can_be_replayed(self):
+        good = self.make_message('Sağlam')
+        poison = self.make_message(None)
+        self.buffer.submit(good)
+        self.buffer.submit(poison)
+
+        # Batch yazılamaz; olaylar tek tek denenir, zehirli olay ayrılır
+        self.assertEqual(self.buffer.flush(), 1)
+        self.assertTrue(ChatMessage.objects.filter(telemetry_id=good.telemetry_id).exists())
+
+        dead_path = os.path.join(self.spill_dir, DEAD_LETTER_NAME)
+        self.assertEqual(self.buffer.replay_dead_letters(), (0, 1))
+
+        with open(dead_path, encoding='utf-8') as f:
+            events = [json.loads(line) for line in f]
+        events[0]['fields']['user_message'] = 'Düzeltildi'
+        with open(dead_path, 'w', encoding='utf-8') as f:
+            f.write(json.dumps(events[0], cls=DjangoJSONEncoder) + '\n')
+
+        self.assertEqual(self.buffer.replay_dead_letters(), (1, 1))
+        self.assertFalse(os.path.exists(dead_path))
+        self.assertEqual(ChatMessage.objects.get(telemetry_id=poison.telemetry_id).user_message, 'Düzeltildi')
+
+    def write_orphan_spill(self, instance, messages):
+        path = os.path.join(self.spill_dir, f"chat-telemetry-{instance}.jsonl")
+        with open(path, 'w', encoding='utf-8') as f:
+            for message in messages:
+                f.write(json.dumps(serialize_message(message), cls=DjangoJSONEncoder) + '\n')
+            # Çökme anında yarım kalmış satır
+            f.write('{"fields": {')
+        return path
+
+    @mock.patch('robots.telemetry._pid_alive', return_value=False)
+    def test_dead_owner_spill_is_recovered(self, _pid_alive):
+        message = self.make_message('Kurtarılacak')
+        path = self.write_orphan_spill('999999-0123456789ab', [message])
+
+        self.assertEqual(self.buffer.recover_orphans(), 1)
+
+        self.assertFalse(os.path.exists(path))
+        self.assertEqual(ChatMessage.objects.get(telemetry_id=message.telemetry_id).user_message, 'Kurtarılacak')
+        self.assertEqual(self.buffer.spill_files(include_locks=True), [])
+
+    @mock.patch('robots.telemetry._pid_alive', return_value=True)
+    def test_live_owner_spill_is_left_alone(self, _pid_alive):
+        instance = '999999-0123456789ab'
+        path = self.write_orphan_spill(instance, [self.make_message()])
+        lock = open(os.path.join(self.spill_dir, f"chat-telemetry-{instance}.lock"), 'w')
+        self.addCleanup(lock.close)
+        if fcntl is not None:
+            fcntl.flock(lock, fcntl.LOCK_EX | fcntl.LOCK_NB)
+
+        self.assertEqual(self.buffer.recover_orphans(), 0)
+
+        self.assertTrue(os.path.exists(path))
+        self.assertFalse(ChatMessage.objects.exists())
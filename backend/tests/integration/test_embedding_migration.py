@@ -0,0 +1,173 @@
+"""
+Embedding model geçişi durum makinesi testleri (robots/rag_services.get_embedding_plan)
+Geçiş yok -> dolduruluyor -> robot çevrildi -> iptal/bitiş; plan context_version ile cache'lenir
+"""
+
+from unittest import mock
+
+import numpy as np
+from django.db.models import F
+from django.test import SimpleTestCase, TestCase
+
+from robots import rag_services
+from robots.models import Brand, EmbeddingMigration, Robot, default_vector_encoding
+from robots.rag_config import RAGConfig
+from robots.rag_services import get_active_migration, get_embedding_plan
+from robots.vector_index import vector_index_registry
+from robots.vector_stores import SHADOW_EMBEDDING_COLUMN, NumpyVectorStore
+
+SOURCE_MODEL = 'kaynak-model'
+TARGET_MODEL = 'hedef-model'
+
+
+class EmbeddingMigrationPlanTests(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.brand = Brand.objects.create(name='Geçiş Marka')
+
+    def setUp(self):
+        rag_services._active_migrations.clear()
+        self.addCleanup(rag_services._active_migrations.clear)
+        self.robot = Robot.objects.create(name='Geçiş Robot', product_name='Ürün', brand=self.brand)
+
+    def bump_versions(self, **fields):
+        """migrate_embedding_model'in her durum değişikliğinde yaptığı gibi"""
+        Robot.objects.update(context_version=F('context_version') + 1, **fields)
+        self.robot.refresh_from_db()
+
+    def start_migration(self):
+        migration = EmbeddingMigration.objects.create(
+            source_model=SOURCE_MODEL, target_model=TARGET_MODEL, dimensions=768
+        )
+        self.bump_versions()
+        return migration
+
+    def test_without_migration_everything_uses_the_configured_model(self):
+        plan = get_embedding_plan(robot=self.robot)
+
+        self.assertEqual(plan['read_model'], RAGConfig.EMBEDDING_MODEL)
+        self.assertEqual(plan['write_model'], RAGConfig.EMBEDDING_MODEL)
+        self.assertEqual(plan['read_column'], 'embedding')
+        self.assertIsNone(plan['shadow_model'])
+        self.assertEqual(plan['vector_encoding'], self.robot.vector_encoding)
+
+    def test_backfilling_reads_source_and_writes_shadow(self):
+        self.start_migration()
+
+        plan = get_embedding_plan(robot=self.robot)
+
+        self.assertEqual((plan['read_model'], plan['read_column']), (SOURCE_MODEL, 'embedding'))
+        self.assertEqual((plan['write_model'], plan['shadow_model']), (SOURCE_MODEL, TARGET_MODEL))
+
+    def test_flipped_robot_reads_shadow_column(self):
+        self.start_migration()
+        other = Robot.objects.create(name='Çevrilmeyen Robot', product_name='Ürün', brand=self.brand)
+        Robot.objects.filter(pk=self.robot.pk).update(embedding_model=TARGET_MODEL)
+        self.bump_versions()
+        other.refresh_from_db()
+
+        plan = get_embedding_plan(robot_id=self.robot.pk)
+        self.assertEqual((plan['read_model'], plan['read_column']), (TARGET_MODEL, SHADOW_EMBEDDING_COLUMN))
+        # Yeni chunk'lar geçiş bitene kadar her iki kolona da yazılır
+        self.assertEqual((plan['write_model'], plan['shadow_model']), (SOURCE_MODEL, TARGET_MODEL))
+
+        self.assertEqual(get_embedding_plan(robot=other)['read_model'], SOURCE_MODEL)
+
+    def test_abort_and_completion_return_to_the_configured_model(self):
+        for status in ('aborted', 'completed'):
+            migration = self.start_migration()
+            Robot.objects.filter(pk=self.robot.pk).update(embedding_model=TARGET_MODEL)
+
+            EmbeddingMigration.objects.filter(pk=migration.pk).update(status=status)
+            self.bump_versions(embedding_model='')
+
+            plan = get_embedding_plan(robot=self.robot)
+            self.assertEqual((plan['read_model'], plan['read_column']), (RAGConfig.EMBEDDING_MODEL, 'embedding'))
+            self.assertIsNone(plan['shadow_model'])
+
+    def test_active_migration_is_cached_per_context_version(self):
+        self.assertIsNone(get_active_migration(self.robot))
+
+        # Versiyon artmadan başlatılan geçiş süreç içinde görünmez (sorgu atılmaz)
+        migration = EmbeddingMigration.objects.create(
+            source_model=SOURCE_MODEL, target_model=TARGET_MODEL, dimensions=768
+        )
+        with self.assertNumQueries(0):
+            self.assertIsNone(get_active_migration(self.robot))
+
+        self.bump_versions()
+        self.assertEqual(get_active_migration(self.robot), migration)
+        # Robot verilmezse her zaman veritabanından okunur
+        self.assertEqual(get_active_migration(), migration)
+
+
+class FakeSource:
+    """Kolon başına sabit vektörler döndüren kalıcı kaynak"""
+
+    name = 'sahte'
+    supports_embedding_migration = True
+
+    def __init__(self):
+        self.loaded = []
+
+    def load_robot_rows(self, robot_id, embedding_column='embedding'):
+        self.loaded.append((robot_id, embedding_column))
+        vector = [1.0, 0.0] if embedding_column == 'embedding' else [0.0, 1.0]
+        rows = [{'id': robot_id, 'robot_pdf_id': robot_id, 'chunk_text': 'metin', 'chunk_index': 0, 'metadata': {}}]
+        return np.asarray([vector], dtype=np.float32), rows
+
+
+@mock.patch.object(RAGConfig, 'NUMPY_INDEX_DIR', '')
+class NumpyStoreMigrationTests(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        brand = Brand.objects.create(name='Numpy Geçiş Marka')
+        cls.robot = Robot.objects.create(name='Çevrilen Robot', product_name='Ürün', brand=brand)
+        cls.other = Robot.objects.create(name='Bekleyen Robot', product_name='Ürün', brand=brand)
+
+    def setUp(self):
+        rag_services._active_migrations.clear()
+        vector_index_registry.invalidate()
+        self.addCleanup(rag_services._active_migrations.clear)
+        self.addCleanup(vector_index_registry.invalidate)
+        self.source = FakeSource()
+        self.store = NumpyVectorStore(self.source)
+
+        EmbeddingMigration.objects.create(source_model=SOURCE_MODEL, target_model=TARGET_MODEL, dimensions=2)
+        Robot.objects.filter(pk=self.robot.pk).update(embedding_model=TARGET_MODEL)
+        Robot.objects.update(context_version=F('context_version') + 1)
+
+    def test_flipped_robot_matrix_comes_from_shadow_column(self):
+        results = self.store.knn([0.0, 1.0], robot_id=self.robot.pk, embedding_column=SHADOW_EMBEDDING_COLUMN)
+
+        self.assertEqual(self.source.loaded, [(self.robot.pk, SHADOW_EMBEDDING_COLUMN)])
+        self.assertAlmostEqual(results[0]['similarity'], 1.0)
+
+    def test_search_across_robots_skips_other_embedding_space(self):
+        results = self.store.knn([1.0, 0.0], top_k=5)
+
+        self.assertEqual([result['id'] for result in results], [self.other.pk])
+        # Metin araması embedding'den bağımsızdır; iki robot da aranır
+        self.assertEqual(len(self.store._indexes()), 2)
+
+    def test_sqlite_source_does_not_claim_migration_support(self):
+        self.source.supports_embedding_migration = False
+
+        self.assertFalse(self.store.supports_embedding_migration)
+        self.store.knn([1.0, 0.0], robot_id=self.robot.pk)
+        self.assertEqual(self.source.loaded, [(self.robot.pk, 'embedding')])
+
+
+class DefaultVectorEncodingTests(SimpleTestCase):
+
+    def test_halfvec_above_hnsw_vector_limit(self):
+        with mock.patch.object(RAGConfig, 'EMBEDDING_DIMENSIONS', 3072):
+            self.assertEqual(default_vector_encoding(), 'halfvec')
+        with mock.patch.object(RAGConfig, 'EMBEDDING_DIMENSIONS', 1536):
+            self.assertEqual(default_vector_encoding(), 'full')
+
+    def test_configured_encoding_wins_after_full_flip(self):
+        with mock.patch.object(RAGConfig, 'VECTOR_ENCODING', 'binary'):
+            self.assertEqual(default_vector_encoding(), 'binary')
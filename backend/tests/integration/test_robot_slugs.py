@@ -0,0 +1,64 @@
+"""
+Kalıcı robot slug'ı testleri
+0028 migration'ındaki backfill ve Robot.save() çakışma son ekleri
+"""
+
+from datetime import timedelta
+from importlib import import_module
+
+from django.apps import apps
+from django.test import TestCase
+from django.utils import timezone
+
+from robots.models import Brand, Robot
+
+slug_migration = import_module('robots.migrations.0028_robot_slug')
+
+
+class RobotSlugTests(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.brand = Brand.objects.create(name='Slug Marka')
+
+    def create_robot(self, name):
+        return Robot.objects.create(name=name, product_name='Ürün', brand=self.brand)
+
+    def test_save_generates_unique_slug_once(self):
+        first = self.create_robot('İmuntus Kids')
+        second = self.create_robot('Kids Yeni')
+        third = self.create_robot('Kids Üçüncü')
+
+        self.assertEqual([first.slug, second.slug, third.slug], ['sidrexgpt-kids', 'sidrexgpt-kids-2', 'sidrexgpt-kids-3'])
+
+        # İsim değişse de slug (ve URL) sabit kalır
+        first.name = 'Yeni Ürün Robotu'
+        first.save()
+        first.refresh_from_db()
+        self.assertEqual(first.slug, 'sidrexgpt-kids')
+
+    def test_general_and_empty_names(self):
+        self.assertEqual(self.create_robot('Çağrı Şöför Robotu').slug, 'cagri-sofor-robotu')
+        self.assertEqual(self.create_robot('!!!').slug, 'robot')
+        self.assertEqual(self.create_robot('???').slug, 'robot-2')
+
+    def test_backfill_gives_plain_slug_to_newest_robot(self):
+        oldest = self.create_robot('SidrexGPT Mag')
+        newest = self.create_robot('Mag Kapsül')
+        plain = self.create_robot('Başka Robot')
+        now = timezone.now()
+        Robot.objects.filter(pk=oldest.pk).update(yaratilma_zamani=now - timedelta(days=2))
+        Robot.objects.filter(pk=newest.pk).update(yaratilma_zamani=now)
+        Robot.objects.update(slug=None)
+
+        slug_migration.backfill_slugs(apps, None)
+
+        slugs = dict(Robot.objects.values_list('pk', 'slug'))
+        # Eski çözümleme ilk eşleşen (en yeni) robotu seçiyordu; sade slug onda kalır
+        self.assertEqual(slugs[newest.pk], 'sidrexgpt-mag')
+        self.assertEqual(slugs[oldest.pk], 'sidrexgpt-mag-2')
+        self.assertEqual(slugs[plain.pk], 'baska-robot')
+
+    def test_migration_slug_rules_match_the_model(self):
+        for name in ('ZZEN Robot', 'SidrexGPT Asistanı', 'Dördüncü Robot', 'Özel Ürün 2'):
+            self.assertEqual(slug_migration.build_slug(name), Robot(name=name).build_slug())
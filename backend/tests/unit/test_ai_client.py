@@ -0,0 +1,53 @@
+"""
+OpenRouter istemcisi testleri (robots/ai_client.py)
+Async yol: event loop başına httpx.AsyncClient ve sync yol ile aynı hata sözleşmesi
+"""
+
+import asyncio
+from unittest import mock
+
+import httpx
+from django.test import SimpleTestCase
+
+from robots.ai_client import OpenRouterAIHandler
+
+
+class AsyncClientPerLoopTests(SimpleTestCase):
+
+    def setUp(self):
+        self.handler = OpenRouterAIHandler(api_key='test-key', base_url='http://openrouter.test/api/v1')
+        self.addCleanup(self.handler.close)
+
+    def test_each_event_loop_gets_its_own_client(self):
+        async def clients():
+            first = self.handler._get_async_client()
+            second = self.handler._get_async_client()
+            await self.handler.aclose()
+            return first, second
+
+        first, second = asyncio.run(clients())
+        other, _ = asyncio.run(clients())
+
+        self.assertIs(first, second)
+        self.assertIsNot(first, other)
+        self.assertTrue(first.is_closed and other.is_closed)
+        self.assertEqual(len(self.handler._async_clients), 0)
+
+    def test_async_request_maps_errors_like_sync_path(self):
+        transport = httpx.MockTransport(lambda request: httpx.Response(429, json={'error': 'rate limit'}))
+        real_client = httpx.AsyncClient
+        messages = [{'role': 'user', 'content': 'Merhaba'}]
+
+        async def request():
+            try:
+                response = await self.handler.amake_chat_request(messages)
+                with self.assertRaises(ValueError):
+                    await self.handler.achat_with_history(messages)
+                return response
+            finally:
+                await self.handler.aclose()
+
+        with mock.patch('robots.ai_client.httpx.AsyncClient', lambda **kwargs: real_client(transport=transport, **kwargs)):
+            response = asyncio.run(request())
+
+        self.assertEqual(response, {'error': 'AI hizmeti şu anda yoğun. Lütfen daha sonra tekrar deneyin.'})
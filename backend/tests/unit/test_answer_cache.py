@@ -0,0 +1,124 @@
+"""
+Semantik yanıt cache'i testleri (robots/answer_cache.py)
+İsabet/ıska, anahtar ayrımı ve LRU tahliyesi (process içi LocMem cache ile)
+"""
+
+from types import SimpleNamespace
+from unittest import mock
+
+from django.core.cache import cache
+from django.test import SimpleTestCase, override_settings
+
+from robots.answer_cache import ANSWER_CACHE_TOUCH_INTERVAL, SemanticAnswerCache
+
+
+class FakeClock:
+    """answer_cache.time yerine: LRU zamanlarını testte ilerletmek için"""
+
+    def __init__(self, now=1000.0):
+        self.now = now
+
+    def time(self):
+        return self.now
+
+    def monotonic(self):
+        return self.now
+
+    def advance(self, seconds):
+        self.now += seconds
+
+
+@override_settings(CACHES={'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'}})
+class SemanticAnswerCacheTests(SimpleTestCase):
+
+    def setUp(self):
+        cache.clear()
+        self.clock = FakeClock()
+        patcher = mock.patch('robots.answer_cache.time', self.clock)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self.answers = SemanticAnswerCache(threshold=0.95, ttl=300, max_entries=2, enabled=True)
+        self.robot = SimpleNamespace(id=7, context_version=3)
+        self.key = self.answers.make_key(self.robot, False, 'test-model')
+
+    def store(self, embedding, answer):
+        self.answers.store(self.key, embedding, f"soru {answer}", answer, [{'source': 'a.pdf'}], True)
+
+    def test_similar_question_hits_and_different_question_misses(self):
+        self.store([1.0, 0.0, 0.0], 'cevap')
+
+        entry, similarity = self.answers.lookup(self.key, [0.99, 0.05, 0.0])
+        self.assertEqual(entry['answer'], 'cevap')
+        self.assertEqual(entry['citations'], [{'source': 'a.pdf'}])
+        self.assertGreater(similarity, 0.95)
+
+        entry, similarity = self.answers.lookup(self.key, [0.0, 1.0, 0.0])
+        self.assertIsNone(entry)
+        self.assertAlmostEqual(similarity, 0.0, places=5)
+
+        self.assertEqual((self.answers.hits, self.answers.misses), (1, 1))
+
+    def test_empty_index_and_dimension_mismatch_miss(self):
+        self.assertEqual(self.answers.lookup(self.key, [1.0, 0.0, 0.0]), (None, None))
+
+        self.store([1.0, 0.0, 0.0], 'cevap')
+        self.assertEqual(self.answers.lookup(self.key, [1.0, 0.0]), (None, None))
+        self.assertEqual(self.answers.misses, 2)
+
+    def test_key_separates_context_version_mode_variant_and_model(self):
+        keys = {
+            self.key,
+            self.answers.make_key(SimpleNamespace(id=7, context_version=4), False, 'test-model'),
+            self.answers.make_key(self.robot, True, 'test-model'),
+            self.answers.make_key(self.robot, False, 'test-model', variant='pdf'),
+            self.answers.make_key(self.robot, False, 'other-model'),
+        }
+        self.assertEqual(len(keys), 5)
+
+        # Bağlam versiyonu artınca eski yanıt okunmaz
+        self.store([1.0, 0.0, 0.0], 'eski')
+        bumped = self.answers.make_key(SimpleNamespace(id=7, context_version=4), False, 'test-model')
+        self.assertEqual(self.answers.lookup(bumped, [1.0, 0.0, 0.0]), (None, None))
+
+    def test_least_recently_used_entry_is_evicted(self):
+        self.store([1.0, 0.0, 0.0], 'ilk')
+        self.clock.advance(1)
+        self.store([0.0, 1.0, 0.0], 'ikinci')
+
+        # İlk giriş yeniden kullanılır: LRU zamanı güncellenir, ikinci en eskisi olur
+        self.clock.advance(ANSWER_CACHE_TOUCH_INTERVAL + 1)
+        entry, _ = self.answers.lookup(self.key, [1.0, 0.0, 0.0])
+        self.assertEqual(entry['answer'], 'ilk')
+
+        self.clock.advance(1)
+        self.store([0.0, 0.0, 1.0], 'üçüncü')
+
+        self.assertIsNone(self.answers.lookup(self.key, [0.0, 1.0, 0.0])[0])
+        self.assertEqual(self.answers.lookup(self.key, [1.0, 0.0, 0.0])[0]['answer'], 'ilk')
+        self.assertEqual(self.answers.lookup(self.key, [0.0, 0.0, 1.0])[0]['answer'], 'üçüncü')
+        self.assertEqual(len(cache.get(self.key)['ids']), 2)
+
+    def test_expired_entry_is_dropped_from_index(self):
+        self.store([1.0, 0.0, 0.0], 'cevap')
+        index = cache.get(self.key)
+        cache.delete(f"{self.key}_{index['ids'][0]}")
+
+        entry, similarity = self.answers.lookup(self.key, [1.0, 0.0, 0.0])
+
+        self.assertIsNone(entry)
+        self.assertGreater(similarity, 0.95)
+        self.assertEqual(cache.get(self.key)['ids'], [])
+
+    def test_probe_uses_the_robot_read_embedding(self):
+        embedding_service = SimpleNamespace(model_name='test-model')
+        vector_service = mock.Mock()
+        vector_service.resolve_read_embedding.return_value = (embedding_service, {})
+        vector_service.get_query_embedding.return_value = [1.0, 0.0, 0.0]
+        self.store([1.0, 0.0, 0.0], 'cevap')
+
+        result = self.answers.probe(self.robot, 'Soru?', vector_service, optimization_enabled=False)
+
+        vector_service.resolve_read_embedding.assert_called_once_with(self.robot.id, self.robot)
+        vector_service.get_query_embedding.assert_called_once_with('Soru?', embedding_service)
+        self.assertEqual(result['key'], self.key)
+        self.assertEqual(result['entry']['answer'], 'cevap')
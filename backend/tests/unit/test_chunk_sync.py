@@ -0,0 +1,99 @@
+"""
+Artımlı chunk senkronizasyonu testleri (robots/vector_stores.py)
+plan_chunk_sync diff'i ve content_hash bazlı embedding tekrar kullanımı
+"""
+
+import numpy as np
+from django.test import SimpleTestCase
+
+from robots.vector_stores import embed_chunks_by_hash, plan_chunk_sync
+
+
+def make_chunk(content_hash, chunk_index, text=None, **metadata):
+    return {
+        'content_hash': content_hash,
+        'chunk_index': chunk_index,
+        'text': text or f"metin {content_hash}",
+        'metadata': {'chunk_index': chunk_index, **metadata},
+    }
+
+
+class PlanChunkSyncTests(SimpleTestCase):
+
+    def test_identical_chunk_set_is_unchanged(self):
+        chunks = [make_chunk('a', 0), make_chunk('b', 1)]
+        existing = [(10, 'a', 0, chunks[0]['metadata']), (11, 'b', 1, chunks[1]['metadata'])]
+
+        self.assertEqual(plan_chunk_sync(existing, chunks), ([], [], [], 2))
+
+    def test_diff_splits_new_moved_and_stale_chunks(self):
+        existing = [
+            (10, 'a', 0, {'chunk_index': 0}),
+            (11, 'b', 1, {'chunk_index': 1}),
+            (12, 'c', 2, {'chunk_index': 2}),
+        ]
+        # 'b' silindi, 'a' bir sıra kaydı, başa yeni 'd' eklendi, 'c' yerinde
+        chunks = [make_chunk('d', 0), make_chunk('a', 1), make_chunk('c', 2)]
+
+        new_chunks, updates, stale_ids, unchanged = plan_chunk_sync(existing, chunks)
+
+        self.assertEqual([chunk['content_hash'] for chunk in new_chunks], ['d'])
+        self.assertEqual(updates, [(1, {'chunk_index': 1}, 10)])
+        self.assertEqual(stale_ids, [11])
+        self.assertEqual(unchanged, 1)
+
+    def test_metadata_change_is_an_update_not_a_reembed(self):
+        existing = [(10, 'a', 0, {'chunk_index': 0, 'page': 1})]
+        chunks = [make_chunk('a', 0, page=2)]
+
+        new_chunks, updates, stale_ids, unchanged = plan_chunk_sync(existing, chunks)
+
+        self.assertEqual(new_chunks, [])
+        self.assertEqual(updates, [(0, {'chunk_index': 0, 'page': 2}, 10)])
+        self.assertEqual((stale_ids, unchanged), ([], 0))
+
+    def test_duplicate_hashes_are_matched_one_to_one(self):
+        existing = [(10, 'a', 0, {'chunk_index': 0})]
+        chunks = [make_chunk('a', 0), make_chunk('a', 1)]
+
+        new_chunks, updates, stale_ids, unchanged = plan_chunk_sync(existing, chunks)
+
+        # Aynı metnin ikinci kopyası mevcut satırı tekrar kullanamaz, yeni eklenir
+        self.assertEqual([chunk['chunk_index'] for chunk in new_chunks], [1])
+        self.assertEqual((updates, stale_ids, unchanged), ([], [], 1))
+
+    def test_rows_without_hash_are_replaced(self):
+        existing = [(10, None, 0, {'chunk_index': 0})]
+        chunks = [make_chunk('a', 0)]
+
+        new_chunks, updates, stale_ids, unchanged = plan_chunk_sync(existing, chunks)
+
+        self.assertEqual(len(new_chunks), 1)
+        self.assertEqual((updates, stale_ids, unchanged), ([], [10], 0))
+
+
+class EmbedChunksByHashTests(SimpleTestCase):
+
+    def test_only_missing_hashes_are_embedded_once(self):
+        calls = []
+
+        def embed(texts):
+            calls.append(list(texts))
+            return np.arange(len(texts) * 2, dtype=np.float32).reshape(len(texts), 2)
+
+        known = np.array([9.0, 9.0], dtype=np.float32)
+        chunks = [make_chunk('a', 0, 'aynı'), make_chunk('a', 1, 'aynı'), make_chunk('b', 2), make_chunk('c', 3)]
+
+        embedded = embed_chunks_by_hash(chunks, embed, {'c': known})
+
+        self.assertEqual(calls, [['aynı', 'metin b']])
+        self.assertEqual(set(embedded), {'a', 'b', 'c'})
+        np.testing.assert_array_equal(embedded['c'], known)
+        np.testing.assert_array_equal(embedded['b'], [2.0, 3.0])
+
+    def test_nothing_to_embed_skips_the_model(self):
+        def embed(texts):
+            raise AssertionError('embed çağrılmamalı')
+
+        embedded = embed_chunks_by_hash([make_chunk('a', 0)], embed, {'a': np.zeros(2)})
+        self.assertEqual(list(embedded), ['a'])
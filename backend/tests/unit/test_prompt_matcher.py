@@ -0,0 +1,103 @@
+"""
+Prompt konu eşleştirici testleri (robots/prompt_matcher.py)
+Öncelik sırası, Türkçe normalizasyon, eski tetikleyiciler ve versiyon cache'i
+"""
+
+from types import SimpleNamespace
+from unittest import mock
+
+from django.test import SimpleTestCase
+
+from robots import prompt_matcher
+from robots.prompt_matcher import PromptKeywordMatcher, get_prompt_matcher, normalize_keyword_text
+
+
+def make_prompt(prompt_type, topic_keywords='', content=None):
+    return SimpleNamespace(
+        prompt_type=prompt_type,
+        topic_keywords=topic_keywords,
+        prompt_content=content or f"{prompt_type} içerik",
+    )
+
+
+class NormalizeKeywordTextTests(SimpleTestCase):
+
+    def test_folds_turkish_characters_and_whitespace(self):
+        self.assertEqual(normalize_keyword_text('  Bağışıklık   SİSTEMİ '), 'bagisiklik sistemi')
+        self.assertEqual(normalize_keyword_text('IĞDIR'), 'igdir')
+        self.assertEqual(normalize_keyword_text(None), '')
+
+
+class PromptKeywordMatcherTests(SimpleTestCase):
+
+    def test_higher_priority_prompt_wins_regardless_of_position(self):
+        matcher = PromptKeywordMatcher([
+            make_prompt('uyku', 'uyku, gece', 'yüksek öncelik'),
+            make_prompt('stres', 'stres', 'düşük öncelik'),
+        ])
+
+        # Düşük öncelikli kelime mesajda önce geçse de öncelikli prompt seçilir
+        match = matcher.match('Stres yüzünden geceleri uyuyamıyorum')
+        self.assertEqual(match['prompt_content'], 'yüksek öncelik')
+
+        match = matcher.match('Stres altındayım')
+        self.assertEqual(match['prompt_content'], 'düşük öncelik')
+
+    def test_match_is_case_and_diacritic_insensitive(self):
+        matcher = PromptKeywordMatcher([make_prompt('sindirim', 'Şişkinlik, hazımsızlık')])
+
+        self.assertIsNotNone(matcher.match('ŞİŞKİNLİK yapıyor mu?'))
+        self.assertIsNotNone(matcher.match('hazimsizlik icin ne onerirsin'))
+
+    def test_legacy_topic_and_type_triggers(self):
+        matcher = PromptKeywordMatcher([
+            make_prompt('product_redirect', '', 'yönlendirme'),
+            make_prompt('topic', 'Yorgunluk', 'yorgunluk'),
+        ])
+
+        self.assertEqual(matcher.match('Çok bitkin hissediyorum')['prompt_content'], 'yorgunluk')
+        self.assertEqual(matcher.match('Zzen ne işe yarar?')['prompt_content'], 'yönlendirme')
+
+    def test_no_match_and_default_prompt(self):
+        matcher = PromptKeywordMatcher([
+            make_prompt('topic', 'uyku', 'konu'),
+            make_prompt('main', '', 'ana'),
+        ])
+
+        self.assertIsNone(matcher.match('Merhaba'))
+        self.assertIsNone(matcher.match(''))
+        self.assertEqual(matcher.default_prompt()['prompt_content'], 'ana')
+
+        without_main = PromptKeywordMatcher([make_prompt('topic', 'uyku', 'ilk'), make_prompt('topic', 'stres')])
+        self.assertEqual(without_main.default_prompt()['prompt_content'], 'ilk')
+
+    def test_prompts_without_keywords_compile_to_no_pattern(self):
+        matcher = PromptKeywordMatcher([make_prompt('main', '')])
+
+        self.assertIsNone(matcher.pattern)
+        self.assertIsNone(matcher.match('uyku'))
+        self.assertIsNone(PromptKeywordMatcher([]).default_prompt())
+
+
+class GetPromptMatcherTests(SimpleTestCase):
+
+    def setUp(self):
+        prompt_matcher._matchers.clear()
+        self.addCleanup(prompt_matcher._matchers.clear)
+
+    def make_robot(self, prompts):
+        system_prompts = mock.Mock()
+        system_prompts.filter.return_value.order_by.return_value = prompts
+        return SimpleNamespace(id=1, context_version=0, system_prompts=system_prompts)
+
+    def test_matcher_is_cached_per_context_version(self):
+        robot = self.make_robot([make_prompt('topic', 'uyku')])
+
+        first = get_prompt_matcher(robot)
+        self.assertIs(get_prompt_matcher(robot), first)
+        self.assertEqual(robot.system_prompts.filter.call_count, 1)
+
+        # Prompt değişince sinyaller versiyonu artırır: eşleştirici yeniden kurulur
+        robot.context_version = 1
+        self.assertIsNot(get_prompt_matcher(robot), first)
+        self.assertEqual(robot.system_prompts.filter.call_count, 2)
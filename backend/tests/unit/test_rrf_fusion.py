@@ -0,0 +1,64 @@
+"""
+Hibrit arama RRF birleştirme testleri (robots/vector_stores.fuse_reciprocal_rank)
+"""
+
+from unittest import mock
+
+from django.test import SimpleTestCase
+
+from robots.rag_config import RAGConfig
+from robots.vector_stores import fuse_reciprocal_rank
+
+
+def vector_hit(chunk_id, similarity):
+    return {'id': chunk_id, 'text': f"chunk {chunk_id}", 'similarity': similarity}
+
+
+def text_hit(chunk_id, text_similarity):
+    return {'id': chunk_id, 'text': f"chunk {chunk_id}", 'text_similarity': text_similarity}
+
+
+@mock.patch.object(RAGConfig, 'HYBRID_RRF_K', 60)
+@mock.patch.object(RAGConfig, 'HYBRID_VECTOR_WEIGHT', 1.0)
+@mock.patch.object(RAGConfig, 'HYBRID_TEXT_WEIGHT', 1.0)
+class FuseReciprocalRankTests(SimpleTestCase):
+
+    def test_chunk_found_by_both_searches_ranks_first(self):
+        vector = [vector_hit(1, 0.9), vector_hit(2, 0.8), vector_hit(3, 0.7)]
+        text = [text_hit(3, 0.6), text_hit(4, 0.5)]
+
+        fused = fuse_reciprocal_rank(vector, text, top_k=4)
+
+        # 2 ve 4 aynı puanda (ikisi de ikinci sırada): id ile sıralanır
+        self.assertEqual([entry['id'] for entry in fused], [3, 1, 2, 4])
+        self.assertAlmostEqual(fused[0]['rrf_score'], 1 / 63 + 1 / 61)
+        self.assertEqual((fused[0]['vector_similarity'], fused[0]['text_similarity']), (0.7, 0.6))
+
+    def test_text_only_hits_use_text_similarity(self):
+        fused = fuse_reciprocal_rank([], [text_hit(5, 0.4)], top_k=5)
+
+        self.assertEqual(fused[0]['similarity'], 0.4)
+        self.assertIsNone(fused[0]['vector_similarity'])
+        self.assertEqual(fused[0]['text_similarity'], 0.4)
+
+    def test_equal_scores_are_ordered_by_id(self):
+        fused = fuse_reciprocal_rank([vector_hit(8, 0.9)], [text_hit(7, 0.9)], top_k=2)
+
+        self.assertEqual([entry['id'] for entry in fused], [7, 8])
+
+    def test_result_is_cut_to_top_k(self):
+        vector = [vector_hit(i, 1 - i / 10) for i in range(5)]
+
+        self.assertEqual([entry['id'] for entry in fuse_reciprocal_rank(vector, [], top_k=2)], [0, 1])
+
+    def test_weights_shift_the_ranking(self):
+        vector = [vector_hit(1, 0.9), vector_hit(2, 0.8)]
+        text = [text_hit(2, 0.9), text_hit(1, 0.1)]
+
+        with mock.patch.object(RAGConfig, 'HYBRID_TEXT_WEIGHT', 3.0):
+            fused = fuse_reciprocal_rank(vector, text, top_k=2)
+        self.assertEqual([entry['id'] for entry in fused], [2, 1])
+
+        with mock.patch.object(RAGConfig, 'HYBRID_VECTOR_WEIGHT', 3.0):
+            fused = fuse_reciprocal_rank(vector, text, top_k=2)
+        self.assertEqual([entry['id'] for entry in fused], [1, 2])